@@ -0,0 +1,6 @@
+"""Summary statistics shared by the benchmarks"""
+
+def percentile(samples, p):
+    """Nearest-rank percentile of ``samples``, ``p`` between 0 and 1"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
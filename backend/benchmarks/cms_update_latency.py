@@ -0,0 +1,94 @@
+"""Latency of one CMS edit: three round trips versus find_one_and_update
+
+Times the old update path (find_one, update_one, find_one) against
+utils.versioning.atomic_update on the same documents. Against a real MongoDB
+the difference is dominated by network round trips, so run it against a
+server as far away as production's. Without a server, --mock-rtt runs on
+mongomock-motor and adds the given delay to every call.
+
+Usage (from backend/):
+    python -m benchmarks.cms_update_latency [--edits 500] [--mock-rtt 1.0]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+from datetime import datetime
+
+from benchmarks._stats import percentile
+
+COLLECTION = "bench_cms_updates"
+
+class DelayedCollection:
+    """Wraps a collection and sleeps before every awaited call"""
+
+    def __init__(self, collection, delay: float):
+        self._collection = collection
+        self._delay = delay
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def delayed(*args, **kwargs):
+            await asyncio.sleep(self._delay)
+            return await method(*args, **kwargs)
+
+        return delayed
+
+async def three_round_trips(collection, item_id, update_data):
+    # What update_service/update_case_study/update_concept used to do
+    existing = await collection.find_one({"id": item_id})
+    if not existing:
+        return None
+    await collection.update_one({"id": item_id}, {"$set": update_data})
+    return await collection.find_one({"id": item_id})
+
+async def one_round_trip(collection, item_id, update_data):
+    from utils.versioning import atomic_update
+    return await atomic_update(collection, item_id, update_data)
+
+async def main(edits: int, mongo_url: str, mock_rtt: float):
+    if mock_rtt:
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+        collection = DelayedCollection(client["bench"][COLLECTION], mock_rtt / 1000)
+        raw = client["bench"][COLLECTION]
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(mongo_url)
+        raw = client[os.environ.get("DB_NAME", "alaama_cms")][COLLECTION]
+        collection = raw
+
+    ids = [str(uuid.uuid4()) for _ in range(50)]
+    await raw.delete_many({})
+    await raw.insert_many([{"id": item_id, "title": "Bench", "order": 0} for item_id in ids])
+    await raw.create_index("id", unique=True)
+
+    try:
+        for name, update in (("find/update/find", three_round_trips), ("find_one_and_update", one_round_trip)):
+            latencies = []
+            for n in range(edits):
+                started = time.perf_counter()
+                document = await update(collection, ids[n % len(ids)], {"order": n, "updated_at": datetime.utcnow()})
+                latencies.append((time.perf_counter() - started) * 1000)
+                assert document is not None
+            print(
+                f"{name:20s} edits={edits:5d} "
+                f"p50={statistics.median(latencies):7.2f}ms "
+                f"p95={percentile(latencies, 0.95):7.2f}ms "
+                f"max={max(latencies):7.2f}ms"
+            )
+    finally:
+        await raw.drop()
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency per CMS edit")
+    parser.add_argument("--edits", type=int, default=500)
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--mock-rtt", type=float, default=0.0, help="ms per call on mongomock instead of MongoDB")
+    args = parser.parse_args()
+    asyncio.run(main(args.edits, args.mongo_url, args.mock_rtt))
@@ -0,0 +1,131 @@
+"""Contact submission throughput: one insert per submission versus write-behind batches
+
+Sends bursts of concurrent contact submission inserts (and the email_sent
+updates that follow) through insert_one/update_one and through
+utils.write_behind's InsertBatcher/UpdateBatcher, and reports writes per
+second and per-write latency. The gain comes from round trips and pool
+connections, so run it against a server as far away as production's, with
+the production MONGO_MAX_POOL_SIZE. Without a server, --mock-rtt runs on
+mongomock-motor and holds one of --mock-connections for the given delay on
+every call (mongomock's own cost, especially for updates, is not a server's).
+
+Usage (from backend/):
+    python -m benchmarks.contact_batching [--submissions 2000] [--concurrency 100]
+        [--max-delay-ms 5] [--max-batch 100] [--write-concern 1]
+        [--mock-rtt 1.0] [--mock-connections 10]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+from datetime import datetime
+
+from benchmarks._stats import percentile
+
+COLLECTION = "bench_contact_submissions"
+
+class PooledDelayedCollection:
+    """Wraps a collection; every awaited call holds a connection for ``delay``"""
+
+    def __init__(self, collection, delay: float, connections: int):
+        self._collection = collection
+        self._delay = delay
+        self._connections = asyncio.Semaphore(connections)
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def delayed(*args, **kwargs):
+            async with self._connections:
+                await asyncio.sleep(self._delay)
+                return await method(*args, **kwargs)
+
+        return delayed
+
+def submission():
+    return {
+        "id": str(uuid.uuid4()),
+        "name": "Load Test",
+        "email": "load@example.com",
+        "company": "Bench",
+        "message": "Benchmark contact submission, please ignore.",
+        "submitted_at": datetime.utcnow(),
+        "email_sent": False,
+    }
+
+async def run(write, items, concurrency: int):
+    """Apply ``write`` to every item with at most ``concurrency`` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(item):
+        async with semaphore:
+            started = time.perf_counter()
+            await write(item)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(item) for item in items))
+    return len(items) / (time.perf_counter() - started), latencies
+
+async def main(args):
+    from utils.write_behind import InsertBatcher, UpdateBatcher, parse_write_concern
+
+    if args.mock_rtt:
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+        raw = client["bench"][COLLECTION]
+        collection = PooledDelayedCollection(raw, args.mock_rtt / 1000, args.mock_connections)
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(args.mongo_url)
+        raw = client[os.environ.get("DB_NAME", "alaama_cms")][COLLECTION]
+        collection = raw
+    write_concern = parse_write_concern(args.write_concern)
+    if write_concern is not None and not args.mock_rtt:
+        collection = collection.with_options(write_concern=write_concern)
+
+    settings = {"max_batch": args.max_batch, "max_delay": args.max_delay_ms / 1000}
+    inserts = InsertBatcher(collection, **settings)
+    updates = UpdateBatcher(collection, **settings)
+    sent = {"$set": {"email_sent": True, "email_sent_at": datetime.utcnow()}}
+
+    paths = (
+        ("insert_one", lambda doc: collection.insert_one(doc)),
+        ("insert batches", inserts.insert),
+        ("update_one", lambda doc: collection.update_one({"id": doc["id"]}, sent)),
+        ("update batches", lambda doc: updates.update_one({"id": doc["id"]}, sent)),
+    )
+    await raw.delete_many({})
+    try:
+        documents = []
+        for name, write in paths:
+            if name.startswith("insert"):
+                documents = [submission() for _ in range(args.submissions)]
+            rate, latencies = await run(write, documents, args.concurrency)
+            print(
+                f"{name:15s} writes={len(documents):5d} "
+                f"rate={rate:9.1f}/s "
+                f"p50={statistics.median(latencies):7.2f}ms "
+                f"p95={percentile(latencies, 0.95):7.2f}ms"
+            )
+        print(f"mean insert batch {inserts.stats()['mean_batch_size']}, "
+              f"mean update batch {updates.stats()['mean_batch_size']}")
+    finally:
+        await raw.drop()
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Contact submission write throughput")
+    parser.add_argument("--submissions", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100, help="submissions in flight")
+    parser.add_argument("--max-batch", type=int, default=100)
+    parser.add_argument("--max-delay-ms", type=float, default=5.0)
+    parser.add_argument("--write-concern", default="", help='e.g. "majority", "1" or "0"')
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--mock-rtt", type=float, default=0.0, help="ms per call on mongomock instead of MongoDB")
+    parser.add_argument("--mock-connections", type=int, default=10, help="concurrent mongomock calls")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,110 @@
+"""Public API latency while contact emails are being sent
+
+Starts a deliberately slow local SMTP server and sends a burst of emails in
+the background while timing GET /api/public/services, once with the old
+behaviour (blocking smtplib calls on the event loop) and once through
+AsyncMailTransport. Requires httpx and aiosmtpd, and a reachable MONGO_URL
+(the endpoint is served from the content cache after the first request).
+
+Usage (from backend/):
+    python -m benchmarks.email_latency [--emails 20] [--smtp-delay 0.2]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from benchmarks._stats import percentile
+
+SMTP_PORT = 8025
+REQUEST_INTERVAL = 0.01
+
+def start_slow_smtp_server(delay: float):
+    from aiosmtpd.controller import Controller
+    from aiosmtpd.smtp import AuthResult
+
+    class SlowHandler:
+        async def handle_DATA(self, server, session, envelope):
+            await asyncio.sleep(delay)
+            return "250 Message accepted"
+
+    controller = Controller(
+        SlowHandler(),
+        hostname="127.0.0.1",
+        port=SMTP_PORT,
+        authenticator=lambda *args: AuthResult(success=True),
+        auth_require_tls=False
+    )
+    controller.start()
+    return controller
+
+async def measure(app, send_emails, emails: int):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/api/public/services")  # warm the content cache
+
+        sender = asyncio.create_task(send_emails(emails))
+        latencies = []
+        # Open loop: a request is due every interval, and its latency counts
+        # from when it was due, so event-loop stalls show up in the numbers
+        due = time.perf_counter()
+        while not sender.done():
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            response = await client.get("/api/public/services")
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - due) * 1000)
+            due += REQUEST_INTERVAL
+        await sender
+    return latencies
+
+async def main(emails: int, smtp_delay: float):
+    os.environ.update({
+        "SMTP_HOST": "127.0.0.1",
+        "SMTP_PORT": str(SMTP_PORT),
+        "SMTP_USER": "bench",
+        "SMTP_PASSWORD": "bench",
+        "SMTP_STARTTLS": "false",
+    })
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+
+    import server
+    from utils import email as email_senders
+    from utils.mail_transport import AsyncMailTransport
+
+    async def blocking(count):
+        # What submit_contact_form used to do: smtplib on the event loop
+        for n in range(count):
+            email_senders.send_welcome_email(f"bench{n}@example.com", "Bench")
+            await asyncio.sleep(0)
+
+    transport = AsyncMailTransport(max_concurrency=4, timeout=30)
+
+    async def offloaded(count):
+        await asyncio.gather(*(
+            transport.send_welcome_email(f"bench{n}@example.com", "Bench") for n in range(count)
+        ))
+
+    controller = start_slow_smtp_server(smtp_delay)
+    try:
+        for name, sender in (("blocking smtplib", blocking), ("AsyncMailTransport", offloaded)):
+            latencies = await measure(server.app, sender, emails)
+            print(
+                f"{name:20s} requests={len(latencies):4d} "
+                f"p50={statistics.median(latencies):7.1f}ms "
+                f"p95={percentile(latencies, 0.95):7.1f}ms "
+                f"max={max(latencies):7.1f}ms"
+            )
+    finally:
+        transport.shutdown()
+        controller.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Public API latency while sending email")
+    parser.add_argument("--emails", type=int, default=20)
+    parser.add_argument("--smtp-delay", type=float, default=0.2, help="seconds per message")
+    args = parser.parse_args()
+    asyncio.run(main(args.emails, args.smtp_delay))
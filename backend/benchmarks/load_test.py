@@ -0,0 +1,270 @@
+"""Throughput and latency of the API under a realistic request mix
+
+Boots server.app in-process (httpx ASGI transport, no network) against
+mongomock-motor or a local mongod, seeds it with seed_data at the requested
+scale and drives a weighted mix of public reads, contact submissions and CMS
+writes from concurrent clients. Reports requests/s and p50/p95/p99 latency
+per endpoint, plus peak memory allocated per request (measured in a separate
+pass under tracemalloc so it does not distort the timings). Results are
+written as JSON; pass a previous file with --compare to see the change.
+
+Usage (from backend/):
+    python -m benchmarks.load_test [--backend mock|mongo] [--scale 10]
+        [--mix read-heavy] [--duration 10] [--concurrency 20]
+        [--output results.json] [--compare previous.json]
+
+--backend mongo uses MONGO_URL and drops the DB_NAME database (default
+alaama_bench) when done, so never point it at real data.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+
+from benchmarks._stats import percentile
+
+# endpoint -> weight
+MIXES = {
+    "read-heavy": {
+        "public_services": 30, "public_case_studies": 25, "public_case_studies_card": 15,
+        "public_bundle": 20, "contact_submit": 5, "cms_list": 3, "cms_update": 2,
+    },
+    "write-heavy": {
+        "public_services": 20, "public_case_studies": 10, "public_bundle": 10,
+        "contact_submit": 30, "cms_list": 10, "cms_update": 20,
+    },
+    "public-only": {
+        "public_services": 35, "public_case_studies": 25, "public_case_studies_card": 15,
+        "public_bundle": 25,
+    },
+}
+
+ALLOCATION_SAMPLES = 50
+
+def configure_environment(backend: str):
+    """Settings for an isolated, unthrottled run; must happen before importing server"""
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ["DB_NAME"] = os.environ.get("BENCH_DB_NAME", "alaama_bench")
+    os.environ["RATE_LIMIT_LOGIN"] = "1000000000/60"
+    os.environ["RATE_LIMIT_CONTACT"] = "1000000000/60"
+    os.environ["RATE_LIMIT_PUBLIC"] = "1000000000/60"
+    os.environ["RATE_LIMIT_REFRESH"] = "1000000000/60"
+    # Queue emails but never send them during the run
+    os.environ["EMAIL_WORKERS"] = "0"
+    if backend == "mock":
+        import mongomock_motor
+        import motor.motor_asyncio
+        motor.motor_asyncio.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
+        # mongomock-motor's with_options returns an unwrapped (blocking)
+        # collection, and there are no secondaries to route to anyway
+        os.environ["MONGO_PUBLIC_READ_PREFERENCE"] = "primary"
+
+class Scenario:
+    def __init__(self, service_ids, auth_headers):
+        self.service_ids = service_ids
+        self.auth_headers = auth_headers
+        self.counter = 0
+
+    def request(self, endpoint: str):
+        """(method, url, kwargs) for one request to ``endpoint``"""
+        self.counter += 1
+        if endpoint == "public_services":
+            return "GET", "/api/public/services", {}
+        if endpoint == "public_case_studies":
+            return "GET", "/api/public/case-studies", {}
+        if endpoint == "public_case_studies_card":
+            return "GET", "/api/public/case-studies?featured_only=true&fields=card", {}
+        if endpoint == "public_bundle":
+            return "GET", "/api/public/bundle", {}
+        if endpoint == "contact_submit":
+            return "POST", "/api/contact/", {"json": {
+                "name": "Load Test",
+                "email": f"load{self.counter}@example.com",
+                "company": "Bench",
+                "message": "Benchmark contact submission, please ignore.",
+            }}
+        if endpoint == "cms_list":
+            return "GET", "/api/cms/services?active_only=false", {"headers": self.auth_headers}
+        if endpoint == "cms_update":
+            service_id = random.choice(self.service_ids)
+            return "PUT", f"/api/cms/services/{service_id}", {
+                "json": {"order": self.counter}, "headers": self.auth_headers
+            }
+        raise ValueError(f"Unknown endpoint: {endpoint}")
+
+async def drive(client, scenario, mix, duration: float, concurrency: int):
+    endpoints = list(mix)
+    weights = [mix[endpoint] for endpoint in endpoints]
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            endpoint = random.choices(endpoints, weights)[0]
+            method, url, kwargs = scenario.request(endpoint)
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies[endpoint].append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors[endpoint] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+async def measure_allocations(client, scenario, endpoints):
+    """Mean peak bytes allocated while serving one request, per endpoint"""
+    results = {}
+    tracemalloc.start()
+    try:
+        for endpoint in endpoints:
+            peaks = []
+            for _ in range(ALLOCATION_SAMPLES):
+                method, url, kwargs = scenario.request(endpoint)
+                baseline, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                await client.request(method, url, **kwargs)
+                _, peak = tracemalloc.get_traced_memory()
+                peaks.append(peak - baseline)
+            results[endpoint] = statistics.mean(peaks)
+    finally:
+        tracemalloc.stop()
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def summarize(latencies, errors, elapsed, allocations):
+    endpoints = {}
+    for endpoint, samples in sorted(latencies.items()):
+        endpoints[endpoint] = {
+            "requests": len(samples),
+            "errors": errors.get(endpoint, 0),
+            "rps": round(len(samples) / elapsed, 1),
+            "p50_ms": round(percentile(samples, 0.50), 3),
+            "p95_ms": round(percentile(samples, 0.95), 3),
+            "p99_ms": round(percentile(samples, 0.99), 3),
+            "mean_ms": round(statistics.mean(samples), 3),
+            "alloc_peak_kib": round(allocations.get(endpoint, 0) / 1024, 1),
+        }
+    total = sum(len(samples) for samples in latencies.values())
+    all_samples = [sample for samples in latencies.values() for sample in samples]
+    return endpoints, {
+        "requests": total,
+        "errors": sum(errors.values()),
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(all_samples, 0.50), 3),
+        "p95_ms": round(percentile(all_samples, 0.95), 3),
+        "p99_ms": round(percentile(all_samples, 0.99), 3),
+    }
+
+def print_report(results, previous=None):
+    header = f"{'endpoint':26s} {'reqs':>7s} {'err':>5s} {'rps':>8s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'alloc KiB':>10s}"
+    print(header)
+    print("-" * len(header))
+    rows = list(results["endpoints"].items()) + [("TOTAL", results["total"])]
+    for endpoint, row in rows:
+        line = (
+            f"{endpoint:26s} {row['requests']:7d} {row['errors']:5d} {row['rps']:8.1f} "
+            f"{row['p50_ms']:8.2f} {row['p95_ms']:8.2f} {row['p99_ms']:8.2f} "
+            + (f"{row['alloc_peak_kib']:10.1f}" if "alloc_peak_kib" in row else " " * 10)
+        )
+        before = (previous or {}).get("endpoints", {}).get(endpoint) if endpoint != "TOTAL" else (previous or {}).get("total")
+        if before:
+            line += (
+                f"   rps {(row['rps'] / before['rps'] - 1) * 100:+6.1f}%"
+                f"  p95 {(row['p95_ms'] / before['p95_ms'] - 1) * 100:+6.1f}%"
+            )
+        print(line)
+
+async def main(args):
+    configure_environment(args.backend)
+
+    import server
+    from seed_data import seed_content, seed_admin
+    from utils.auth import create_access_token
+    import httpx
+
+    # Per-request INFO logs would dominate the measurement
+    logging.disable(logging.INFO)
+    random.seed(args.seed)
+    await server.startup_event()
+    try:
+        await seed_content(server.db, scale=args.scale)
+        await seed_admin(server.db)
+        server.content_cache.clear()
+
+        service_ids = [doc["id"] async for doc in server.db.services.find({}, projection={"id": 1})]
+        scenario = Scenario(service_ids, {"Authorization": "Bearer " + create_access_token({"sub": "admin"})})
+        mix = MIXES[args.mix]
+
+        transport = httpx.ASGITransport(app=server.app, client=("127.0.0.1", 50000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            # Warm caches and lazily created pools before timing
+            for endpoint in mix:
+                method, url, kwargs = scenario.request(endpoint)
+                await client.request(method, url, **kwargs)
+
+            latencies, errors, elapsed = await drive(client, scenario, mix, args.duration, args.concurrency)
+            allocations = await measure_allocations(client, scenario, list(mix))
+
+        endpoints, total = summarize(latencies, errors, elapsed, allocations)
+        results = {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": datetime.utcnow().isoformat() + "Z",
+                "backend": args.backend,
+                "scale": args.scale,
+                "mix": args.mix,
+                "duration_s": args.duration,
+                "concurrency": args.concurrency,
+                "python": platform.python_version(),
+            },
+            "endpoints": endpoints,
+            "total": total,
+        }
+    finally:
+        if args.backend == "mongo":
+            await server.client.drop_database(os.environ["DB_NAME"])
+        await server.shutdown_db_client()
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        print(f"Compared with {args.compare} (commit {previous['meta'].get('commit')})")
+    print_report(results, previous)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the API in-process")
+    parser.add_argument("--backend", choices=("mock", "mongo"), default="mock")
+    parser.add_argument("--scale", type=int, default=10, help="copies of the seed content")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="read-heavy")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the request mix")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,63 @@
+"""Create and audit MongoDB indexes for Alaama Creative Studio
+
+Usage:
+    python manage_indexes.py ensure [--background]
+    python manage_indexes.py report
+"""
+
+import argparse
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+from utils.indexes import INDEXES, ensure_indexes, index_report
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017/alaama')
+DB_NAME = os.environ.get('DB_NAME', 'alaama_cms')
+
+async def ensure(background: bool):
+    """Build every registered index that is missing"""
+    client = AsyncIOMotorClient(MONGO_URL)
+    db = client[DB_NAME]
+
+    try:
+        print(f"🔧 Ensuring {len(INDEXES)} indexes on {DB_NAME}...")
+        created = await ensure_indexes(db, background=background)
+        for collection, names in created.items():
+            print(f"✅ {collection}: {', '.join(names)}")
+    finally:
+        client.close()
+
+async def report():
+    """Print missing, unregistered and unused indexes"""
+    client = AsyncIOMotorClient(MONGO_URL)
+    db = client[DB_NAME]
+
+    try:
+        for collection, result in (await index_report(db)).items():
+            print(f"📋 {collection}")
+            for kind in ("missing", "unregistered", "unused"):
+                if result[kind]:
+                    print(f"   {kind}: {', '.join(result[kind])}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    ensure_parser = subcommands.add_parser("ensure", help="create missing indexes")
+    ensure_parser.add_argument(
+        "--background",
+        action="store_true",
+        help="build without blocking the collection (MongoDB < 4.2)"
+    )
+    subcommands.add_parser("report", help="show missing and unused indexes")
+    args = parser.parse_args()
+
+    if args.command == "ensure":
+        asyncio.run(ensure(args.background))
+    else:
+        asyncio.run(report())
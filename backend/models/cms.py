@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 from datetime import datetime
 import uuid
 
@@ -33,6 +33,7 @@ class Service(BaseModel):
     active: bool
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    version: int = Field(default=0)  # incremented by every update
 
 # Concept Models
 class ConceptCreate(BaseModel):
@@ -61,6 +62,7 @@ class Concept(BaseModel):
     active: bool
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    version: int = Field(default=0)  # incremented by every update
 
 # Case Study Models
 class CaseStudyCreate(BaseModel):
@@ -107,6 +109,31 @@ class CaseStudy(BaseModel):
     active: bool
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    version: int = Field(default=0)  # incremented by every update
+
+# Bulk Write Models
+class BulkOperation(BaseModel):
+    op: Literal["create", "update", "delete", "reorder"]
+    id: Optional[str] = None  # required for update, delete and reorder
+    data: Optional[Dict[str, Any]] = None  # create/update fields
+    order: Optional[int] = None  # reorder only
+    version: Optional[int] = None  # only apply if the document still has this version
+
+class BulkRequest(BaseModel):
+    operations: List[BulkOperation] = Field(..., min_items=1, max_items=500)
+    atomic: bool = Field(default=False)  # all or nothing, needs a replica set
+
+class BulkItemResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[str] = None
+    status: Literal["ok", "not_found", "conflict", "invalid", "failed", "skipped"]
+    error: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    applied: int
+    failed: int
+    results: List[BulkItemResult]
 
 # Admin User Models
 class AdminUserCreate(BaseModel):
@@ -130,6 +157,10 @@ class AdminLogin(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     username: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,280 @@
+"""Typed repositories over the CMS content collections
+
+Services, case studies and concepts are stored and served the same way, so
+every query, write and serialization goes through one ``ContentRepository``
+parameterized by the collection's models. Changes made here (projections,
+cursor batch size, caching, timing, read routing) apply to all content types
+at once.
+"""
+
+from dataclasses import dataclass
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pydantic import BaseModel
+from pymongo.read_preferences import Primary
+from models.cms import (
+    BulkOperation,
+    Service, ServiceCreate, ServiceUpdate,
+    CaseStudy, CaseStudyCreate, CaseStudyUpdate,
+    Concept, ConceptCreate, ConceptUpdate
+)
+from utils.bulk import ContentModels, apply_bulk
+from utils.cache import ContentCache
+from utils.coherence import bump_revision
+from utils.read_routing import ReadRouting
+from utils.snapshots import ContentSnapshot, build_document_snapshot, build_snapshot, fieldset_model
+from utils.versioning import atomic_update, version_etag
+from datetime import datetime
+from typing import Any, Dict, Generic, Iterator, List, Mapping, Optional, Sequence, Tuple, Type, TypeVar
+import contextlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+DEFAULT_SORT: Sequence[Tuple[str, int]] = (("order", 1),)
+
+# Named fieldsets for ``fields=``; "card" is what the listing grids show
+SERVICE_PRESETS = {"card": ("id", "title", "subtitle", "icon", "order")}
+CASE_STUDY_PRESETS = {"card": ("id", "title", "category", "subtitle", "image", "featured", "order")}
+CONCEPT_PRESETS = {"card": ("id", "title", "image", "link", "order")}
+
+
+def serialize(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Make a stored document JSON-ready: string ``_id`` and an ``id`` for old documents"""
+    if "_id" in document:
+        document["_id"] = str(document["_id"])
+        if "id" not in document:
+            document["id"] = document["_id"]
+    return document
+
+
+class ContentRepository(Generic[ModelT]):
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        collection: str,
+        models: ContentModels,
+        cache: Optional[ContentCache] = None,
+        batch_size: int = 200,
+        presets: Optional[Mapping[str, Tuple[str, ...]]] = None,
+        routing: Optional[ReadRouting] = None
+    ):
+        self.db = db
+        self.name = collection
+        self.collection = db[collection]
+        self.models = models
+        self.model: Type[ModelT] = models.document
+        self.cache = cache
+        self.batch_size = batch_size
+        self.presets = dict(presets or {})
+        self.routing = routing
+        # Route key -> collection handle with that read preference; primary
+        # routes reuse the default handle
+        self._readers = {
+            route: self.collection if preference == Primary() else self.collection.with_options(
+                read_preference=preference
+            )
+            for route, preference in (routing.preferences.items() if routing else ())
+        }
+        # Only the fields the model serves (plus _id, the fallback id)
+        self.projection = {field: True for field in self.model.model_fields}
+        # operation -> [calls, total seconds]
+        self._timings: Dict[str, List[float]] = {}
+
+    @contextlib.contextmanager
+    def _timed(self, operation: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            timing = self._timings.setdefault(operation, [0, 0.0])
+            timing[0] += 1
+            timing[1] += time.perf_counter() - started
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Calls and mean latency (ms) per operation"""
+        return {
+            operation: {"calls": calls, "mean_ms": round(total / calls * 1000, 3)}
+            for operation, (calls, total) in self._timings.items()
+        }
+
+    def fieldset(self, fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+        """Parse a ``fields=`` value (field names and/or preset names)
+
+        Returns the field names in model order, always including ``id``, or
+        None for all fields. Raises ValueError for unknown names.
+        """
+        if not fields:
+            return None
+        selected = {"id"}
+        for name in (part.strip() for part in fields.split(",")):
+            if not name:
+                continue
+            if name in self.presets:
+                selected.update(self.presets[name])
+            elif name in self.model.model_fields:
+                selected.add(name)
+            else:
+                raise ValueError(f"Unknown field for {self.name}: {name}")
+        return self._in_model_order(selected)
+
+    def _in_model_order(self, names: Any) -> Tuple[str, ...]:
+        return tuple(name for name in self.model.model_fields if name in names)
+
+    def _reader(self, public: bool) -> AsyncIOMotorCollection:
+        """Collection handle with the read preference routing picks for this read"""
+        if self.routing is None:
+            return self.collection
+        return self._readers[self.routing.route(self.name, public)]
+
+    async def changed(self) -> None:
+        """Invalidate cached content here and signal the other workers"""
+        if self.cache is not None:
+            self.cache.invalidate(self.name)
+        if self.routing is not None:
+            self.routing.wrote(self.name)
+        try:
+            await bump_revision(self.db, self.name)
+        except Exception as e:
+            logger.error(f"Failed to bump {self.name} revision: {e}")
+
+    # Reads
+
+    async def find(
+        self,
+        filter_query: Dict[str, Any],
+        sort: Sequence[Tuple[str, int]] = DEFAULT_SORT,
+        fields: Optional[Tuple[str, ...]] = None,
+        public: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Matching documents, serialized; only ``fields`` are read when given"""
+        projection = {field: True for field in fields} if fields else self.projection
+        with self._timed("find"):
+            cursor = self._reader(public).find(filter_query, projection=projection)
+            cursor = cursor.sort(list(sort)).batch_size(self.batch_size)
+            return [serialize(document) async for document in cursor]
+
+    async def get(self, item_id: str) -> Optional[Dict[str, Any]]:
+        with self._timed("get"):
+            document = await self._reader(False).find_one({"id": item_id}, projection=self.projection)
+        return serialize(document) if document else None
+
+    async def list_snapshot(
+        self,
+        filter_query: Dict[str, Any],
+        fields: Optional[Tuple[str, ...]] = None,
+        public: bool = False
+    ) -> ContentSnapshot:
+        """Rendered listing, straight from the database"""
+        model = fieldset_model(self.model, fields) if fields else self.model
+        return build_snapshot(model, await self.find(filter_query, fields=fields, public=public))
+
+    async def cached_snapshot(
+        self,
+        variant: str,
+        filter_query: Dict[str, Any],
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> ContentSnapshot:
+        """Public listing, rendered once per content version when a cache is set
+
+        Reads use the public read preference. Only the full listing and
+        preset fieldsets are cached, so arbitrary ``fields=`` combinations
+        cannot grow the cache.
+        """
+        cacheable = fields is None or fields in {
+            self._in_model_order({"id", *preset}) for preset in self.presets.values()
+        }
+        if self.cache is None or not cacheable:
+            return await self.list_snapshot(filter_query, fields, public=True)
+        key = variant if fields is None else f"{variant}:{','.join(fields)}"
+        return await self.cache.get_or_load(
+            self.name, key, lambda: self.list_snapshot(filter_query, fields, public=True)
+        )
+
+    async def document_snapshot(self, item_id: str) -> Optional[ContentSnapshot]:
+        """Rendered document with its version as the ETag"""
+        document = await self.get(item_id)
+        if document is None:
+            return None
+        return build_document_snapshot(
+            self.model, document, etag=version_etag(document.get("version", 0))
+        )
+
+    # Writes
+
+    async def create(self, data: BaseModel) -> Dict[str, Any]:
+        item = self.model(**data.dict())
+        document = item.dict()
+        with self._timed("create"):
+            result = await self.collection.insert_one(document)
+        document["_id"] = str(result.inserted_id)
+        await self.changed()
+        return document
+
+    async def update(
+        self,
+        item_id: str,
+        data: BaseModel,
+        expected_versions: Optional[List[int]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Apply the non-empty fields of ``data``; see utils.versioning.atomic_update"""
+        update_data = {k: v for k, v in data.dict().items() if v is not None}
+        update_data["updated_at"] = datetime.utcnow()
+        with self._timed("update"):
+            document = await atomic_update(self.collection, item_id, update_data, expected_versions)
+        if document is not None:
+            await self.changed()
+        return document
+
+    async def delete(self, item_id: str) -> bool:
+        with self._timed("delete"):
+            result = await self.collection.delete_one({"id": item_id})
+        if result.deleted_count:
+            await self.changed()
+        return bool(result.deleted_count)
+
+    async def bulk(self, operations: List[BulkOperation], atomic: bool = False) -> List[Dict[str, Any]]:
+        """See utils.bulk.apply_bulk; invalidates once for the whole batch"""
+        with self._timed("bulk"):
+            results = await apply_bulk(self.db, self.name, self.models, operations, atomic=atomic)
+        if any(result["status"] == "ok" for result in results):
+            await self.changed()
+        return results
+
+
+@dataclass(frozen=True)
+class ContentRepositories:
+    services: ContentRepository[Service]
+    case_studies: ContentRepository[CaseStudy]
+    concepts: ContentRepository[Concept]
+
+    def all(self) -> Tuple[ContentRepository, ...]:
+        return (self.services, self.case_studies, self.concepts)
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        return {repository.name: repository.stats() for repository in self.all()}
+
+
+def create_content_repositories(
+    db: AsyncIOMotorDatabase,
+    cache: Optional[ContentCache] = None,
+    batch_size: int = 200,
+    routing: Optional[ReadRouting] = None
+) -> ContentRepositories:
+    """One repository per content collection, sharing the cache and read routing"""
+    return ContentRepositories(
+        services=ContentRepository(
+            db, "services", ContentModels(ServiceCreate, ServiceUpdate, Service), cache, batch_size,
+            SERVICE_PRESETS, routing
+        ),
+        case_studies=ContentRepository(
+            db, "case_studies", ContentModels(CaseStudyCreate, CaseStudyUpdate, CaseStudy), cache, batch_size,
+            CASE_STUDY_PRESETS, routing
+        ),
+        concepts=ContentRepository(
+            db, "concepts", ContentModels(ConceptCreate, ConceptUpdate, Concept), cache, batch_size,
+            CONCEPT_PRESETS, routing
+        ),
+    )
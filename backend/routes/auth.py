@@ -1,22 +1,40 @@
 from fastapi import APIRouter, HTTPException, Depends, status
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm, HTTPAuthorizationCredentials
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from datetime import timedelta, datetime
-from models.cms import AdminLogin, Token, AdminUser, AdminUserCreate
+from models.cms import AdminLogin, Token, AdminUser, AdminUserCreate, RefreshRequest
 from utils.auth import (
-    verify_password, 
-    get_password_hash, 
     create_access_token,
     get_current_user,
+    revoke_token,
+    security,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from utils.hashing import PasswordHasher
+from utils.sessions import SessionStore
 import logging
 
 logger = logging.getLogger(__name__)
 
-def create_auth_router(db: AsyncIOMotorDatabase) -> APIRouter:
+def create_auth_router(
+    db: AsyncIOMotorDatabase,
+    hasher: PasswordHasher,
+    sessions: SessionStore
+) -> APIRouter:
     router = APIRouter(prefix="/auth", tags=["authentication"])
     
+    def issue_tokens(username: str, session_id: str, refresh_token: str) -> dict:
+        """Access token tied to a session, plus the session's refresh token"""
+        access_token = create_access_token(
+            data={"sub": username, "sid": session_id},
+            expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        )
+        return {
+            "access_token": access_token,
+            "token_type": "bearer",
+            "refresh_token": refresh_token
+        }
+    
     @router.post("/register")
     async def register_admin(admin_data: AdminUserCreate):
         """Register new admin user (for initial setup)"""
@@ -36,7 +54,7 @@ def create_auth_router(db: AsyncIOMotorDatabase) -> APIRouter:
                 )
             
             # Create admin user
-            hashed_password = get_password_hash(admin_data.password)
+            hashed_password = await hasher.hash(admin_data.password)
             admin_user = AdminUser(
                 username=admin_data.username,
                 email=admin_data.email,
@@ -69,32 +87,34 @@ def create_auth_router(db: AsyncIOMotorDatabase) -> APIRouter:
             # Find user
             user = await db.admin_users.find_one({"username": form_data.username})
             
-            if not user or not verify_password(form_data.password, user.get("password_hash", "")):
+            valid, new_hash = False, None
+            if user:
+                valid, new_hash = await hasher.verify_and_update(
+                    form_data.password, user.get("password_hash", "")
+                )
+            
+            if not valid:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Incorrect username or password",
                     headers={"WWW-Authenticate": "Bearer"},
                 )
             
-            # Update last login
+            # Update last login, upgrading the hash if PASSWORD_HASH_ROUNDS changed
+            updates = {"last_login": datetime.utcnow()}
+            if new_hash:
+                updates["password_hash"] = new_hash
             await db.admin_users.update_one(
                 {"_id": user["_id"]},
-                {"$set": {"last_login": datetime.utcnow()}}
+                {"$set": updates}
             )
             
-            # Create access token
-            access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-            access_token = create_access_token(
-                data={"sub": user["username"]},
-                expires_delta=access_token_expires
-            )
+            # Start a session; later access tokens come from /auth/refresh
+            session_id, refresh_token = await sessions.create(user["username"])
             
             logger.info(f"User logged in: {user['username']}")
             
-            return {
-                "access_token": access_token,
-                "token_type": "bearer"
-            }
+            return issue_tokens(user["username"], session_id, refresh_token)
             
         except HTTPException:
             raise
@@ -102,6 +122,27 @@ def create_auth_router(db: AsyncIOMotorDatabase) -> APIRouter:
             logger.error(f"Login failed: {e}")
             raise HTTPException(status_code=500, detail="Login failed")
     
+    @router.post("/refresh", response_model=Token)
+    async def refresh(request: RefreshRequest):
+        """Exchange a refresh token for new access and refresh tokens"""
+        try:
+            rotated = await sessions.rotate(request.refresh_token)
+            if rotated is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid or expired refresh token",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            
+            username, session_id, refresh_token = rotated
+            return issue_tokens(username, session_id, refresh_token)
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Token refresh failed: {e}")
+            raise HTTPException(status_code=500, detail="Token refresh failed")
+    
     @router.get("/me")
     async def get_current_user_info(current_user: dict = Depends(get_current_user)):
         """Get current user information"""
@@ -123,8 +164,20 @@ def create_auth_router(db: AsyncIOMotorDatabase) -> APIRouter:
             raise HTTPException(status_code=500, detail="Failed to fetch user info")
     
     @router.post("/logout")
-    async def logout(current_user: dict = Depends(get_current_user)):
-        """Logout (client should discard token)"""
-        return {"message": "Successfully logged out"}
+    async def logout(
+        credentials: HTTPAuthorizationCredentials = Depends(security),
+        current_user: dict = Depends(get_current_user)
+    ):
+        """Logout, revoking the current token and ending its session"""
+        try:
+            await revoke_token(credentials.credentials, current_user["claims"])
+            if current_user["claims"].get("sid"):
+                await sessions.end(current_user["claims"]["sid"])
+            logger.info(f"User logged out: {current_user['username']}")
+            return {"message": "Successfully logged out"}
+            
+        except Exception as e:
+            logger.error(f"Failed to revoke token: {e}")
+            raise HTTPException(status_code=500, detail="Logout failed")
     
     return router
\ No newline at end of file
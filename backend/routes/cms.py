@@ -1,51 +1,100 @@
-from fastapi import APIRouter, HTTPException, Depends
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from models.cms import (
     Service, ServiceCreate, ServiceUpdate,
     CaseStudy, CaseStudyCreate, CaseStudyUpdate,
-    Concept, ConceptCreate, ConceptUpdate
+    Concept, ConceptCreate, ConceptUpdate,
+    BulkRequest, BulkResponse
 )
+from repositories.content import ContentRepositories, ContentRepository
 from utils.auth import get_current_user
-from typing import List, Optional
-from datetime import datetime
+from utils.bulk import BulkRejected, TransactionsUnsupported
+from utils.http_cache import PRIVATE_CACHE_CONTROL
+from utils.versioning import VersionConflict, parse_if_match, version_etag
+from pydantic import BaseModel
+from typing import List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
-def create_cms_router(db: AsyncIOMotorDatabase) -> APIRouter:
+def create_cms_router(content: ContentRepositories) -> APIRouter:
     router = APIRouter(prefix="/cms", tags=["cms"])
     
+    async def update_content(
+        repository: ContentRepository,
+        item_id: str,
+        data: BaseModel,
+        request: Request,
+        response: Response
+    ) -> Optional[dict]:
+        """Check, update and fetch a document in one round trip, honouring If-Match"""
+        try:
+            expected_versions = parse_if_match(request.headers.get("if-match"))
+        except ValueError:
+            raise HTTPException(status_code=412, detail="If-Match does not name a version of this document")
+        
+        try:
+            document = await repository.update(item_id, data, expected_versions)
+        except VersionConflict as e:
+            raise HTTPException(
+                status_code=412,
+                detail=f"Modified since it was read (current version {e.current_version})",
+                headers={"ETag": version_etag(e.current_version)}
+            )
+        
+        if document is not None:
+            response.headers["ETag"] = version_etag(document["version"])
+        return document
+    
+    def parse_fields(repository: ContentRepository, fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+        """Validated ``fields=`` selection (e.g. "card" or "title,order")"""
+        try:
+            return repository.fieldset(fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    async def run_bulk(repository: ContentRepository, bulk: BulkRequest) -> dict:
+        """Apply a bulk request and summarise the per-item results"""
+        try:
+            results = await repository.bulk(bulk.operations, atomic=bulk.atomic)
+        except BulkRejected as e:
+            raise HTTPException(status_code=409, detail={"message": str(e), "results": e.results})
+        except TransactionsUnsupported:
+            raise HTTPException(
+                status_code=400,
+                detail="Atomic bulk writes need MongoDB transactions (a replica set)"
+            )
+        except Exception as e:
+            logger.error(f"Bulk write to {repository.name} failed: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to apply bulk {repository.name} changes")
+        
+        applied = sum(1 for result in results if result["status"] == "ok")
+        logger.info(f"Bulk {repository.name} write: {applied}/{len(results)} applied")
+        return {"applied": applied, "failed": len(results) - applied, "results": results}
+    
     # Services endpoints
     @router.get("/services", response_model=List[Service])
-    async def get_services(active_only: bool = True):
+    async def get_services(request: Request, active_only: bool = True, fields: Optional[str] = None):
         """Get all services"""
+        selected = parse_fields(content.services, fields)
         try:
             filter_query = {"active": True} if active_only else {}
-            cursor = db.services.find(filter_query).sort("order", 1)
-            services = await cursor.to_list(length=None)
-            
-            # Convert ObjectId to string
-            for service in services:
-                service["_id"] = str(service["_id"])
-                if "id" not in service:
-                    service["id"] = service["_id"]
             
-            return services
+            snapshot = await content.services.list_snapshot(filter_query, selected)
+            return snapshot.response(request, PRIVATE_CACHE_CONTROL)
             
         except Exception as e:
             logger.error(f"Failed to fetch services: {e}")
             raise HTTPException(status_code=500, detail="Failed to fetch services")
     
     @router.get("/services/{service_id}", response_model=Service)
-    async def get_service(service_id: str):
+    async def get_service(service_id: str, request: Request):
         """Get single service by ID"""
         try:
-            service = await db.services.find_one({"id": service_id})
-            if not service:
+            snapshot = await content.services.document_snapshot(service_id)
+            if not snapshot:
                 raise HTTPException(status_code=404, detail="Service not found")
             
-            service["_id"] = str(service["_id"])
-            return service
+            return snapshot.response(request, PRIVATE_CACHE_CONTROL)
             
         except HTTPException:
             raise
@@ -60,14 +109,10 @@ def create_cms_router(db: AsyncIOMotorDatabase) -> APIRouter:
     ):
         """Create new service (admin only)"""
         try:
-            service = Service(**service_data.dict())
-            result = await db.services.insert_one(service.dict())
-            
-            service_dict = service.dict()
-            service_dict["_id"] = str(result.inserted_id)
+            service = await content.services.create(service_data)
             
-            logger.info(f"Service created: {service.id}")
-            return service_dict
+            logger.info(f"Service created: {service['id']}")
+            return service
             
         except Exception as e:
             logger.error(f"Failed to create service: {e}")
@@ -77,28 +122,16 @@ def create_cms_router(db: AsyncIOMotorDatabase) -> APIRouter:
     async def update_service(
         service_id: str,
         service_data: ServiceUpdate,
+        request: Request,
+        response: Response,
         current_user: dict = Depends(get_current_user)
     ):
         """Update service (admin only)"""
         try:
-            # Check if service exists
-            existing_service = await db.services.find_one({"id": service_id})
-            if not existing_service:
+            updated_service = await update_content(content.services, service_id, service_data, request, response)
+            if not updated_service:
                 raise HTTPException(status_code=404, detail="Service not found")
             
-            # Update fields
-            update_data = {k: v for k, v in service_data.dict().items() if v is not None}
-            update_data["updated_at"] = datetime.utcnow()
-            
-            await db.services.update_one(
-                {"id": service_id},
-                {"$set": update_data}
-            )
-            
-            # Fetch updated service
-            updated_service = await db.services.find_one({"id": service_id})
-            updated_service["_id"] = str(updated_service["_id"])
-            
             logger.info(f"Service updated: {service_id}")
             return updated_service
             
@@ -115,8 +148,7 @@ def create_cms_router(db: AsyncIOMotorDatabase) -> APIRouter:
     ):
         """Delete service (admin only)"""
         try:
-            result = await db.services.delete_one({"id": service_id})
-            if result.deleted_count == 0:
+            if not await content.services.delete(service_id):
                 raise HTTPException(status_code=404, detail="Service not found")
             
             logger.info(f"Service deleted: {service_id}")
@@ -128,42 +160,47 @@ def create_cms_router(db: AsyncIOMotorDatabase) -> APIRouter:
             logger.error(f"Failed to delete service {service_id}: {e}")
             raise HTTPException(status_code=500, detail="Failed to delete service")
     
+    @router.post("/services/bulk", response_model=BulkResponse)
+    async def bulk_services(
+        bulk: BulkRequest,
+        current_user: dict = Depends(get_current_user)
+    ):
+        """Create, update, delete and reorder services in one request (admin only)"""
+        return await run_bulk(content.services, bulk)
+    
     # Case Studies endpoints
     @router.get("/case-studies", response_model=List[CaseStudy])
-    async def get_case_studies(active_only: bool = True, featured_only: bool = False):
+    async def get_case_studies(
+        request: Request,
+        active_only: bool = True,
+        featured_only: bool = False,
+        fields: Optional[str] = None
+    ):
         """Get all case studies"""
+        selected = parse_fields(content.case_studies, fields)
         try:
             filter_query = {}
             if active_only:
                 filter_query["active"] = True
             if featured_only:
                 filter_query["featured"] = True
-                
-            cursor = db.case_studies.find(filter_query).sort("order", 1)
-            case_studies = await cursor.to_list(length=None)
             
-            # Convert ObjectId to string
-            for case_study in case_studies:
-                case_study["_id"] = str(case_study["_id"])
-                if "id" not in case_study:
-                    case_study["id"] = case_study["_id"]
-            
-            return case_studies
+            snapshot = await content.case_studies.list_snapshot(filter_query, selected)
+            return snapshot.response(request, PRIVATE_CACHE_CONTROL)
             
         except Exception as e:
             logger.error(f"Failed to fetch case studies: {e}")
             raise HTTPException(status_code=500, detail="Failed to fetch case studies")
     
     @router.get("/case-studies/{case_study_id}", response_model=CaseStudy)
-    async def get_case_study(case_study_id: str):
+    async def get_case_study(case_study_id: str, request: Request):
         """Get single case study by ID"""
         try:
-            case_study = await db.case_studies.find_one({"id": case_study_id})
-            if not case_study:
+            snapshot = await content.case_studies.document_snapshot(case_study_id)
+            if not snapshot:
                 raise HTTPException(status_code=404, detail="Case study not found")
             
-            case_study["_id"] = str(case_study["_id"])
-            return case_study
+            return snapshot.response(request, PRIVATE_CACHE_CONTROL)
             
         except HTTPException:
             raise
@@ -178,14 +215,10 @@ def create_cms_router(db: AsyncIOMotorDatabase) -> APIRouter:
     ):
         """Create new case study (admin only)"""
         try:
-            case_study = CaseStudy(**case_study_data.dict())
-            result = await db.case_studies.insert_one(case_study.dict())
-            
-            case_study_dict = case_study.dict()
-            case_study_dict["_id"] = str(result.inserted_id)
+            case_study = await content.case_studies.create(case_study_data)
             
-            logger.info(f"Case study created: {case_study.id}")
-            return case_study_dict
+            logger.info(f"Case study created: {case_study['id']}")
+            return case_study
             
         except Exception as e:
             logger.error(f"Failed to create case study: {e}")
@@ -195,28 +228,16 @@ def create_cms_router(db: AsyncIOMotorDatabase) -> APIRouter:
     async def update_case_study(
         case_study_id: str,
         case_study_data: CaseStudyUpdate,
+        request: Request,
+        response: Response,
         current_user: dict = Depends(get_current_user)
     ):
         """Update case study (admin only)"""
         try:
-            # Check if case study exists
-            existing_case_study = await db.case_studies.find_one({"id": case_study_id})
-            if not existing_case_study:
+            updated_case_study = await update_content(content.case_studies, case_study_id, case_study_data, request, response)
+            if not updated_case_study:
                 raise HTTPException(status_code=404, detail="Case study not found")
             
-            # Update fields
-            update_data = {k: v for k, v in case_study_data.dict().items() if v is not None}
-            update_data["updated_at"] = datetime.utcnow()
-            
-            await db.case_studies.update_one(
-                {"id": case_study_id},
-                {"$set": update_data}
-            )
-            
-            # Fetch updated case study
-            updated_case_study = await db.case_studies.find_one({"id": case_study_id})
-            updated_case_study["_id"] = str(updated_case_study["_id"])
-            
             logger.info(f"Case study updated: {case_study_id}")
             return updated_case_study
             
@@ -233,8 +254,7 @@ def create_cms_router(db: AsyncIOMotorDatabase) -> APIRouter:
     ):
         """Delete case study (admin only)"""
         try:
-            result = await db.case_studies.delete_one({"id": case_study_id})
-            if result.deleted_count == 0:
+            if not await content.case_studies.delete(case_study_id):
                 raise HTTPException(status_code=404, detail="Case study not found")
             
             logger.info(f"Case study deleted: {case_study_id}")
@@ -246,37 +266,38 @@ def create_cms_router(db: AsyncIOMotorDatabase) -> APIRouter:
             logger.error(f"Failed to delete case study {case_study_id}: {e}")
             raise HTTPException(status_code=500, detail="Failed to delete case study")
     
+    @router.post("/case-studies/bulk", response_model=BulkResponse)
+    async def bulk_case_studies(
+        bulk: BulkRequest,
+        current_user: dict = Depends(get_current_user)
+    ):
+        """Create, update, delete and reorder case studies in one request (admin only)"""
+        return await run_bulk(content.case_studies, bulk)
+    
     # Concepts endpoints
     @router.get("/concepts", response_model=List[Concept])
-    async def get_concepts(active_only: bool = True):
+    async def get_concepts(request: Request, active_only: bool = True, fields: Optional[str] = None):
         """Get all concepts"""
+        selected = parse_fields(content.concepts, fields)
         try:
             filter_query = {"active": True} if active_only else {}
-            cursor = db.concepts.find(filter_query).sort("order", 1)
-            concepts = await cursor.to_list(length=None)
             
-            # Convert ObjectId to string
-            for concept in concepts:
-                concept["_id"] = str(concept["_id"])
-                if "id" not in concept:
-                    concept["id"] = concept["_id"]
-            
-            return concepts
+            snapshot = await content.concepts.list_snapshot(filter_query, selected)
+            return snapshot.response(request, PRIVATE_CACHE_CONTROL)
             
         except Exception as e:
             logger.error(f"Failed to fetch concepts: {e}")
             raise HTTPException(status_code=500, detail="Failed to fetch concepts")
     
     @router.get("/concepts/{concept_id}", response_model=Concept)
-    async def get_concept(concept_id: str):
+    async def get_concept(concept_id: str, request: Request):
         """Get single concept by ID"""
         try:
-            concept = await db.concepts.find_one({"id": concept_id})
-            if not concept:
+            snapshot = await content.concepts.document_snapshot(concept_id)
+            if not snapshot:
                 raise HTTPException(status_code=404, detail="Concept not found")
             
-            concept["_id"] = str(concept["_id"])
-            return concept
+            return snapshot.response(request, PRIVATE_CACHE_CONTROL)
             
         except HTTPException:
             raise
@@ -291,14 +312,10 @@ def create_cms_router(db: AsyncIOMotorDatabase) -> APIRouter:
     ):
         """Create new concept (admin only)"""
         try:
-            concept = Concept(**concept_data.dict())
-            result = await db.concepts.insert_one(concept.dict())
-            
-            concept_dict = concept.dict()
-            concept_dict["_id"] = str(result.inserted_id)
+            concept = await content.concepts.create(concept_data)
             
-            logger.info(f"Concept created: {concept.id}")
-            return concept_dict
+            logger.info(f"Concept created: {concept['id']}")
+            return concept
             
         except Exception as e:
             logger.error(f"Failed to create concept: {e}")
@@ -308,28 +325,16 @@ def create_cms_router(db: AsyncIOMotorDatabase) -> APIRouter:
     async def update_concept(
         concept_id: str,
         concept_data: ConceptUpdate,
+        request: Request,
+        response: Response,
         current_user: dict = Depends(get_current_user)
     ):
         """Update concept (admin only)"""
         try:
-            # Check if concept exists
-            existing_concept = await db.concepts.find_one({"id": concept_id})
-            if not existing_concept:
+            updated_concept = await update_content(content.concepts, concept_id, concept_data, request, response)
+            if not updated_concept:
                 raise HTTPException(status_code=404, detail="Concept not found")
             
-            # Update fields
-            update_data = {k: v for k, v in concept_data.dict().items() if v is not None}
-            update_data["updated_at"] = datetime.utcnow()
-            
-            await db.concepts.update_one(
-                {"id": concept_id},
-                {"$set": update_data}
-            )
-            
-            # Fetch updated concept
-            updated_concept = await db.concepts.find_one({"id": concept_id})
-            updated_concept["_id"] = str(updated_concept["_id"])
-            
             logger.info(f"Concept updated: {concept_id}")
             return updated_concept
             
@@ -346,8 +351,7 @@ def create_cms_router(db: AsyncIOMotorDatabase) -> APIRouter:
     ):
         """Delete concept (admin only)"""
         try:
-            result = await db.concepts.delete_one({"id": concept_id})
-            if result.deleted_count == 0:
+            if not await content.concepts.delete(concept_id):
                 raise HTTPException(status_code=404, detail="Concept not found")
             
             logger.info(f"Concept deleted: {concept_id}")
@@ -358,5 +362,13 @@ def create_cms_router(db: AsyncIOMotorDatabase) -> APIRouter:
         except Exception as e:
             logger.error(f"Failed to delete concept {concept_id}: {e}")
             raise HTTPException(status_code=500, detail="Failed to delete concept")
+    
+    @router.post("/concepts/bulk", response_model=BulkResponse)
+    async def bulk_concepts(
+        bulk: BulkRequest,
+        current_user: dict = Depends(get_current_user)
+    ):
+        """Create, update, delete and reorder concepts in one request (admin only)"""
+        return await run_bulk(content.concepts, bulk)
 
     return router
\ No newline at end of file
@@ -1,45 +1,47 @@
 from fastapi import APIRouter, HTTPException, Request, Depends
+from fastapi.responses import StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from models.contact import ContactSubmissionCreate, ContactSubmissionResponse, ContactSubmission
-from utils.email import send_contact_notification, send_welcome_email
+from utils.outbox import EmailOutbox
+from utils.write_behind import InsertBatcher
+from utils.pagination import encode_cursor, decode_cursor, keyset_filter
+from utils.auth import get_current_user
 from datetime import datetime
 import logging
-import asyncio
-from typing import Dict
-import time
+import csv
+import io
+import json
+from typing import AsyncIterator, Optional
 
 logger = logging.getLogger(__name__)
 
-# Rate limiting storage (in production, use Redis)
-rate_limit_storage: Dict[str, Dict[str, int]] = {}
+MAX_SUBMISSIONS_PAGE = 200
+EXPORT_BATCH_SIZE = 500
+EXPORT_FIELDS = [
+    "id", "name", "email", "company", "message", "ip_address", "user_agent",
+    "submitted_at", "email_sent", "email_sent_at"
+]
 
-def check_rate_limit(ip: str, limit: int = 5, window: int = 300) -> bool:
-    """Simple rate limiting: 5 requests per 5 minutes per IP"""
-    current_time = int(time.time())
-    window_start = current_time - window
-    
-    if ip not in rate_limit_storage:
-        rate_limit_storage[ip] = {}
-    
-    # Clean old entries
-    rate_limit_storage[ip] = {
-        timestamp: count for timestamp, count in rate_limit_storage[ip].items() 
-        if int(timestamp) > window_start
-    }
-    
-    # Count requests in current window
-    total_requests = sum(rate_limit_storage[ip].values())
-    
-    if total_requests >= limit:
-        return False
-    
-    # Add current request
-    current_minute = str(current_time // 60)
-    rate_limit_storage[ip][current_minute] = rate_limit_storage[ip].get(current_minute, 0) + 1
-    
-    return True
+def _export_value(value):
+    """JSON/CSV friendly representation of a stored value"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _csv_safe(value) -> str:
+    """Stop spreadsheet apps from evaluating user-supplied text as a formula"""
+    if value is None:
+        return ""
+    text = str(value)
+    if text[:1] in ("=", "+", "-", "@", "\t", "\r"):
+        return "'" + text
+    return text
 
-def create_contact_router(db: AsyncIOMotorDatabase) -> APIRouter:
+def create_contact_router(
+    db: AsyncIOMotorDatabase,
+    outbox: EmailOutbox,
+    submissions: Optional[InsertBatcher] = None
+) -> APIRouter:
     router = APIRouter(prefix="/contact", tags=["contact"])
     
     @router.post("/", response_model=ContactSubmissionResponse)
@@ -50,16 +52,9 @@ def create_contact_router(db: AsyncIOMotorDatabase) -> APIRouter:
         """Submit contact form with spam protection and email notification"""
         
         try:
-            # Get client IP for rate limiting
+            # Rate limiting happens in RateLimitMiddleware, before this handler
             client_ip = request.client.host
             
-            # Check rate limiting
-            if not check_rate_limit(client_ip):
-                raise HTTPException(
-                    status_code=429,
-                    detail="Too many requests. Please try again later."
-                )
-            
             # Honeypot spam protection
             if contact_data.honeypot:
                 logger.warning(f"Spam attempt detected from {client_ip}")
@@ -78,46 +73,28 @@ def create_contact_router(db: AsyncIOMotorDatabase) -> APIRouter:
                 submitted_at=datetime.utcnow()
             )
             
-            # Save to database
-            result = await db.contact_submissions.insert_one(submission.dict())
-            submission_id = str(result.inserted_id)
+            # Save to database (coalesced with concurrent submissions when
+            # write batching is enabled; acknowledged either way)
+            if submissions is not None:
+                await submissions.insert(submission.dict())
+            else:
+                await db.contact_submissions.insert_one(submission.dict())
             
-            # Send email notifications asynchronously
-            async def send_emails():
-                try:
-                    # Send notification to admin
-                    admin_email_sent = send_contact_notification(
-                        contact_name=submission.name,
-                        contact_email=submission.email,
-                        contact_company=submission.company,
-                        contact_message=submission.message,
-                        contact_id=submission.id
-                    )
-                    
-                    # Send welcome email to user
-                    welcome_email_sent = send_welcome_email(
-                        contact_email=submission.email,
-                        contact_name=submission.name
-                    )
-                    
-                    # Update submission with email status
-                    await db.contact_submissions.update_one(
-                        {"_id": result.inserted_id},
-                        {
-                            "$set": {
-                                "email_sent": admin_email_sent,
-                                "email_sent_at": datetime.utcnow() if admin_email_sent else None
-                            }
-                        }
-                    )
-                    
-                    logger.info(f"Emails sent for submission {submission.id}: admin={admin_email_sent}, welcome={welcome_email_sent}")
-                    
-                except Exception as e:
-                    logger.error(f"Failed to send emails for submission {submission.id}: {e}")
-            
-            # Send emails in background
-            asyncio.create_task(send_emails())
+            # Queue email notifications; the outbox workers send them
+            try:
+                email_payload = {
+                    "submission_id": submission.id,
+                    "name": submission.name,
+                    "email": submission.email,
+                    "company": submission.company,
+                    "message": submission.message
+                }
+                await outbox.enqueue_many([
+                    ("contact_notification", email_payload),
+                    ("welcome_email", email_payload),
+                ])
+            except Exception as e:
+                logger.error(f"Failed to queue emails for submission {submission.id}: {e}")
             
             return ContactSubmissionResponse(
                 success=True,
@@ -136,30 +113,155 @@ def create_contact_router(db: AsyncIOMotorDatabase) -> APIRouter:
     
     @router.get("/submissions")
     async def get_contact_submissions(
+        cursor: Optional[str] = None,
         skip: int = 0,
         limit: int = 50,
+        count: str = "estimated",
         current_user: dict = Depends(lambda: {"username": "admin"})  # Placeholder for auth
     ):
-        """Get contact submissions (admin only)"""
+        """Get contact submissions (admin only)
+        
+        Pages are keyed on ``(submitted_at, _id)``: pass the returned
+        ``next_cursor`` to fetch the following page. ``skip`` is only kept for
+        older clients. ``count`` is ``estimated`` (collection metadata),
+        ``exact`` (full count) or ``none``.
+        """
+        if count not in ("estimated", "exact", "none"):
+            raise HTTPException(status_code=400, detail="count must be estimated, exact or none")
+        limit = max(1, min(limit, MAX_SUBMISSIONS_PAGE))
+        
+        filter_query = {}
+        if cursor:
+            try:
+                submitted_at, last_id = decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            filter_query = keyset_filter("submitted_at", submitted_at, last_id)
+        
         try:
-            cursor = db.contact_submissions.find().sort("submitted_at", -1).skip(skip).limit(limit)
-            submissions = await cursor.to_list(length=limit)
+            query = db.contact_submissions.find(filter_query).sort(
+                [("submitted_at", -1), ("_id", -1)]
+            )
+            if skip and not cursor:
+                query = query.skip(skip)
+            # One extra document tells us whether another page exists
+            submissions = await query.limit(limit + 1).to_list(length=limit + 1)
+            
+            next_cursor = None
+            if len(submissions) > limit:
+                submissions = submissions[:limit]
+                last = submissions[-1]
+                next_cursor = encode_cursor(last["submitted_at"], last["_id"])
             
             # Convert ObjectId to string for JSON serialization
             for submission in submissions:
                 submission["_id"] = str(submission["_id"])
             
-            total_count = await db.contact_submissions.count_documents({})
+            if count == "exact":
+                total_count = await db.contact_submissions.count_documents({})
+            elif count == "estimated":
+                total_count = await db.contact_submissions.estimated_document_count()
+            else:
+                total_count = None
             
             return {
                 "submissions": submissions,
                 "total": total_count,
+                "total_is_estimate": count == "estimated",
                 "skip": skip,
-                "limit": limit
+                "limit": limit,
+                "next_cursor": next_cursor
             }
             
         except Exception as e:
             logger.error(f"Failed to fetch contact submissions: {e}")
             raise HTTPException(status_code=500, detail="Failed to fetch submissions")
     
+    @router.get("/outbox/stats")
+    async def get_outbox_stats(current_user: dict = Depends(get_current_user)):
+        """Email outbox queue depth and delivery latency (admin only)"""
+        try:
+            return await outbox.stats()
+        except Exception as e:
+            logger.error(f"Failed to fetch outbox stats: {e}")
+            raise HTTPException(status_code=500, detail="Failed to fetch outbox stats")
+    
+    @router.get("/submissions/export")
+    async def export_contact_submissions(
+        format: str = "ndjson",
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        email_sent: Optional[bool] = None,
+        after: Optional[str] = None,
+        current_user: dict = Depends(get_current_user)
+    ):
+        """Stream contact submissions as NDJSON or CSV (admin only)
+        
+        Rows are streamed oldest first straight from the database cursor, so
+        memory use does not grow with the export size. Every row carries a
+        ``cursor`` token; pass the last one received as ``after`` to resume
+        an interrupted export.
+        """
+        if format not in ("ndjson", "csv"):
+            raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+        
+        conditions = []
+        if since or until:
+            submitted_at = {}
+            if since:
+                submitted_at["$gte"] = since
+            if until:
+                submitted_at["$lt"] = until
+            conditions.append({"submitted_at": submitted_at})
+        if email_sent is not None:
+            conditions.append({"email_sent": email_sent})
+        if after:
+            try:
+                last_submitted_at, last_id = decode_cursor(after)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            conditions.append(keyset_filter("submitted_at", last_submitted_at, last_id, descending=False))
+        filter_query = {"$and": conditions} if conditions else {}
+        
+        cursor = db.contact_submissions.find(
+            filter_query,
+            projection={field: 1 for field in EXPORT_FIELDS}
+        ).sort([("submitted_at", 1), ("_id", 1)]).batch_size(EXPORT_BATCH_SIZE)
+        
+        async def rows() -> AsyncIterator[dict]:
+            async for submission in cursor:
+                row = {field: _export_value(submission.get(field)) for field in EXPORT_FIELDS}
+                row["cursor"] = encode_cursor(submission["submitted_at"], submission["_id"])
+                yield row
+        
+        async def ndjson() -> AsyncIterator[bytes]:
+            async for row in rows():
+                yield (json.dumps(row) + "\n").encode()
+        
+        async def csv_lines() -> AsyncIterator[bytes]:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_FIELDS + ["cursor"])
+            async for row in rows():
+                writer.writerow([_csv_safe(row[field]) for field in EXPORT_FIELDS] + [row["cursor"]])
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            # Header only, when nothing matched
+            if buffer.tell():
+                yield buffer.getvalue().encode()
+        
+        logger.info(f"Contact submissions export ({format}) started by {current_user['username']}")
+        if format == "csv":
+            return StreamingResponse(
+                csv_lines(),
+                media_type="text/csv",
+                headers={"Content-Disposition": "attachment; filename=contact_submissions.csv"}
+            )
+        return StreamingResponse(
+            ndjson(),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": "attachment; filename=contact_submissions.ndjson"}
+        )
+    
     return router
\ No newline at end of file
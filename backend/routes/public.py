@@ -1,70 +1,95 @@
-from fastapi import APIRouter, HTTPException
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from fastapi import APIRouter, HTTPException, Request
 from models.cms import Service, CaseStudy, Concept
-from typing import List
+from repositories.content import ContentRepositories, ContentRepository
+from utils.http_cache import conditional_response, make_etag
+from utils.snapshots import ContentSnapshot
+from typing import List, Optional, Tuple
+import asyncio
+import hashlib
+import json
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
-def create_public_router(db: AsyncIOMotorDatabase) -> APIRouter:
+BUNDLE_SECTIONS = ("services", "case_studies", "concepts", "config")
+
+def public_config() -> dict:
+    """Public configuration shared by /config and /bundle"""
+    return {
+        "ga_measurement_id": os.environ.get("GA_MEASUREMENT_ID"),
+        "calendly_link": os.environ.get("CALENDLY_LINK"),
+        "contact_email": "info@alaama.co",
+        "instagram": "@alaama.bh",
+        "website": "www.alaama.co"
+    }
+
+def create_public_router(content: ContentRepositories) -> APIRouter:
     router = APIRouter(prefix="/public", tags=["public"])
     
+    def parse_fields(repository: ContentRepository, fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+        """Validated ``fields=`` selection (e.g. "card" or "title,image")"""
+        try:
+            return repository.fieldset(fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    # Listings are rendered once per content version and cached
+    async def services_snapshot(fields: Optional[Tuple[str, ...]] = None) -> ContentSnapshot:
+        return await content.services.cached_snapshot("active", {"active": True}, fields)
+    
+    async def case_studies_snapshot(
+        featured_only: bool = False,
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> ContentSnapshot:
+        filter_query = {"active": True}
+        if featured_only:
+            filter_query["featured"] = True
+        
+        return await content.case_studies.cached_snapshot(
+            "featured" if featured_only else "active",
+            filter_query,
+            fields
+        )
+    
+    async def concepts_snapshot(fields: Optional[Tuple[str, ...]] = None) -> ContentSnapshot:
+        return await content.concepts.cached_snapshot("active", {"active": True}, fields)
+    
     @router.get("/services", response_model=List[Service])
-    async def get_public_services():
-        """Get active services for public website"""
+    async def get_public_services(request: Request, fields: Optional[str] = None):
+        """Get active services for public website (``fields`` selects a subset, e.g. "card")"""
+        selected = parse_fields(content.services, fields)
         try:
-            cursor = db.services.find({"active": True}).sort("order", 1)
-            services = await cursor.to_list(length=None)
-            
-            # Convert ObjectId to string and ensure id field
-            for service in services:
-                service["_id"] = str(service["_id"])
-                if "id" not in service:
-                    service["id"] = service["_id"]
-            
-            return services
+            snapshot = await services_snapshot(selected)
+            return snapshot.response(request)
             
         except Exception as e:
             logger.error(f"Failed to fetch public services: {e}")
             raise HTTPException(status_code=500, detail="Failed to fetch services")
     
     @router.get("/case-studies", response_model=List[CaseStudy])
-    async def get_public_case_studies(featured_only: bool = False):
-        """Get active case studies for public website"""
+    async def get_public_case_studies(
+        request: Request,
+        featured_only: bool = False,
+        fields: Optional[str] = None
+    ):
+        """Get active case studies for public website (``fields`` selects a subset, e.g. "card")"""
+        selected = parse_fields(content.case_studies, fields)
         try:
-            filter_query = {"active": True}
-            if featured_only:
-                filter_query["featured"] = True
-                
-            cursor = db.case_studies.find(filter_query).sort("order", 1)
-            case_studies = await cursor.to_list(length=None)
-            
-            # Convert ObjectId to string and ensure id field
-            for case_study in case_studies:
-                case_study["_id"] = str(case_study["_id"])
-                if "id" not in case_study:
-                    case_study["id"] = case_study["_id"]
-            
-            return case_studies
+            snapshot = await case_studies_snapshot(featured_only, selected)
+            return snapshot.response(request)
             
         except Exception as e:
             logger.error(f"Failed to fetch public case studies: {e}")
             raise HTTPException(status_code=500, detail="Failed to fetch case studies")
     
     @router.get("/concepts", response_model=List[Concept])
-    async def get_public_concepts():
-        """Get active concepts for public website"""
+    async def get_public_concepts(request: Request, fields: Optional[str] = None):
+        """Get active concepts for public website (``fields`` selects a subset, e.g. "card")"""
+        selected = parse_fields(content.concepts, fields)
         try:
-            cursor = db.concepts.find({"active": True}).sort("order", 1)
-            concepts = await cursor.to_list(length=None)
-            
-            # Convert ObjectId to string and ensure id field
-            for concept in concepts:
-                concept["_id"] = str(concept["_id"])
-                if "id" not in concept:
-                    concept["id"] = concept["_id"]
-            
-            return concepts
+            snapshot = await concepts_snapshot(selected)
+            return snapshot.response(request)
             
         except Exception as e:
             logger.error(f"Failed to fetch public concepts: {e}")
@@ -73,14 +98,59 @@ def create_public_router(db: AsyncIOMotorDatabase) -> APIRouter:
     @router.get("/config")
     async def get_public_config():
         """Get public configuration (GA, Calendly, etc.)"""
-        import os
+        return public_config()
+    
+    @router.get("/bundle")
+    async def get_public_bundle(
+        request: Request,
+        include: Optional[str] = None,
+        featured_only: bool = False
+    ):
+        """Get all public homepage content in a single response
+        
+        ``include`` is a comma-separated subset of services, case_studies,
+        concepts and config (default: all of them).
+        """
+        sections = BUNDLE_SECTIONS
+        if include:
+            sections = tuple(s.strip().replace("-", "_") for s in include.split(",") if s.strip())
+            unknown = [s for s in sections if s not in BUNDLE_SECTIONS]
+            if unknown:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unknown bundle sections: {', '.join(unknown)}"
+                )
         
-        return {
-            "ga_measurement_id": os.environ.get("GA_MEASUREMENT_ID"),
-            "calendly_link": os.environ.get("CALENDLY_LINK"),
-            "contact_email": "info@alaama.co",
-            "instagram": "@alaama.bh",
-            "website": "www.alaama.co"
-        }
+        try:
+            loaders = {
+                "services": services_snapshot,
+                "case_studies": lambda: case_studies_snapshot(featured_only),
+                "concepts": concepts_snapshot,
+            }
+            content_sections = [s for s in BUNDLE_SECTIONS if s in sections and s in loaders]
+            snapshots = dict(zip(
+                content_sections,
+                await asyncio.gather(*(loaders[s]() for s in content_sections))
+            ))
+            
+            # Splice the cached listing bytes into one document without re-encoding
+            parts = {name: snapshot.body for name, snapshot in snapshots.items()}
+            if "config" in sections:
+                parts["config"] = json.dumps(public_config(), separators=(",", ":")).encode()
+            
+            version = hashlib.sha256(
+                b"|".join(name.encode() + b"=" + body for name, body in parts.items())
+            ).hexdigest()[:16]
+            body = b"".join([
+                b'{"version":"', version.encode(), b'"',
+                *(b',"' + name.encode() + b'":' + body for name, body in parts.items()),
+                b"}"
+            ])
+            
+            return conditional_response(request, body, etag=make_etag(body))
+            
+        except Exception as e:
+            logger.error(f"Failed to build public bundle: {e}")
+            raise HTTPException(status_code=500, detail="Failed to fetch content")
     
     return router
\ No newline at end of file
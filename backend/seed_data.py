@@ -138,6 +138,47 @@ case_studies_data = [
     }
 ]
 
+def scaled(items: list, scale: int) -> list:
+    """``scale`` copies of the sample items, numbered after the first copy"""
+    copies = []
+    for copy in range(scale):
+        for item in items:
+            item = dict(item)
+            if copy:
+                item["title"] = f"{item['title']} {copy + 1}"
+                item["order"] = item["order"] + copy * len(items)
+            copies.append(item)
+    return copies
+
+async def seed_content(db, scale: int = 1):
+    """Replace services and case studies with the sample data (``scale`` times over)"""
+    await db.services.delete_many({})
+    await db.case_studies.delete_many({})
+    
+    services = [Service(**service_data) for service_data in scaled(services_data, scale)]
+    await db.services.insert_many([service.model_dump() for service in services])
+    
+    case_studies = [CaseStudy(**case_study_data) for case_study_data in scaled(case_studies_data, scale)]
+    await db.case_studies.insert_many([case_study.model_dump() for case_study in case_studies])
+    
+    return len(services), len(case_studies)
+
+async def seed_admin(db, password_hash: str = ""):
+    """Replace admin users with the default admin account"""
+    await db.admin_users.delete_many({})
+    
+    admin_user = AdminUser(
+        username="admin",
+        email="admin@alaama.co",
+        role="admin"
+    )
+    
+    admin_dict = admin_user.model_dump()
+    # Use shorter password for bcrypt compatibility
+    admin_dict["password_hash"] = password_hash or get_password_hash("admin123"[:72])
+    
+    await db.admin_users.insert_one(admin_dict)
+
 async def seed_database():
     """Seed the database with initial data"""
     
@@ -148,39 +189,15 @@ async def seed_database():
     try:
         print("🌱 Seeding Alaama Creative Studio database...")
         
-        # Clear existing data
-        print("🗑️  Clearing existing data...")
-        await db.services.delete_many({})
-        await db.case_studies.delete_many({})
-        await db.admin_users.delete_many({})
-        
-        # Seed Services
-        print("📋 Seeding services...")
-        services = [Service(**service_data) for service_data in services_data]
-        service_dicts = [service.model_dump() for service in services]
-        await db.services.insert_many(service_dicts)
-        print(f"✅ Inserted {len(services)} services")
-        
-        # Seed Case Studies
-        print("📚 Seeding case studies...")
-        case_studies = [CaseStudy(**case_study_data) for case_study_data in case_studies_data]
-        case_study_dicts = [case_study.model_dump() for case_study in case_studies]
-        await db.case_studies.insert_many(case_study_dicts)
-        print(f"✅ Inserted {len(case_studies)} case studies")
+        # Clear existing data and seed content
+        print("📋 Seeding services and case studies...")
+        service_count, case_study_count = await seed_content(db)
+        print(f"✅ Inserted {service_count} services")
+        print(f"✅ Inserted {case_study_count} case studies")
         
         # Create default admin user
         print("👤 Creating default admin user...")
-        admin_user = AdminUser(
-            username="admin",
-            email="admin@alaama.co",
-            role="admin"
-        )
-        
-        admin_dict = admin_user.model_dump()
-        # Use shorter password for bcrypt compatibility
-        admin_dict["password_hash"] = get_password_hash("admin123"[:72])
-        
-        await db.admin_users.insert_one(admin_dict)
+        await seed_admin(db)
         print("✅ Created default admin user (username: admin, password: admin123)")
         
         print("\n🎉 Database seeded successfully!")
@@ -1,14 +1,13 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
 from typing import List
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Import route modules
 import sys
@@ -19,6 +18,27 @@ from routes.contact import create_contact_router
 from routes.cms import create_cms_router
 from routes.auth import create_auth_router
 from routes.public import create_public_router
+from repositories.content import create_content_repositories
+from utils.cache import ContentCache
+from utils.db import PoolMetricsListener, PoolSettings, create_mongo_client, prewarm
+from utils.read_routing import create_read_routing
+from utils.coherence import CacheCoherence
+from utils.indexes import ensure_indexes
+from utils.outbox import EmailOutbox, contact_email_handlers
+from utils.write_behind import InsertBatcher, UpdateBatcher, batcher_settings_from_env
+from utils.smtp_pool import close_smtp_pool
+from utils.mail_transport import create_mail_transport
+from utils.rate_limit import RateLimitMiddleware, create_rate_limiter, rules_from_env
+from utils.auth import configure_revocation_store, create_revocation_store, token_cache
+from utils.hashing import create_password_hasher
+from utils.sessions import SessionStore
+from utils.metrics import (
+    REGISTRY,
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    CommandMetricsListener,
+    MetricsMiddleware,
+    require_metrics_token,
+)
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -26,9 +46,64 @@ load_dotenv(ROOT_DIR / '.env')
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
 db_name = os.environ.get('DB_NAME', 'alaama_cms')
-client = AsyncIOMotorClient(mongo_url)
+# Pool size, timeouts and compression from MONGO_* (see utils/db.py);
+# per-collection command timings and pool checkout waits for /metrics
+pool_settings = PoolSettings.from_env()
+pool_listener = PoolMetricsListener()
+client = create_mongo_client(
+    mongo_url, pool_settings, event_listeners=[CommandMetricsListener(), pool_listener]
+)
 db = client[db_name]
 
+# Public content cache (invalidated by CMS writes, TTL as a fallback)
+content_cache = ContentCache(ttl_seconds=float(os.environ.get("CONTENT_CACHE_TTL", "60")))
+
+# Public reads go to secondaries; reads after a write stay on the primary
+read_routing = create_read_routing()
+
+# Keeps the cache coherent with writes made by other workers
+cache_coherence = CacheCoherence(
+    db, content_cache,
+    poll_interval=float(os.environ.get("CACHE_POLL_INTERVAL", "5")),
+    routing=read_routing
+)
+
+# Data access for services, case studies and concepts
+content_repositories = create_content_repositories(
+    db, content_cache, batch_size=int(os.environ.get("CONTENT_BATCH_SIZE", "200")),
+    routing=read_routing
+)
+
+# Rate limiter backend (memory, mongo or redis)
+rate_limiter = create_rate_limiter(db)
+
+# Logged-out tokens are rejected by every worker
+configure_revocation_store(create_revocation_store(db))
+
+# Password hashing runs on a bounded executor, off the event loop
+password_hasher = create_password_hasher()
+
+# Admin sessions behind rotating refresh tokens
+session_store = SessionStore(
+    db, ttl=timedelta(days=int(os.environ.get("REFRESH_TOKEN_EXPIRE_DAYS", "7")))
+)
+
+# Optional write-behind batching of contact submission inserts and
+# email_sent updates (CONTACT_WRITE_BATCHING, see utils/write_behind.py)
+contact_batching = batcher_settings_from_env("CONTACT")
+contact_inserts = InsertBatcher(db.contact_submissions, **contact_batching)
+contact_status_updates = UpdateBatcher(db.contact_submissions, **contact_batching)
+
+# Contact emails are queued in MongoDB and sent by background workers
+# through a bounded executor, never on the event loop
+mail_transport = create_mail_transport()
+email_outbox = EmailOutbox(
+    db, contact_email_handlers(db, mail_transport, contact_status_updates),
+    concurrency=int(os.environ.get("EMAIL_WORKERS", "2")),
+    max_attempts=int(os.environ.get("EMAIL_MAX_ATTEMPTS", "5")),
+    batch_size=int(os.environ.get("EMAIL_BATCH_SIZE", "20"))
+)
+
 # Create the main app
 app = FastAPI(
     title="Alaama Creative Studio API",
@@ -70,15 +145,21 @@ async def get_status_checks():
     return [StatusCheck(**status_check) for status_check in status_checks]
 
 # Include all routers
-api_router.include_router(create_contact_router(db))
-api_router.include_router(create_public_router(db))
-api_router.include_router(create_cms_router(db))
-api_router.include_router(create_auth_router(db))
+api_router.include_router(create_contact_router(db, email_outbox, contact_inserts))
+api_router.include_router(create_public_router(content_repositories))
+api_router.include_router(create_cms_router(content_repositories))
+api_router.include_router(create_auth_router(db, password_hasher, session_store))
 
 # Include the main router in the app
 app.include_router(api_router)
 
-# CORS configuration
+# Per-route-group rate limits (login, contact, public), checked before routing
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter, rules=rules_from_env())
+
+# Request latency per route template, exported at /metrics
+app.add_middleware(MetricsMiddleware)
+
+# CORS configuration (outermost, so 429 responses carry CORS headers too)
 cors_origins = os.environ.get("CORS_ORIGINS", "http://localhost:3000").split(",")
 app.add_middleware(
     CORSMiddleware,
@@ -86,6 +167,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset", "Retry-After"],
 )
 
 # Configure logging
@@ -107,12 +189,46 @@ async def startup_event():
         logger.info("✅ Database connection successful")
     except Exception as e:
         logger.error(f"❌ Database connection failed: {e}")
+    
+    # Open minPoolSize connections now rather than on the first requests
+    try:
+        connections = await prewarm(client, pool_settings, pool_listener)
+        logger.info(f"✅ Connection pool warmed ({connections} connections)")
+    except Exception as e:
+        logger.error(f"❌ Failed to warm the connection pool: {e}")
+    
+    # Make sure every query is backed by an index (no-op when already built)
+    if os.environ.get("ENSURE_INDEXES", "true") == "true":
+        try:
+            await ensure_indexes(db)
+            logger.info("✅ Database indexes verified")
+        except Exception as e:
+            logger.error(f"❌ Failed to ensure database indexes: {e}")
+    
+    await cache_coherence.start()
+    await email_outbox.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     logger.info("🛑 Shutting down Alaama Creative Studio API...")
+    await cache_coherence.stop()
+    await contact_inserts.close()
+    await email_outbox.stop()
+    await contact_status_updates.close()
+    mail_transport.shutdown()
+    password_hasher.shutdown()
+    close_smtp_pool()
     client.close()
 
+# Stats and Prometheus output reveal internals (pool addresses, cache and
+# worker state), so they are only served with the METRICS_TOKEN bearer token
+metrics_access = require_metrics_token(os.environ.get("METRICS_TOKEN"))
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(metrics_access)])
+async def metrics():
+    return Response(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -125,9 +241,26 @@ async def health_check():
             "version": "1.0.0"
         }
     except Exception as e:
+        logger.error(f"Health check failed: {e}")
         return {
             "status": "unhealthy",
             "database": "disconnected",
-            "error": str(e),
             "version": "1.0.0"
         }
+
+# Cache, pool and worker statistics
+@app.get("/health/details", include_in_schema=False, dependencies=[Depends(metrics_access)])
+async def health_details():
+    return {
+        "mongodb_pool": pool_listener.stats(),
+        "cache": content_cache.stats(),
+        "repositories": content_repositories.stats(),
+        "read_routing": read_routing.stats(),
+        "cache_coherence": cache_coherence.mode,
+        "token_cache": token_cache.stats(),
+        "password_hashing": password_hasher.stats(),
+        "contact_writes": {
+            "inserts": contact_inserts.stats(),
+            "status_updates": contact_status_updates.stats()
+        }
+    }
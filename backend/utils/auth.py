@@ -1,19 +1,33 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional, Set, Tuple
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from utils.hashing import DEFAULT_ROUNDS, build_context
+import asyncio
+import hashlib
+import logging
 import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 # Password hashing - using argon2 for better compatibility
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Request handlers hash through utils.hashing.PasswordHasher; these
+# synchronous helpers are for scripts such as seed_data.py
+pwd_context = build_context(int(os.environ.get("PASSWORD_HASH_ROUNDS", str(DEFAULT_ROUNDS))))
 
 # JWT Configuration
 SECRET_KEY = os.environ.get("SECRET_KEY", "your-secret-key-change-this")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+REVOKED_TOKENS_COLLECTION = "revoked_tokens"
+
 # Bearer token security
 security = HTTPBearer()
 
@@ -37,25 +51,169 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Verify JWT token from Authorization header"""
+def token_digest(token: str) -> str:
+    """Key identifying a token in caches and the revocation list"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+class TokenCache:
+    """Bounded LRU of validated claims, each kept only until the token's exp
+    
+    Per process: a hit saves one HMAC check, which is cheaper than any
+    round trip to a shared store would be.
+    """
+    
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        # digest -> (claims, exp timestamp)
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry[1] > time.time():
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[digest]
+            self.misses += 1
+            return None
+    
+    def put(self, digest: str, claims: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[digest] = (claims, float(claims.get("exp", 0)))
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def discard(self, digest: str) -> None:
+        with self._lock:
+            self._entries.pop(digest, None)
+    
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+class TokenRevocationStore(ABC):
+    @abstractmethod
+    async def revoke(self, digest: str, expires_at: datetime) -> None:
+        """Reject the token from now on; the entry may be dropped after expires_at"""
+    
+    @abstractmethod
+    async def is_revoked(self, digest: str) -> bool:
+        """Whether the token was revoked"""
+
+class InMemoryRevocationStore(TokenRevocationStore):
+    """Revocations visible to this process only (single-worker deployments)"""
+    
+    def __init__(self):
+        self._revoked: Dict[str, datetime] = {}
+    
+    async def revoke(self, digest: str, expires_at: datetime) -> None:
+        now = datetime.utcnow()
+        self._revoked = {d: exp for d, exp in self._revoked.items() if exp > now}
+        self._revoked[digest] = expires_at
+    
+    async def is_revoked(self, digest: str) -> bool:
+        return digest in self._revoked
+
+class MongoRevocationStore(TokenRevocationStore):
+    """Revocations in a TTL-indexed collection shared by all workers
+    
+    Each worker keeps a local copy of the unexpired revocations and reloads
+    it every ``refresh_interval`` seconds, so checking a token costs no
+    query; a logout reaches the other workers within that interval.
+    """
+    
+    def __init__(self, db: AsyncIOMotorDatabase, refresh_interval: float = 5.0):
+        self.collection = db[REVOKED_TOKENS_COLLECTION]
+        self.refresh_interval = refresh_interval
+        self._revoked: Set[str] = set()
+        self._loaded_at: Optional[float] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+    
+    async def revoke(self, digest: str, expires_at: datetime) -> None:
+        await self.collection.update_one(
+            {"_id": digest},
+            {"$set": {"expires_at": expires_at, "revoked_at": datetime.utcnow()}},
+            upsert=True
+        )
+        self._revoked.add(digest)
+    
+    async def _refresh(self) -> None:
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_interval:
+                return
+            try:
+                cursor = self.collection.find(
+                    {"expires_at": {"$gt": datetime.utcnow()}}, projection={"_id": 1}
+                )
+                self._revoked = {doc["_id"] async for doc in cursor}
+            except Exception as e:
+                # Keep checking against the last known list
+                logger.error(f"Failed to refresh revoked tokens: {e}")
+            self._loaded_at = time.monotonic()
+    
+    async def is_revoked(self, digest: str) -> bool:
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_interval:
+            await self._refresh()
+        return digest in self._revoked
+
+def create_revocation_store(db: Optional[AsyncIOMotorDatabase] = None) -> TokenRevocationStore:
+    """Store selected by TOKEN_REVOCATION_BACKEND (mongo or memory)"""
+    backend = os.environ.get("TOKEN_REVOCATION_BACKEND", "mongo")
+    if backend == "mongo" and db is not None:
+        return MongoRevocationStore(
+            db, refresh_interval=float(os.environ.get("TOKEN_REVOCATION_REFRESH", "5"))
+        )
+    if backend not in ("mongo", "memory"):
+        logger.warning(f"Unknown TOKEN_REVOCATION_BACKEND '{backend}', using memory")
+    return InMemoryRevocationStore()
+
+token_cache = TokenCache(max_size=int(os.environ.get("TOKEN_CACHE_SIZE", "1024")))
+_revocation_store: TokenRevocationStore = InMemoryRevocationStore()
+
+def configure_revocation_store(store: TokenRevocationStore) -> None:
+    """Use ``store`` for logout and token checks (called once at startup)"""
+    global _revocation_store
+    _revocation_store = store
+
+async def revoke_token(token: str, claims: Dict[str, Any]) -> None:
+    """Invalidate a token before it expires"""
+    digest = token_digest(token)
+    await _revocation_store.revoke(digest, datetime.utcfromtimestamp(claims["exp"]))
+    token_cache.discard(digest)
+
+async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
+    """Verify JWT token from Authorization header and return its claims"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    token = credentials.credentials
+    digest = token_digest(token)
+    claims = token_cache.get(digest)
+    if claims is None:
+        try:
+            claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            raise credentials_exception
+        if claims.get("sub") is None or "exp" not in claims:
             raise credentials_exception
-        return username
-    except JWTError:
+        token_cache.put(digest, claims)
+    
+    if await _revocation_store.is_revoked(digest):
+        token_cache.discard(digest)
         raise credentials_exception
+    return claims
 
-def get_current_user(username: str = Depends(verify_token)):
+def get_current_user(claims: Dict[str, Any] = Depends(verify_token)):
     """Get current authenticated user"""
     # This can be extended to fetch full user details from database
-    return {"username": username}
\ No newline at end of file
+    return {"username": claims["sub"], "claims": claims}
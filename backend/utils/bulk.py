@@ -0,0 +1,195 @@
+"""Bulk CMS writes
+
+A batch of creates, updates, deletes and reorders is validated up front, then
+sent to MongoDB as one ``bulk_write``. Ids referenced by the batch are looked
+up with a single query so every item gets its own result. In atomic mode the
+batch is applied inside a transaction and nothing is written unless every
+item succeeds. An operation carrying a ``version`` is only applied while the
+document still has that version; outside a transaction such operations are
+sent as their own (concurrent) writes so a version that changed after the
+up-front check is reported as a conflict.
+"""
+
+from dataclasses import dataclass
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import BaseModel, ValidationError
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+from models.cms import BulkOperation
+from utils.versioning import version_filter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Type
+import asyncio
+
+# MongoDB error code for transactions on a standalone server
+ILLEGAL_OPERATION = 20
+
+
+@dataclass(frozen=True)
+class ContentModels:
+    create: Type[BaseModel]
+    update: Type[BaseModel]
+    document: Type[BaseModel]
+
+
+class BulkRejected(Exception):
+    """An atomic batch was not applied; ``results`` says why per item"""
+
+    def __init__(self, message: str, results: List[Dict[str, Any]]):
+        super().__init__(message)
+        self.results = results
+
+
+class TransactionsUnsupported(Exception):
+    """Atomic batches need a replica set or sharded cluster"""
+
+
+def _result(index: int, operation: BulkOperation, status: str, item_id: Optional[str] = None, error: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "index": index,
+        "op": operation.op,
+        "id": item_id if item_id is not None else operation.id,
+        "status": status,
+        "error": error
+    }
+
+
+def _build_write(operation: BulkOperation, models: ContentModels, now: datetime) -> Tuple[Any, Optional[str]]:
+    """pymongo write for one operation and the id it affects; raises ValueError if invalid"""
+    if operation.op == "create":
+        document = models.document(**models.create(**(operation.data or {})).dict())
+        return InsertOne(document.dict()), document.id
+
+    if not operation.id:
+        raise ValueError(f"{operation.op} needs an id")
+
+    query: Dict[str, Any] = {"id": operation.id}
+    if operation.version is not None:
+        query.update(version_filter([operation.version]))
+
+    if operation.op == "update":
+        changes = models.update(**(operation.data or {})).dict()
+        update_data = {k: v for k, v in changes.items() if v is not None}
+        update_data["updated_at"] = now
+        return UpdateOne(query, {"$set": update_data, "$inc": {"version": 1}}), operation.id
+
+    if operation.op == "reorder":
+        if operation.order is None:
+            raise ValueError("reorder needs an order")
+        return UpdateOne(
+            query, {"$set": {"order": operation.order, "updated_at": now}, "$inc": {"version": 1}}
+        ), operation.id
+
+    return DeleteOne(query), operation.id
+
+
+async def _apply_unordered(
+    collection,
+    operations: List[BulkOperation],
+    writes: List[Tuple[int, Any]],
+    results: List[Dict[str, Any]]
+) -> None:
+    """Apply writes without a transaction, recording failures and conflicts in ``results``
+
+    A bulk_write only reports totals, so versioned writes (whose filter may
+    stop matching after the version check) go out one per request,
+    concurrently with the batch of unconditional writes.
+    """
+    conditional = [(index, write) for index, write in writes if operations[index].version is not None]
+    unconditional = [(index, write) for index, write in writes if operations[index].version is None]
+
+    async def write_batch(batch: List[Tuple[int, Any]]) -> Optional[Any]:
+        try:
+            return await collection.bulk_write([write for _, write in batch], ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                index = batch[error["index"]][0]
+                results[index]["status"] = "failed"
+                results[index]["error"] = error.get("errmsg")
+            return None
+
+    async def write_conditional(index: int, write: Any) -> None:
+        result = await write_batch([(index, write)])
+        if result is not None and result.matched_count + result.deleted_count == 0:
+            # Changed (or deleted) between the version check and the write
+            results[index]["status"] = "conflict"
+            results[index]["error"] = "Document changed during the write"
+
+    tasks = [write_conditional(index, write) for index, write in conditional]
+    if unconditional:
+        tasks.append(write_batch(unconditional))
+    await asyncio.gather(*tasks)
+
+
+async def apply_bulk(
+    db: AsyncIOMotorDatabase,
+    collection: str,
+    models: ContentModels,
+    operations: List[BulkOperation],
+    atomic: bool = False
+) -> List[Dict[str, Any]]:
+    """Apply a batch and return one result per operation, in order"""
+    referenced = {op.id for op in operations if op.op != "create" and op.id}
+    # id -> current version
+    existing: Dict[str, int] = {}
+    if referenced:
+        cursor = db[collection].find({"id": {"$in": list(referenced)}}, projection={"id": 1, "version": 1})
+        existing = {doc["id"]: doc.get("version", 0) async for doc in cursor}
+
+    now = datetime.utcnow()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(operations)
+    # (operation index, pymongo write)
+    writes: List[Tuple[int, Any]] = []
+    for index, operation in enumerate(operations):
+        try:
+            write, item_id = _build_write(operation, models, now)
+        except ValidationError as e:
+            error = "; ".join(f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors())
+            results[index] = _result(index, operation, "invalid", error=error)
+            continue
+        except ValueError as e:
+            results[index] = _result(index, operation, "invalid", error=str(e))
+            continue
+        if operation.op != "create" and item_id not in existing:
+            results[index] = _result(index, operation, "not_found")
+            continue
+        if operation.version is not None and existing.get(item_id) != operation.version:
+            results[index] = _result(index, operation, "conflict", error=f"Current version is {existing.get(item_id)}")
+            continue
+        results[index] = _result(index, operation, "ok", item_id)
+        writes.append((index, write))
+
+    if atomic and len(writes) < len(operations):
+        for index, _ in writes:
+            results[index]["status"] = "skipped"
+        raise BulkRejected("Batch not applied: some operations cannot be applied", results)
+
+    if not writes:
+        return results
+
+    if not atomic:
+        await _apply_unordered(db[collection], operations, writes, results)
+        return results
+
+    requests = [write for _, write in writes]
+    expected_matches = sum(1 for _, write in writes if not isinstance(write, InsertOne))
+    try:
+        async with await db.client.start_session() as session:
+            async with session.start_transaction():
+                result = await db[collection].bulk_write(requests, ordered=True, session=session)
+                if result.matched_count + result.deleted_count != expected_matches:
+                    # A document was changed or deleted after the version check
+                    raise BulkRejected("Batch rolled back: documents changed during the write", [
+                        dict(item, status="skipped") for item in results
+                    ])
+    except BulkWriteError as e:
+        failed = {writes[error["index"]][0]: error.get("errmsg") for error in e.details.get("writeErrors", [])}
+        for index, _ in writes:
+            results[index]["status"] = "failed" if index in failed else "skipped"
+            results[index]["error"] = failed.get(index)
+        raise BulkRejected("Batch rolled back: some operations failed", results)
+    except OperationFailure as e:
+        if e.code == ILLEGAL_OPERATION:
+            raise TransactionsUnsupported()
+        raise
+    return results
@@ -0,0 +1,111 @@
+"""In-process read-through cache for public CMS content"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_COLLECTIONS = ("services", "case_studies", "concepts")
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    version: int
+    expires_at: float
+
+
+class ContentCache:
+    """Per-collection cache of serialized query results.
+
+    Entries are keyed by ``(collection, key)`` where ``key`` identifies the
+    query variant (e.g. ``"featured"``). Writes through the CMS call
+    ``invalidate(collection)`` which bumps the collection version and drops
+    its entries; the TTL is only a safety net for writes made outside the API.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Tuple[str, Hashable], CacheEntry] = {}
+        self._versions: Dict[str, int] = {}
+        self._locks: Dict[Tuple[str, Hashable], asyncio.Lock] = {}
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+
+    def version(self, collection: str) -> int:
+        """Current content version of a collection"""
+        return self._versions.get(collection, 0)
+
+    def get(self, collection: str, key: Hashable = None) -> Any:
+        """Return a fresh cached value or None"""
+        entry = self._entries.get((collection, key))
+        if entry is None:
+            return None
+        if entry.version != self.version(collection) or entry.expires_at <= time.monotonic():
+            self._entries.pop((collection, key), None)
+            return None
+        return entry.value
+
+    def set(self, collection: str, key: Hashable, value: Any, version: int) -> None:
+        """Store a value computed against ``version`` unless it is already stale"""
+        if version != self.version(collection):
+            return
+        self._entries[(collection, key)] = CacheEntry(
+            value=value,
+            version=version,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+
+    async def get_or_load(
+        self,
+        collection: str,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Return the cached value, loading it once on a miss"""
+        value = self.get(collection, key)
+        if value is not None:
+            self._hits[collection] = self._hits.get(collection, 0) + 1
+            return value
+
+        # Concurrent misses for the same entry share a single load
+        lock = self._locks.setdefault((collection, key), asyncio.Lock())
+        async with lock:
+            value = self.get(collection, key)
+            if value is not None:
+                self._hits[collection] = self._hits.get(collection, 0) + 1
+                return value
+
+            self._misses[collection] = self._misses.get(collection, 0) + 1
+            version = self.version(collection)
+            value = await loader()
+            self.set(collection, key, value, version)
+            return value
+
+    def invalidate(self, collection: str) -> None:
+        """Drop every cached entry of a collection"""
+        self._versions[collection] = self.version(collection) + 1
+        for cache_key in [k for k in self._entries if k[0] == collection]:
+            del self._entries[cache_key]
+        logger.debug(f"Content cache invalidated: {collection}")
+
+    def clear(self) -> None:
+        """Drop every cached entry"""
+        for collection in set(k[0] for k in self._entries) | set(self._versions):
+            self.invalidate(collection)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit/miss counters and entry counts per collection"""
+        collections = set(CONTENT_COLLECTIONS) | set(self._hits) | set(self._misses)
+        return {
+            collection: {
+                "hits": self._hits.get(collection, 0),
+                "misses": self._misses.get(collection, 0),
+                "entries": sum(1 for k in self._entries if k[0] == collection),
+                "version": self.version(collection),
+            }
+            for collection in sorted(collections)
+        }
@@ -0,0 +1,170 @@
+"""Cross-worker cache coherence for CMS content
+
+Every worker keeps its own ``ContentCache``. A write made through one worker
+must invalidate the caches of all the others, so each worker watches the
+content collections with a MongoDB change stream. Change streams need a
+replica set; on a standalone server (or a stand-in without ``watch``) the
+worker polls the ``content_revisions`` document that CMS writes bump instead.
+"""
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import ConnectionFailure, PyMongoError
+from utils.cache import CONTENT_COLLECTIONS, ContentCache
+from utils.read_routing import ReadRouting
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+REVISIONS_COLLECTION = "content_revisions"
+
+
+async def bump_revision(db: AsyncIOMotorDatabase, collection: str) -> None:
+    """Record that a content collection changed (read by polling workers)"""
+    await db[REVISIONS_COLLECTION].update_one(
+        {"_id": collection},
+        {"$inc": {"revision": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+
+class CacheCoherence:
+    """Background task that invalidates the local cache on remote writes"""
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        cache: ContentCache,
+        collections: Iterable[str] = CONTENT_COLLECTIONS,
+        poll_interval: float = 5.0,
+        retry_delay: float = 1.0,
+        routing: Optional[ReadRouting] = None,
+        max_stream_failures: int = 5
+    ):
+        self.db = db
+        self.cache = cache
+        self.routing = routing
+        self.collections = tuple(collections)
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.max_stream_failures = max_stream_failures
+        self.mode = "stopped"
+        self._task: Optional[asyncio.Task] = None
+        self._resume_token = None
+        self._revisions: Optional[Dict[str, int]] = None
+        # Change stream failures since the stream last opened
+        self._stream_failures = 0
+        # Whether a change stream ever opened, i.e. the server supports them
+        self._stream_opened = False
+
+    async def start(self) -> None:
+        """Start watching for content changes"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.mode = "stopped"
+
+    def invalidate(self, collection: str) -> None:
+        """Drop cached content and pin reads to the primary after a remote write"""
+        self.cache.invalidate(collection)
+        if self.routing is not None:
+            self.routing.wrote(collection)
+
+    def invalidate_all(self) -> None:
+        for collection in self.collections:
+            self.invalidate(collection)
+
+    def _backoff(self, failures: int) -> float:
+        return min(self.retry_delay * 2 ** max(failures - 1, 0), 60.0)
+
+    async def _run(self) -> None:
+        disconnects = 0
+        while True:
+            try:
+                await self._watch()
+                disconnects = 0
+            except asyncio.CancelledError:
+                raise
+            except ConnectionFailure as e:
+                # Events may have been missed while disconnected
+                logger.warning(f"Content change stream interrupted: {e}")
+                self.mode = "reconnecting"
+                self.invalidate_all()
+                disconnects += 1
+                await asyncio.sleep(self._backoff(disconnects))
+            except Exception as e:
+                if not self._stream_opened:
+                    # Standalone server or a stand-in without change stream support
+                    logger.info(f"Change streams unavailable ({e}), polling {REVISIONS_COLLECTION}")
+                    await self._poll()
+                self._stream_failures += 1
+                if self._stream_failures >= self.max_stream_failures:
+                    # e.g. missing privileges: the stream will not come back by itself
+                    logger.warning(
+                        f"Content change stream failed {self._stream_failures} times in a row ({e}), "
+                        f"polling {REVISIONS_COLLECTION}"
+                    )
+                    await self._poll()
+                # e.g. the resume point fell off the oplog; restart from now
+                logger.warning(f"Content change stream failed: {e}")
+                self._resume_token = None
+                self.invalidate_all()
+                await asyncio.sleep(self._backoff(self._stream_failures))
+
+    async def _watch(self) -> None:
+        pipeline = [{"$match": {"ns.coll": {"$in": list(self.collections)}}}]
+        async with self.db.watch(pipeline, resume_after=self._resume_token) as stream:
+            # The first getMore opens the stream and fails if it is unsupported
+            change = await stream.try_next()
+            if self.mode == "reconnecting":
+                self.invalidate_all()
+            if self.mode != "change_stream":
+                logger.info("Watching content collections with a change stream")
+            self.mode = "change_stream"
+            self._stream_opened = True
+            self._stream_failures = 0
+
+            while stream.alive:
+                self._resume_token = stream.resume_token
+                if change is not None:
+                    if change.get("operationType") == "invalidate":
+                        # The stream is closed (e.g. database dropped); start afresh
+                        self._resume_token = None
+                        self.invalidate_all()
+                        return
+                    self.invalidate(change["ns"]["coll"])
+                change = await stream.try_next()
+
+    async def _poll(self) -> None:
+        self.mode = "polling"
+        # The first check only records a baseline, so anything written since
+        # the stream stopped delivering events would otherwise stay cached
+        self.invalidate_all()
+        while True:
+            try:
+                await self.check_revisions()
+            except PyMongoError as e:
+                logger.warning(f"Failed to poll content revisions: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def check_revisions(self) -> None:
+        """Invalidate collections whose revision changed since the last check"""
+        cursor = self.db[REVISIONS_COLLECTION].find({"_id": {"$in": list(self.collections)}})
+        revisions = {doc["_id"]: doc.get("revision", 0) async for doc in cursor}
+
+        if self._revisions is not None:
+            for collection, revision in revisions.items():
+                if self._revisions.get(collection) != revision:
+                    self.invalidate(collection)
+        self._revisions = revisions
@@ -0,0 +1,220 @@
+"""MongoDB client construction and connection pool telemetry
+
+Pool sizing, idle and wait-queue timeouts and wire compression come from the
+MONGO_* environment variables so they can be matched to the number of
+workers. ``prewarm`` opens ``minPoolSize`` connections during startup so the
+first requests do not pay for TCP, TLS and authentication, and
+``PoolMetricsListener`` reports checkout waits and connections in use.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+from utils.metrics import (
+    MONGODB_POOL_CHECKED_OUT,
+    MONGODB_POOL_CHECKOUT_FAILURES,
+    MONGODB_POOL_CHECKOUT_WAIT,
+    MONGODB_POOL_CONNECTIONS,
+)
+import asyncio
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _optional_int(name: str) -> Optional[int]:
+    value = os.environ.get(name, "")
+    return int(value) if value else None
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    max_pool_size: int = 100
+    min_pool_size: int = 5
+    # None keeps the driver default (no limit)
+    max_idle_time_ms: Optional[int] = None
+    wait_queue_timeout_ms: Optional[int] = None
+    max_connecting: int = 2
+    # Wire compression, in order of preference; the server picks the first it supports
+    compressors: Tuple[str, ...] = ("zlib",)
+    zlib_compression_level: int = -1
+
+    @classmethod
+    def from_env(cls) -> "PoolSettings":
+        return cls(
+            max_pool_size=int(os.environ.get("MONGO_MAX_POOL_SIZE", "100")),
+            min_pool_size=int(os.environ.get("MONGO_MIN_POOL_SIZE", "5")),
+            max_idle_time_ms=_optional_int("MONGO_MAX_IDLE_TIME_MS"),
+            wait_queue_timeout_ms=_optional_int("MONGO_WAIT_QUEUE_TIMEOUT_MS"),
+            max_connecting=int(os.environ.get("MONGO_MAX_CONNECTING", "2")),
+            compressors=tuple(
+                name.strip() for name in os.environ.get("MONGO_COMPRESSORS", "zlib").split(",")
+                if name.strip()
+            ),
+            zlib_compression_level=int(os.environ.get("MONGO_ZLIB_COMPRESSION_LEVEL", "-1"))
+        )
+
+    def client_options(self) -> Dict[str, Any]:
+        """Keyword arguments for AsyncIOMotorClient"""
+        options: Dict[str, Any] = {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "maxConnecting": self.max_connecting,
+        }
+        if self.max_idle_time_ms is not None:
+            options["maxIdleTimeMS"] = self.max_idle_time_ms
+        if self.wait_queue_timeout_ms is not None:
+            options["waitQueueTimeoutMS"] = self.wait_queue_timeout_ms
+        if self.compressors:
+            options["compressors"] = ",".join(self.compressors)
+            if "zlib" in self.compressors:
+                options["zlibCompressionLevel"] = self.zlib_compression_level
+        return options
+
+
+def _address(address: Tuple[str, int]) -> str:
+    host, port = address
+    return f"{host}:{port}"
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """pymongo listener tracking connections and checkout waits per server
+
+    pymongo 4.5 events carry no durations, so the wait is timed from
+    "checkout started" to "checked out" (or "checkout failed"). Both are
+    emitted by the same driver thread, which keeps the start time in a
+    thread-local.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # address -> [open connections, checked out]
+        self._pools: Dict[str, List[int]] = {}
+        self._waits: Deque[float] = deque(maxlen=window)
+        self.checkout_failures = 0
+
+    def _pool(self, address: str) -> List[int]:
+        pool = self._pools.get(address)
+        if pool is None:
+            pool = self._pools[address] = [0, 0]
+        return pool
+
+    def _wait(self) -> float:
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        pass
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        pass
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        address = _address(event.address)
+        with self._lock:
+            self._pools.pop(address, None)
+        MONGODB_POOL_CONNECTIONS.set(0, address)
+        MONGODB_POOL_CHECKED_OUT.set(0, address)
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        address = _address(event.address)
+        with self._lock:
+            self._pool(address)[0] += 1
+        MONGODB_POOL_CONNECTIONS.inc(address)
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        pass
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        address = _address(event.address)
+        with self._lock:
+            self._pool(address)[0] -= 1
+        MONGODB_POOL_CONNECTIONS.dec(address)
+
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent) -> None:
+        self._local.started = time.perf_counter()
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        address = _address(event.address)
+        wait = self._wait()
+        with self._lock:
+            self.checkout_failures += 1
+        MONGODB_POOL_CHECKOUT_WAIT.observe(wait, address)
+        MONGODB_POOL_CHECKOUT_FAILURES.inc(address, str(event.reason))
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        address = _address(event.address)
+        wait = self._wait()
+        with self._lock:
+            self._pool(address)[1] += 1
+            self._waits.append(wait)
+        MONGODB_POOL_CHECKOUT_WAIT.observe(wait, address)
+        MONGODB_POOL_CHECKED_OUT.inc(address)
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        address = _address(event.address)
+        with self._lock:
+            self._pool(address)[1] -= 1
+        MONGODB_POOL_CHECKED_OUT.dec(address)
+
+    def connections(self) -> int:
+        """Open connections across all servers"""
+        with self._lock:
+            return sum(pool[0] for pool in self._pools.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pools = {
+                address: {"connections": pool[0], "checked_out": pool[1]}
+                for address, pool in self._pools.items()
+            }
+            waits = sorted(self._waits)
+            failures = self.checkout_failures
+
+        def percentile(p: float) -> Optional[float]:
+            if not waits:
+                return None
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 3)
+
+        return {
+            "pools": pools,
+            "checkout_wait_ms": {
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(waits[-1] * 1000, 3) if waits else None
+            },
+            "checkout_failures": failures
+        }
+
+
+def create_mongo_client(
+    mongo_url: str,
+    settings: PoolSettings,
+    event_listeners: Sequence[Any] = ()
+) -> AsyncIOMotorClient:
+    """Motor client with the configured pool and compression"""
+    return AsyncIOMotorClient(mongo_url, event_listeners=list(event_listeners), **settings.client_options())
+
+
+async def prewarm(client: AsyncIOMotorClient, settings: PoolSettings, listener: PoolMetricsListener) -> int:
+    """Open ``min_pool_size`` connections before serving traffic
+
+    The driver only tops the pool up to minPoolSize from a background thread
+    some time after startup. Concurrent pings force the connections open now;
+    returns the number of open connections afterwards.
+    """
+    if settings.min_pool_size > 0:
+        await asyncio.gather(*(
+            client.admin.command("ping") for _ in range(settings.min_pool_size)
+        ))
+    return listener.connections()
@@ -1,43 +1,39 @@
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
+from utils.smtp_pool import get_smtp_pool
 import os
 import logging
-from typing import Optional
+from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
-def send_contact_notification(
+def build_contact_notification(
     contact_name: str,
     contact_email: str, 
     contact_company: Optional[str],
     contact_message: str,
     contact_id: str
-) -> bool:
-    """Send email notification for contact form submissions"""
+) -> Optional[MIMEMultipart]:
+    """Build the admin notification for a contact form submission"""
     
-    try:
-        # SMTP Configuration from environment
-        smtp_host = os.environ.get('SMTP_HOST', 'smtp.gmail.com')
-        smtp_port = int(os.environ.get('SMTP_PORT', '587'))
-        smtp_user = os.environ.get('SMTP_USER')
-        smtp_password = os.environ.get('SMTP_PASSWORD')
-        notification_email = os.environ.get('NOTIFICATION_EMAIL', 'alaamacreative@gmail.com')
-        
-        if not all([smtp_user, smtp_password]):
-            logger.error("SMTP credentials not configured")
-            return False
-            
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = smtp_user
-        msg['To'] = notification_email
-        msg['Subject'] = f"New Contact Form Submission from {contact_name}"
-        
-        # Email body
-        body = f"""
+    smtp_user = os.environ.get('SMTP_USER')
+    smtp_password = os.environ.get('SMTP_PASSWORD')
+    notification_email = os.environ.get('NOTIFICATION_EMAIL', 'alaamacreative@gmail.com')
+    
+    if not all([smtp_user, smtp_password]):
+        logger.error("SMTP credentials not configured")
+        return None
+        
+    # Create message
+    msg = MIMEMultipart()
+    msg['From'] = smtp_user
+    msg['To'] = notification_email
+    msg['Subject'] = f"New Contact Form Submission from {contact_name}"
+    
+    # Email body
+    body = f"""
         New contact form submission received:
         
         Contact Information:
@@ -53,41 +49,25 @@ def send_contact_notification(
         This is an automated notification from the Alaama Creative Studio website.
         Please reply directly to {contact_email} to respond to this inquiry.
         """
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        # Send email
-        server = smtplib.SMTP(smtp_host, smtp_port)
-        server.starttls()
-        server.login(smtp_user, smtp_password)
-        server.sendmail(smtp_user, notification_email, msg.as_string())
-        server.quit()
-        
-        logger.info(f"Contact notification sent for submission {contact_id}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Failed to send email notification: {e}")
-        return False
+    
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
 
-def send_welcome_email(contact_email: str, contact_name: str) -> bool:
-    """Send welcome/confirmation email to the contact"""
+def build_welcome_email(contact_email: str, contact_name: str) -> Optional[MIMEMultipart]:
+    """Build the welcome/confirmation email for a contact"""
     
-    try:
-        smtp_host = os.environ.get('SMTP_HOST', 'smtp.gmail.com')
-        smtp_port = int(os.environ.get('SMTP_PORT', '587'))
-        smtp_user = os.environ.get('SMTP_USER')
-        smtp_password = os.environ.get('SMTP_PASSWORD')
-        
-        if not all([smtp_user, smtp_password]):
-            return False
-            
-        msg = MIMEMultipart()
-        msg['From'] = smtp_user
-        msg['To'] = contact_email
-        msg['Subject'] = "Thank you for contacting Alaama Creative Studio"
+    smtp_user = os.environ.get('SMTP_USER')
+    smtp_password = os.environ.get('SMTP_PASSWORD')
+    
+    if not all([smtp_user, smtp_password]):
+        return None
         
-        body = f"""
+    msg = MIMEMultipart()
+    msg['From'] = smtp_user
+    msg['To'] = contact_email
+    msg['Subject'] = "Thank you for contacting Alaama Creative Studio"
+    
+    body = f"""
         Dear {contact_name},
         
         Thank you for reaching out to Alaama Creative Studio! We've received your message and appreciate your interest in our services.
@@ -106,17 +86,51 @@ def send_welcome_email(contact_email: str, contact_name: str) -> bool:
         Instagram: @alaama.bh
         Email: info@alaama.co
         """
+    
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+def send_contact_notification(
+    contact_name: str,
+    contact_email: str, 
+    contact_company: Optional[str],
+    contact_message: str,
+    contact_id: str
+) -> bool:
+    """Send email notification for contact form submissions"""
+    
+    try:
+        msg = build_contact_notification(
+            contact_name, contact_email, contact_company, contact_message, contact_id
+        )
+        if msg is None:
+            return False
+        
+        # Send over a pooled, already authenticated connection
+        get_smtp_pool().send(msg)
         
-        msg.attach(MIMEText(body, 'plain'))
+        logger.info(f"Contact notification sent for submission {contact_id}")
+        return True
         
-        server = smtplib.SMTP(smtp_host, smtp_port)
-        server.starttls()
-        server.login(smtp_user, smtp_password)
-        server.sendmail(smtp_user, contact_email, msg.as_string())
-        server.quit()
+    except Exception as e:
+        logger.error(f"Failed to send email notification: {e}")
+        return False
+
+def send_welcome_email(contact_email: str, contact_name: str) -> bool:
+    """Send welcome/confirmation email to the contact"""
+    
+    try:
+        msg = build_welcome_email(contact_email, contact_name)
+        if msg is None:
+            return False
         
+        get_smtp_pool().send(msg)
         return True
         
     except Exception as e:
         logger.error(f"Failed to send welcome email: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def send_message(msg: MIMEMultipart) -> bool:
+    """Send one built message over a pooled connection; False if it was not sent"""
+    return get_smtp_pool().send_batch([msg])[0]
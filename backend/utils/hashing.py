@@ -0,0 +1,162 @@
+"""Password hashing off the event loop
+
+pbkdf2_sha256 costs tens of milliseconds of CPU per call. ``PasswordHasher``
+runs hashing and verification on a bounded executor: threads by default
+(passlib uses hashlib's OpenSSL pbkdf2, which releases the GIL) or a process
+pool. At most ``max_concurrency`` calls are in flight; callers beyond that
+wait, and the wait is reported as queue time.
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from collections import deque
+from functools import lru_cache
+from passlib.context import CryptContext
+from utils.metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_QUEUE
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# passlib's default for pbkdf2_sha256
+DEFAULT_ROUNDS = 29000
+
+
+@lru_cache(maxsize=None)
+def build_context(rounds: int = DEFAULT_ROUNDS) -> CryptContext:
+    """Context hashing with ``rounds``; hashes with other rounds need an update"""
+    return CryptContext(
+        schemes=["pbkdf2_sha256"],
+        deprecated="auto",
+        pbkdf2_sha256__default_rounds=rounds,
+        pbkdf2_sha256__min_rounds=rounds,
+        pbkdf2_sha256__max_rounds=rounds
+    )
+
+
+# Module-level so they can be sent to a process pool
+def _hash(password: str, rounds: int) -> str:
+    return build_context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    try:
+        return build_context(rounds).verify_and_update(password, hashed_password)
+    except ValueError:
+        # Empty or malformed stored hash
+        return False, None
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        rounds: int = DEFAULT_ROUNDS,
+        max_concurrency: int = 2,
+        use_processes: bool = False
+    ):
+        self.rounds = rounds
+        self.max_concurrency = max_concurrency
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._queue_times: Deque[float] = deque(maxlen=1000)
+        self._run_times: Deque[float] = deque(maxlen=1000)
+        self._counters = {"hashed": 0, "verified": 0, "rehashed": 0, "waiting": 0}
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_concurrency)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrency, thread_name_prefix="pwhash"
+                )
+        return self._executor
+
+    async def _run(self, operation: str, func: Callable[..., Any], *args: Any) -> Any:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        queued_at = time.perf_counter()
+        self._counters["waiting"] += 1
+        waiting = True
+        try:
+            async with self._semaphore:
+                started_at = time.perf_counter()
+                self._counters["waiting"] -= 1
+                waiting = False
+                try:
+                    return await asyncio.get_running_loop().run_in_executor(
+                        self._get_executor(), func, *args
+                    )
+                finally:
+                    queue_time = started_at - queued_at
+                    run_time = time.perf_counter() - started_at
+                    self._queue_times.append(queue_time)
+                    self._run_times.append(run_time)
+                    PASSWORD_HASH_QUEUE.observe(queue_time, operation)
+                    PASSWORD_HASH_DURATION.observe(run_time, operation)
+        finally:
+            if waiting:
+                # Cancelled before getting a slot
+                self._counters["waiting"] -= 1
+
+    async def hash(self, password: str) -> str:
+        """Hash a new password with the configured rounds"""
+        hashed = await self._run("hash", _hash, password, self.rounds)
+        self._counters["hashed"] += 1
+        return hashed
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password; also returns a new hash if the stored one uses other rounds"""
+        valid, new_hash = await self._run("verify", _verify_and_update, password, hashed_password, self.rounds)
+        self._counters["verified"] += 1
+        if new_hash is not None:
+            self._counters["rehashed"] += 1
+        return valid, new_hash
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash"""
+        valid, _ = await self.verify_and_update(password, hashed_password)
+        return valid
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue and run time percentiles (seconds) and call counters"""
+
+        def percentiles(samples: Deque[float]) -> Dict[str, Optional[float]]:
+            ordered = sorted(samples)
+            if not ordered:
+                return {"p50": None, "p95": None, "max": None}
+            return {
+                "p50": ordered[int(0.5 * (len(ordered) - 1))],
+                "p95": ordered[int(0.95 * (len(ordered) - 1))],
+                "max": ordered[-1]
+            }
+
+        return {
+            "rounds": self.rounds,
+            "executor": "process" if self.use_processes else "thread",
+            "max_concurrency": self.max_concurrency,
+            "queue_seconds": percentiles(self._queue_times),
+            "run_seconds": percentiles(self._run_times),
+            **self._counters
+        }
+
+    def shutdown(self) -> None:
+        """Stop the executor; hashes in progress finish in the background"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def create_password_hasher() -> PasswordHasher:
+    """Hasher configured from PASSWORD_HASH_ROUNDS / PASSWORD_HASH_CONCURRENCY / PASSWORD_HASH_EXECUTOR"""
+    executor = os.environ.get("PASSWORD_HASH_EXECUTOR", "thread")
+    if executor not in ("thread", "process"):
+        logger.warning(f"Unknown PASSWORD_HASH_EXECUTOR '{executor}', using thread")
+    return PasswordHasher(
+        rounds=int(os.environ.get("PASSWORD_HASH_ROUNDS", str(DEFAULT_ROUNDS))),
+        max_concurrency=int(os.environ.get("PASSWORD_HASH_CONCURRENCY", "2")),
+        use_processes=executor == "process"
+    )
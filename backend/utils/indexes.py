@@ -0,0 +1,146 @@
+"""Declarative MongoDB index registry"""
+
+from dataclasses import dataclass
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    name: str
+    keys: Tuple[Tuple[str, int], ...]
+    unique: bool = False
+    expire_after_seconds: Optional[int] = None
+    # Only documents matching this filter are indexed
+    partial_filter: Optional[Dict[str, Any]] = None
+
+    def model(self, background: bool = False) -> IndexModel:
+        options = {"name": self.name, "unique": self.unique}
+        if self.expire_after_seconds is not None:
+            options["expireAfterSeconds"] = self.expire_after_seconds
+        if self.partial_filter is not None:
+            options["partialFilterExpression"] = self.partial_filter
+        if background:
+            # Ignored by MongoDB >= 4.2, which always builds without blocking
+            options["background"] = True
+        return IndexModel(list(self.keys), **options)
+
+
+# Content documents created before ids were introduced have none (see
+# repositories/content.py); they must not collide as duplicate nulls
+_HAS_ID = {"id": {"$exists": True}}
+
+# Every query the API runs should be covered by one of these
+INDEXES: List[IndexSpec] = [
+    # Public/CMS listings filter on active (and featured) and sort by order
+    IndexSpec("services", "services_active_order", (("active", ASCENDING), ("order", ASCENDING))),
+    IndexSpec("services", "services_id", (("id", ASCENDING),), unique=True, partial_filter=_HAS_ID),
+    IndexSpec("case_studies", "case_studies_active_order", (("active", ASCENDING), ("order", ASCENDING))),
+    IndexSpec(
+        "case_studies", "case_studies_active_featured_order",
+        (("active", ASCENDING), ("featured", ASCENDING), ("order", ASCENDING))
+    ),
+    IndexSpec("case_studies", "case_studies_id", (("id", ASCENDING),), unique=True, partial_filter=_HAS_ID),
+    IndexSpec("concepts", "concepts_active_order", (("active", ASCENDING), ("order", ASCENDING))),
+    IndexSpec("concepts", "concepts_id", (("id", ASCENDING),), unique=True, partial_filter=_HAS_ID),
+    # Login and registration look admins up by username or email
+    IndexSpec("admin_users", "admin_users_username", (("username", ASCENDING),), unique=True),
+    IndexSpec("admin_users", "admin_users_email", (("email", ASCENDING),), unique=True),
+    # The admin inbox is paged newest first on (submitted_at, _id)
+    IndexSpec(
+        "contact_submissions", "contact_submissions_submitted_at_id",
+        (("submitted_at", DESCENDING), ("_id", DESCENDING))
+    ),
+    # The outbox marks notifications sent by submission id
+    IndexSpec("contact_submissions", "contact_submissions_id", (("id", ASCENDING),), unique=True),
+    # Outbox workers claim the oldest due job of a status
+    IndexSpec(
+        "email_outbox", "email_outbox_status_next_attempt",
+        (("status", ASCENDING), ("next_attempt_at", ASCENDING))
+    ),
+    # Counters of the mongo rate limit backend expire with their window
+    IndexSpec(
+        "rate_limits", "rate_limits_ttl", (("expires_at", ASCENDING),),
+        expire_after_seconds=0
+    ),
+    IndexSpec(
+        "admin_sessions", "admin_sessions_ttl", (("expires_at", ASCENDING),),
+        expire_after_seconds=0
+    ),
+    IndexSpec(
+        "revoked_tokens", "revoked_tokens_ttl", (("expires_at", ASCENDING),),
+        expire_after_seconds=0
+    ),
+    # Delivered jobs are kept for a week; pending and dead jobs have no sent_at
+    IndexSpec(
+        "email_outbox", "email_outbox_sent_ttl", (("sent_at", ASCENDING),),
+        expire_after_seconds=7 * 24 * 3600
+    ),
+]
+
+
+def indexes_by_collection(specs: List[IndexSpec] = INDEXES) -> Dict[str, List[IndexSpec]]:
+    grouped: Dict[str, List[IndexSpec]] = {}
+    for spec in specs:
+        grouped.setdefault(spec.collection, []).append(spec)
+    return grouped
+
+
+async def ensure_indexes(
+    db: AsyncIOMotorDatabase,
+    background: bool = False,
+    specs: List[IndexSpec] = INDEXES
+) -> Dict[str, List[str]]:
+    """Create any registered index that does not exist yet
+
+    ``create_indexes`` is a no-op for indexes that already exist with the same
+    definition, so this is safe to run on every startup. Each index is built
+    on its own: a failure (e.g. duplicate values under a unique index) is
+    logged and does not stop the others.
+    """
+    created: Dict[str, List[str]] = {}
+    for collection, collection_specs in indexes_by_collection(specs).items():
+        for spec in collection_specs:
+            try:
+                created.setdefault(collection, []).extend(
+                    await db[collection].create_indexes([spec.model(background=background)])
+                )
+            except OperationFailure as e:
+                logger.error(f"Failed to create index {spec.name} on {collection}: {e}")
+    return created
+
+
+async def index_report(
+    db: AsyncIOMotorDatabase,
+    specs: List[IndexSpec] = INDEXES
+) -> Dict[str, Dict[str, List[str]]]:
+    """Registered indexes that are missing, and existing indexes never used
+
+    Usage comes from ``$indexStats`` and is counted since the last restart of
+    each mongod, so treat "unused" as a hint rather than a verdict.
+    """
+    report: Dict[str, Dict[str, List[str]]] = {}
+    for collection, collection_specs in indexes_by_collection(specs).items():
+        existing = await db[collection].index_information()
+        declared = {spec.name for spec in collection_specs}
+
+        unused: List[str] = []
+        try:
+            async for stats in db[collection].aggregate([{"$indexStats": {}}]):
+                if stats["name"] != "_id_" and stats.get("accesses", {}).get("ops", 0) == 0:
+                    unused.append(stats["name"])
+        except OperationFailure as e:
+            logger.warning(f"$indexStats unavailable for {collection}: {e}")
+
+        report[collection] = {
+            "missing": sorted(declared - set(existing)),
+            "unregistered": sorted(set(existing) - declared - {"_id_"}),
+            "unused": sorted(unused),
+        }
+    return report
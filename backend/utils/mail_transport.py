@@ -0,0 +1,120 @@
+"""Asyncio facade over the blocking email senders in utils.email
+
+smtplib is synchronous, so every send runs on a dedicated, bounded thread
+pool. Coroutines never block the event loop: they wait on the executor
+future with a per-message timeout.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from email.message import Message
+from typing import Any, Callable, List, Optional
+from utils import email as email_senders
+from utils.metrics import EMAIL_SEND_DURATION
+import asyncio
+import functools
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMailTransport:
+    def __init__(self, max_concurrency: int = 4, timeout: float = 30.0):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="smtp")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+
+    async def _run(self, kind: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            self.in_flight += 1
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                # A timed-out send keeps its thread until the SMTP socket
+                # timeout (SMTP_TIMEOUT) fires, but the caller is released
+                result = await asyncio.wait_for(
+                    loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs)),
+                    timeout=self.timeout
+                )
+                sent = all(result) if isinstance(result, list) else bool(result)
+                outcome = "sent" if sent else "failed"
+                return result
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                raise
+            finally:
+                self.in_flight -= 1
+                EMAIL_SEND_DURATION.observe(time.perf_counter() - started, kind, outcome)
+
+    async def send_contact_notification(
+        self,
+        contact_name: str,
+        contact_email: str,
+        contact_company: Optional[str],
+        contact_message: str,
+        contact_id: str
+    ) -> bool:
+        """Async counterpart of utils.email.send_contact_notification"""
+        try:
+            return await self._run(
+                "contact_notification",
+                email_senders.send_contact_notification,
+                contact_name=contact_name,
+                contact_email=contact_email,
+                contact_company=contact_company,
+                contact_message=contact_message,
+                contact_id=contact_id
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"Contact notification for {contact_id} timed out after {self.timeout}s")
+            return False
+
+    async def send_welcome_email(self, contact_email: str, contact_name: str) -> bool:
+        """Async counterpart of utils.email.send_welcome_email"""
+        try:
+            return await self._run(
+                "welcome_email",
+                email_senders.send_welcome_email,
+                contact_email=contact_email,
+                contact_name=contact_name
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"Welcome email to {contact_email} timed out after {self.timeout}s")
+            return False
+
+    async def send_messages(self, messages: List[Message], kind: str = "message") -> List[bool]:
+        """Send built messages, one executor call (and timeout) per message
+
+        The sends share the SMTP pool's connections and run up to
+        ``max_concurrency`` at a time. Only a message still being sent when
+        its timeout fires is reported as failed; messages still queued
+        behind it are cancelled before they reach the server, so a slow
+        server cannot fail a whole batch that was in fact delivered.
+        """
+
+        async def send_one(message: Message) -> bool:
+            try:
+                return await self._run(kind, email_senders.send_message, message)
+            except asyncio.TimeoutError:
+                logger.error(f"Email to {message['To']} timed out after {self.timeout}s")
+                return False
+
+        return list(await asyncio.gather(*(send_one(message) for message in messages)))
+
+    def shutdown(self) -> None:
+        """Stop accepting sends; running ones finish in the background"""
+        self._executor.shutdown(wait=False)
+
+
+def create_mail_transport() -> AsyncMailTransport:
+    """Transport configured from EMAIL_SEND_CONCURRENCY / EMAIL_SEND_TIMEOUT"""
+    return AsyncMailTransport(
+        max_concurrency=int(os.environ.get("EMAIL_SEND_CONCURRENCY", "4")),
+        timeout=float(os.environ.get("EMAIL_SEND_TIMEOUT", "30"))
+    )
@@ -0,0 +1,292 @@
+"""In-process metrics exported in the Prometheus text format
+
+A deliberately small registry (counters, gauges and fixed-bucket histograms) so the
+hot path costs a bisect and a few additions under a lock. Sources:
+
+* ``MetricsMiddleware`` - HTTP latency per method, route template and status
+* ``CommandMetricsListener`` - MongoDB command latency per collection and command
+* ``PoolMetricsListener`` (utils.db) - MongoDB pool checkout waits and connections in use
+* email sends (utils.mail_transport) and password hashing (utils.hashing)
+
+Everything is rendered by ``REGISTRY.render()`` for the ``/metrics`` endpoint,
+which like the detailed health stats is only served to callers presenting
+the ``METRICS_TOKEN`` (see ``require_metrics_token``).
+"""
+
+from bisect import bisect_left
+from fastapi import Depends, HTTPException, status as http_status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from pymongo import monitoring
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+import hmac
+import threading
+import time
+
+# Seconds; suits requests and database commands alike
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Email sends take far longer than requests
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(s[0]), s[1], s[2]) for labels, s in self._series.items()]
+        for labels, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                bucket_label = 'le="' + le + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, bucket_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {repr(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status")
+))
+MONGODB_COMMAND_DURATION = REGISTRY.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency by collection",
+    ("collection", "command")
+))
+MONGODB_COMMAND_FAILURES = REGISTRY.register(Counter(
+    "mongodb_command_failures_total", "Failed MongoDB commands by collection",
+    ("collection", "command")
+))
+MONGODB_POOL_CHECKOUT_WAIT = REGISTRY.register(Histogram(
+    "mongodb_pool_checkout_wait_seconds", "Wait for a pooled MongoDB connection",
+    ("address",)
+))
+MONGODB_POOL_CHECKOUT_FAILURES = REGISTRY.register(Counter(
+    "mongodb_pool_checkout_failures_total", "Failed connection checkouts by reason",
+    ("address", "reason")
+))
+MONGODB_POOL_CONNECTIONS = REGISTRY.register(Gauge(
+    "mongodb_pool_connections", "Open pooled MongoDB connections",
+    ("address",)
+))
+MONGODB_POOL_CHECKED_OUT = REGISTRY.register(Gauge(
+    "mongodb_pool_checked_out_connections", "Pooled MongoDB connections in use",
+    ("address",)
+))
+EMAIL_SEND_DURATION = REGISTRY.register(Histogram(
+    "email_send_duration_seconds", "Time to hand emails to the SMTP server",
+    ("kind", "outcome"), buckets=SLOW_BUCKETS
+))
+PASSWORD_HASH_DURATION = REGISTRY.register(Histogram(
+    "password_hash_duration_seconds", "Password hash/verify time on the executor",
+    ("operation",)
+))
+PASSWORD_HASH_QUEUE = REGISTRY.register(Histogram(
+    "password_hash_queue_seconds", "Wait for a password hashing slot",
+    ("operation",)
+))
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request
+
+    Requests are labelled with the matched route template (e.g.
+    ``/api/cms/services/{service_id}``), never the raw path, so the number of
+    series stays bounded; unmatched paths share the "unmatched" label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                getattr(route, "path", None) or "unmatched",
+                str(status)
+            )
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """pymongo listener timing commands per collection
+
+    Register it with ``AsyncIOMotorClient(..., event_listeners=[...])``.
+    Durations come from the driver's own measurement.
+    """
+
+    def __init__(self):
+        # (connection, request id) -> collection of commands in flight
+        self._collections: Dict[Tuple[object, int], str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _collection(command_name: str, command) -> str:
+        target = command.get("collection") if command_name == "getMore" else command.get(command_name)
+        return target if isinstance(target, str) else "-"
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        with self._lock:
+            self._collections[(event.connection_id, event.request_id)] = self._collection(
+                event.command_name, event.command
+            )
+
+    def _finish(self, event) -> Optional[str]:
+        with self._lock:
+            return self._collections.pop((event.connection_id, event.request_id), None)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        collection = self._finish(event) or "-"
+        MONGODB_COMMAND_DURATION.observe(event.duration_micros / 1e6, collection, event.command_name)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        collection = self._finish(event) or "-"
+        MONGODB_COMMAND_DURATION.observe(event.duration_micros / 1e6, collection, event.command_name)
+        MONGODB_COMMAND_FAILURES.inc(collection, event.command_name)
+
+
+def require_metrics_token(token: Optional[str]) -> Callable[..., Awaitable[None]]:
+    """FastAPI dependency for endpoints that expose internals
+
+    Callers must send ``Authorization: Bearer <token>``. Without a configured
+    token the guarded endpoints answer 404, as if they did not exist.
+    """
+    bearer = HTTPBearer(auto_error=False)
+
+    async def guard(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer)) -> None:
+        if not token:
+            raise HTTPException(status_code=http_status.HTTP_404_NOT_FOUND, detail="Not Found")
+        if credentials is None or not hmac.compare_digest(
+            credentials.credentials.encode(), token.encode()
+        ):
+            raise HTTPException(
+                status_code=http_status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid metrics token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+    return guard
@@ -0,0 +1,316 @@
+"""Durable email outbox backed by MongoDB
+
+Request handlers only insert a job document; a bounded pool of background
+workers claims jobs, sends them with retries and exponential backoff, and
+dead-letters jobs that keep failing. Jobs survive restarts: a job whose worker
+died is reclaimed once its lock expires.
+
+Workers claim up to ``batch_size`` due jobs at a time and hand each kind's
+jobs to its handler together, so a burst of submissions goes out over shared
+SMTP connections (``AsyncMailTransport.send_messages``).
+"""
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from email.message import Message
+from pymongo import UpdateOne
+from utils.email import build_contact_notification, build_welcome_email
+from utils.mail_transport import AsyncMailTransport
+from utils.write_behind import UpdateBatcher
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_COLLECTION = "email_outbox"
+
+# A handler gets the payloads of a batch of jobs of its kind and returns one
+# flag per payload: True once that job is done, False to retry it. An
+# exception retries the whole batch.
+JobHandler = Callable[[List[Dict[str, Any]]], Awaitable[List[bool]]]
+
+
+class EmailOutbox:
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        handlers: Dict[str, JobHandler],
+        concurrency: int = 2,
+        max_attempts: int = 5,
+        base_delay: float = 30.0,
+        max_delay: float = 3600.0,
+        lock_timeout: float = 300.0,
+        poll_interval: float = 2.0,
+        batch_size: int = 20
+    ):
+        self.db = db
+        self.collection = db[OUTBOX_COLLECTION]
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._workers: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._latencies: Deque[float] = deque(maxlen=1000)
+        self._counters = {"sent": 0, "retried": 0, "dead": 0}
+
+    def _job(self, kind: str, payload: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown outbox job kind: {kind}")
+        return {
+            "id": str(uuid.uuid4()),
+            "kind": kind,
+            "payload": payload,
+            "status": "pending",
+            "attempts": 0,
+            "created_at": now,
+            "next_attempt_at": now,
+            "locked_until": None,
+            "last_error": None
+        }
+
+    async def enqueue(self, kind: str, payload: Dict[str, Any]) -> str:
+        """Persist a job; it is sent by a worker, never on the request path"""
+        job = self._job(kind, payload, datetime.utcnow())
+        await self.collection.insert_one(job)
+        self._wakeup.set()
+        return job["id"]
+
+    async def enqueue_many(self, jobs: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Persist several ``(kind, payload)`` jobs with one insert"""
+        now = datetime.utcnow()
+        documents = [self._job(kind, payload, now) for kind, payload in jobs]
+        await self.collection.insert_many(documents)
+        self._wakeup.set()
+        return [document["id"] for document in documents]
+
+    async def start(self) -> None:
+        """Start the worker pool"""
+        if not self._workers:
+            self._workers = [self._spawn(n) for n in range(self.concurrency)]
+            logger.info(f"Email outbox started with {self.concurrency} workers")
+
+    async def stop(self) -> None:
+        """Stop the workers; jobs in flight are reclaimed after their lock expires"""
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    def _spawn(self, n: int) -> asyncio.Task:
+        task = asyncio.create_task(self._worker(n))
+        task.add_done_callback(lambda finished: self._restart(n, finished))
+        return task
+
+    def _restart(self, n: int, finished: asyncio.Task) -> None:
+        """Replace a worker that died while the pool is running"""
+        if finished.cancelled() or finished not in self._workers:
+            return
+        logger.error(f"Email outbox worker {n} died, restarting: {finished.exception()!r}")
+        self._workers[self._workers.index(finished)] = self._spawn(n)
+
+    async def _worker(self, n: int) -> None:
+        while True:
+            try:
+                jobs = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Email outbox worker {n} failed to claim jobs: {e}")
+                jobs = []
+
+            if not jobs:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._process(jobs)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # The jobs stay leased and are reclaimed once their lock expires
+                logger.exception(f"Email outbox worker {n} failed to record {len(jobs)} jobs")
+
+    async def _claim(self) -> List[Dict[str, Any]]:
+        """Lease up to ``batch_size`` due jobs (three round trips for any batch size)"""
+        now = datetime.utcnow()
+        due = {
+            "$or": [
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                # Claimed by a worker that never finished (e.g. restart)
+                {"status": "processing", "locked_until": {"$lte": now}},
+            ]
+        }
+        candidates = await self.collection.find(due, projection={"_id": 1}).sort(
+            "next_attempt_at", 1
+        ).limit(self.batch_size).to_list(length=self.batch_size)
+        if not candidates:
+            return []
+
+        # Re-checking ``due`` per document keeps concurrent workers from
+        # leasing the same job
+        lease = str(uuid.uuid4())
+        ids = [job["_id"] for job in candidates]
+        await self.collection.update_many(
+            {"_id": {"$in": ids}, **due},
+            {
+                "$set": {
+                    "status": "processing",
+                    "locked_until": now + timedelta(seconds=self.lock_timeout),
+                    "lease": lease
+                },
+                "$inc": {"attempts": 1}
+            }
+        )
+        return await self.collection.find({"_id": {"$in": ids}, "lease": lease}).to_list(length=self.batch_size)
+
+    async def _process(self, jobs: List[Dict[str, Any]]) -> None:
+        by_kind: Dict[str, List[Dict[str, Any]]] = {}
+        for job in jobs:
+            by_kind.setdefault(job["kind"], []).append(job)
+
+        # (job, error or None)
+        outcomes: List[Tuple[Dict[str, Any], Optional[str]]] = []
+        for kind, group in by_kind.items():
+            try:
+                done = await self.handlers[kind]([job["payload"] for job in group])
+                if len(done) != len(group):
+                    raise ValueError(f"{kind} handler returned {len(done)} results for {len(group)} jobs")
+                outcomes.extend(
+                    (job, None if ok else "handler reported failure") for job, ok in zip(group, done)
+                )
+            except Exception as e:
+                outcomes.extend((job, str(e)) for job in group)
+
+        now = datetime.utcnow()
+        await self.collection.bulk_write(
+            [self._record(job, error, now) for job, error in outcomes], ordered=False
+        )
+
+    def _record(self, job: Dict[str, Any], error: Optional[str], now: datetime) -> UpdateOne:
+        """The write that records a job's outcome (sent, retry or dead)"""
+        if error is None:
+            self._latencies.append((now - job["created_at"]).total_seconds())
+            self._counters["sent"] += 1
+            return UpdateOne(
+                {"_id": job["_id"]},
+                {"$set": {"status": "sent", "sent_at": now, "locked_until": None}}
+            )
+
+        if job["attempts"] >= self.max_attempts:
+            self._counters["dead"] += 1
+            logger.error(f"Email job {job['id']} ({job['kind']}) dead-lettered: {error}")
+            return UpdateOne(
+                {"_id": job["_id"]},
+                {"$set": {"status": "dead", "last_error": error, "locked_until": None}}
+            )
+
+        delay = min(self.base_delay * 2 ** (job["attempts"] - 1), self.max_delay)
+        self._counters["retried"] += 1
+        logger.warning(f"Email job {job['id']} ({job['kind']}) failed, retrying in {delay:.0f}s: {error}")
+        return UpdateOne(
+            {"_id": job["_id"]},
+            {
+                "$set": {
+                    "status": "pending",
+                    "next_attempt_at": now + timedelta(seconds=delay),
+                    "last_error": error,
+                    "locked_until": None
+                }
+            }
+        )
+
+    async def stats(self) -> Dict[str, Any]:
+        """Queue depth per status and enqueue-to-sent latency"""
+        depth = {"pending": 0, "processing": 0, "sent": 0, "dead": 0}
+        async for row in self.collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            depth[row["_id"]] = row["count"]
+
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        oldest = await self.collection.find_one(
+            {"status": "pending"}, sort=[("created_at", 1)], projection={"created_at": 1}
+        )
+        return {
+            "depth": depth,
+            "oldest_pending_age_seconds": (
+                (datetime.utcnow() - oldest["created_at"]).total_seconds() if oldest else None
+            ),
+            "latency_seconds": {
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": latencies[-1] if latencies else None
+            },
+            "workers": len(self._workers),
+            **self._counters
+        }
+
+
+def contact_email_handlers(
+    db: AsyncIOMotorDatabase,
+    transport: AsyncMailTransport,
+    status_updates: Optional[UpdateBatcher] = None
+) -> Dict[str, JobHandler]:
+    """Outbox handlers for the contact form emails
+
+    Each batch of jobs is sent with one ``send_messages`` call. ``email_sent``
+    flags go through ``status_updates`` when it batches, so they share
+    ``bulk_write`` batches with other workers' updates; otherwise each
+    batch of jobs is marked with a single ``update_many``.
+    """
+
+    async def send(kind: str, messages: List[Optional[Message]]) -> List[bool]:
+        """Send the built messages together; unbuilt ones (no SMTP credentials) fail"""
+        ready = [message for message in messages if message is not None]
+        flags = iter(await transport.send_messages(ready, kind) if ready else [])
+        return [next(flags) if message is not None else False for message in messages]
+
+    async def contact_notification(payloads: List[Dict[str, Any]]) -> List[bool]:
+        sent = await send("contact_notification", [
+            build_contact_notification(
+                contact_name=payload["name"],
+                contact_email=payload["email"],
+                contact_company=payload.get("company"),
+                contact_message=payload["message"],
+                contact_id=payload["submission_id"]
+            )
+            for payload in payloads
+        ])
+        sent_ids = [payload["submission_id"] for payload, ok in zip(payloads, sent) if ok]
+        if sent_ids:
+            logger.info(f"Contact notifications sent for submissions {', '.join(sent_ids)}")
+            update = {"$set": {"email_sent": True, "email_sent_at": datetime.utcnow()}}
+            if status_updates is not None and status_updates.enabled:
+                await asyncio.gather(*(
+                    status_updates.update_one({"id": submission_id}, update) for submission_id in sent_ids
+                ))
+            else:
+                await db.contact_submissions.update_many({"id": {"$in": sent_ids}}, update)
+        return sent
+
+    async def welcome_email(payloads: List[Dict[str, Any]]) -> List[bool]:
+        return await send("welcome_email", [
+            build_welcome_email(contact_email=payload["email"], contact_name=payload["name"])
+            for payload in payloads
+        ])
+
+    return {
+        "contact_notification": contact_notification,
+        "welcome_email": welcome_email,
+    }
@@ -0,0 +1,35 @@
+"""Keyset (cursor) pagination helpers"""
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from datetime import datetime
+from typing import Tuple
+import base64
+import json
+
+
+def encode_cursor(sort_value: datetime, object_id: ObjectId) -> str:
+    """Opaque continuation token for the position after a document"""
+    payload = json.dumps({"t": sort_value.isoformat(), "i": str(object_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[datetime, ObjectId]:
+    """Inverse of ``encode_cursor``; raises ValueError on a malformed token"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), ObjectId(payload["i"])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise ValueError(f"Invalid cursor: {token}") from e
+
+
+def keyset_filter(field: str, sort_value: datetime, object_id: ObjectId, descending: bool = True) -> dict:
+    """Query selecting documents strictly after a cursor in ``(field, _id)`` order"""
+    op = "$lt" if descending else "$gt"
+    return {
+        "$or": [
+            {field: {op: sort_value}},
+            {field: sort_value, "_id": {op: object_id}},
+        ]
+    }
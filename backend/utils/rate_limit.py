@@ -0,0 +1,281 @@
+"""Rate limiting with interchangeable storage backends
+
+All backends implement a sliding-window limit: a key may be hit ``limit``
+times within any ``window`` seconds, and rejected hits are not counted.
+
+* ``InMemoryRateLimiter`` - per-process, exact sliding window over small
+  buckets, bounded by LRU eviction of idle keys.
+* ``MongoRateLimiter`` / ``RedisRateLimiter`` - shared by every worker. They
+  use the sliding-window-counter approximation (current fixed window plus a
+  weighted share of the previous one) so each hit is one atomic increment.
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from typing import Deque, FrozenSet, List, Optional, Tuple
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # optional dependency, only needed for RATE_LIMIT_BACKEND=redis
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITS_COLLECTION = "rate_limits"
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    # Seconds until at least one more hit will be allowed
+    reset_after: float
+
+
+class RateLimiter(ABC):
+    @abstractmethod
+    async def hit(self, key: str, limit: int, window: int) -> RateLimitResult:
+        """Count a hit against ``key`` unless it is over its limit"""
+
+
+def _sliding_estimate(previous: int, current: int, window: int, now: float) -> Tuple[float, float]:
+    """Weighted hit count and seconds left in the current fixed window"""
+    elapsed = now % window
+    return previous * (1 - elapsed / window) + current, window - elapsed
+
+
+class InMemoryRateLimiter(RateLimiter):
+    def __init__(self, max_keys: int = 10000, buckets_per_window: int = 10):
+        self.max_keys = max_keys
+        self.buckets_per_window = buckets_per_window
+        # key -> deque of [bucket_start, count], oldest first
+        self._keys: "OrderedDict[str, Deque[List[int]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit_sync(self, key: str, limit: int, window: int) -> RateLimitResult:
+        now = time.time()
+        bucket_size = max(1, window // self.buckets_per_window)
+        bucket_start = int(now) // bucket_size * bucket_size
+
+        with self._lock:
+            buckets = self._keys.get(key)
+            if buckets is None:
+                buckets = self._keys[key] = deque()
+            self._keys.move_to_end(key)
+
+            # Drop buckets that fell out of the window
+            while buckets and buckets[0][0] + bucket_size <= now - window:
+                buckets.popleft()
+            total = sum(count for _, count in buckets)
+            reset_after = (buckets[0][0] + bucket_size + window - now) if buckets else 0.0
+
+            if total >= limit:
+                allowed = False
+            else:
+                allowed = True
+                total += 1
+                if buckets and buckets[-1][0] == bucket_start:
+                    buckets[-1][1] += 1
+                else:
+                    buckets.append([bucket_start, 1])
+                if reset_after == 0.0:
+                    reset_after = float(window)
+
+            # Evict the least recently used keys
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+
+        return RateLimitResult(allowed, limit, max(0, limit - total), max(0.0, reset_after))
+
+    async def hit(self, key: str, limit: int, window: int) -> RateLimitResult:
+        return self.hit_sync(key, limit, window)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class MongoRateLimiter(RateLimiter):
+    """Counters in a TTL-indexed collection shared by all workers"""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db[RATE_LIMITS_COLLECTION]
+
+    async def hit(self, key: str, limit: int, window: int) -> RateLimitResult:
+        now = time.time()
+        window_index = int(now // window)
+        expires_at = datetime.utcfromtimestamp((window_index + 2) * window)
+
+        current = await self.collection.find_one_and_update(
+            {"_id": f"{key}:{window}:{window_index}"},
+            {"$inc": {"count": 1}, "$setOnInsert": {"expires_at": expires_at}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        previous = await self.collection.find_one({"_id": f"{key}:{window}:{window_index - 1}"})
+
+        estimate, reset_after = _sliding_estimate(
+            previous["count"] if previous else 0, current["count"], window, now
+        )
+        if estimate > limit:
+            # Rejected hits do not count against the limit
+            await self.collection.update_one({"_id": current["_id"]}, {"$inc": {"count": -1}})
+            return RateLimitResult(False, limit, 0, reset_after)
+        return RateLimitResult(True, limit, max(0, math.floor(limit - estimate)), reset_after)
+
+
+class RedisRateLimiter(RateLimiter):
+    """Counters in Redis (or any server speaking the Redis protocol)"""
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisRateLimiter":
+        if aioredis is None:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package")
+        return cls(aioredis.from_url(url))
+
+    async def hit(self, key: str, limit: int, window: int) -> RateLimitResult:
+        now = time.time()
+        window_index = int(now // window)
+        current_key = f"ratelimit:{key}:{window}:{window_index}"
+        previous_key = f"ratelimit:{key}:{window}:{window_index - 1}"
+
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.incr(current_key)
+            pipe.expire(current_key, window * 2)
+            pipe.get(previous_key)
+            current, _, previous = await pipe.execute()
+
+        estimate, reset_after = _sliding_estimate(int(previous or 0), int(current), window, now)
+        if estimate > limit:
+            await self.client.decr(current_key)
+            return RateLimitResult(False, limit, 0, reset_after)
+        return RateLimitResult(True, limit, max(0, math.floor(limit - estimate)), reset_after)
+
+
+def create_rate_limiter(db: Optional[AsyncIOMotorDatabase] = None) -> RateLimiter:
+    """Backend selected by RATE_LIMIT_BACKEND (memory, mongo or redis)"""
+    backend = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+    if backend == "mongo":
+        if db is None:
+            raise ValueError("The mongo rate limit backend needs a database")
+        return MongoRateLimiter(db)
+    if backend == "redis":
+        return RedisRateLimiter.from_url(os.environ.get("REDIS_URL", "redis://localhost:6379/0"))
+    if backend != "memory":
+        logger.warning(f"Unknown RATE_LIMIT_BACKEND '{backend}', using memory")
+    return InMemoryRateLimiter(max_keys=int(os.environ.get("RATE_LIMIT_MAX_KEYS", "10000")))
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """Limit for every request whose path starts with ``path_prefix``"""
+    name: str
+    path_prefix: str
+    limit: int
+    window: int
+    methods: Optional[FrozenSet[str]] = None
+
+    def matches(self, method: str, path: str) -> bool:
+        return path.startswith(self.path_prefix) and (self.methods is None or method in self.methods)
+
+
+def _parse_limit(value: str) -> Tuple[int, int]:
+    """Parse "<limit>/<window seconds>", e.g. "10/60" """
+    limit, window = value.split("/")
+    return int(limit), int(window)
+
+
+def rules_from_env() -> List[RateLimitRule]:
+    """Route group limits, overridable with RATE_LIMIT_<GROUP>="<limit>/<seconds>" """
+    groups = [
+        # (name, path prefix, methods, default)
+        ("login", "/api/auth/login", frozenset({"POST"}), "10/60"),
+        ("refresh", "/api/auth/refresh", frozenset({"POST"}), "30/60"),
+        ("contact", "/api/contact", frozenset({"POST"}), "5/300"),
+        ("public", "/api/public/", None, "600/60"),
+    ]
+    rules = []
+    for name, prefix, methods, default in groups:
+        limit, window = _parse_limit(os.environ.get(f"RATE_LIMIT_{name.upper()}", default))
+        rules.append(RateLimitRule(name, prefix, limit, window, methods))
+    return rules
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying per-route-group limits before any handler runs
+
+    Over-limit requests are answered with 429 without touching the database
+    or password hashing. Every limited response carries X-RateLimit-Limit,
+    X-RateLimit-Remaining and X-RateLimit-Reset (seconds). If the limiter
+    backend itself fails the request is let through.
+    """
+
+    def __init__(self, app, limiter: RateLimiter, rules: List[RateLimitRule]):
+        self.app = app
+        self.limiter = limiter
+        self.rules = rules
+
+    def _rule_for(self, method: str, path: str) -> Optional[RateLimitRule]:
+        for rule in self.rules:
+            if rule.matches(method, path):
+                return rule
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rule = self._rule_for(scope["method"], scope["path"])
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        client_ip = scope["client"][0] if scope.get("client") else "unknown"
+        try:
+            result = await self.limiter.hit(f"{rule.name}:{client_ip}", rule.limit, rule.window)
+        except Exception as e:
+            logger.error(f"Rate limiter unavailable, allowing request: {e}")
+            await self.app(scope, receive, send)
+            return
+
+        headers = [
+            (b"x-ratelimit-limit", str(result.limit).encode()),
+            (b"x-ratelimit-remaining", str(result.remaining).encode()),
+            (b"x-ratelimit-reset", str(math.ceil(result.reset_after)).encode()),
+        ]
+
+        if not result.allowed:
+            logger.warning(f"Rate limit '{rule.name}' exceeded by {client_ip}")
+            body = json.dumps({"detail": "Too many requests. Please try again later."}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": headers + [
+                    (b"retry-after", str(math.ceil(result.reset_after)).encode()),
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
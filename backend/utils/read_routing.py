@@ -0,0 +1,114 @@
+"""Read preference policy for content reads
+
+Public listings tolerate slightly stale data and are the bulk of the read
+traffic, so they go to secondaries (``secondaryPreferred`` bounded by
+``maxStalenessSeconds``) and scale with the number of replica set members.
+Admin reads use their own preference (the primary by default).
+
+After a write to a collection every read of it goes to the primary for
+``primary_window`` seconds, long enough for any secondary within the
+staleness bound to have caught up. That keeps admins reading their own
+writes and stops a lagging secondary from refilling the public cache with
+the content that was just replaced. Writes made through other workers count
+too: ``CacheCoherence`` reports them as it invalidates.
+"""
+
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+from typing import Dict, Union
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Route keys returned by ``ReadRouting.route``
+PRIMARY = "primary"
+PUBLIC = "public"
+ADMIN = "admin"
+
+ReadPreference = Union[Primary, PrimaryPreferred, Secondary, SecondaryPreferred, Nearest]
+
+# Connection-string names of the modes that accept maxStalenessSeconds
+_STALENESS_MODES = {
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def parse_read_preference(name: str, max_staleness: int = -1) -> ReadPreference:
+    """Read preference from its connection-string name, e.g. "secondaryPreferred"
+
+    ``max_staleness`` (seconds, at least 90 per the MongoDB spec) is ignored
+    for "primary", which does not accept it.
+    """
+    if name == "primary":
+        return Primary()
+    if name not in _STALENESS_MODES:
+        raise ValueError(f"Unknown read preference '{name}'")
+    return _STALENESS_MODES[name](max_staleness=max_staleness)
+
+
+class ReadRouting:
+    def __init__(
+        self,
+        public_preference: ReadPreference,
+        admin_preference: ReadPreference = Primary(),
+        primary_window: float = 90.0
+    ):
+        self.preferences: Dict[str, ReadPreference] = {
+            PRIMARY: Primary(),
+            PUBLIC: public_preference,
+            ADMIN: admin_preference,
+        }
+        self.primary_window = primary_window
+        # collection -> monotonic time of the last known write
+        self._writes: Dict[str, float] = {}
+        self._routed: Dict[str, int] = {PRIMARY: 0, PUBLIC: 0, ADMIN: 0}
+        self._lock = threading.Lock()
+
+    def wrote(self, collection: str) -> None:
+        """Pin reads of ``collection`` to the primary for the next window"""
+        with self._lock:
+            self._writes[collection] = time.monotonic()
+
+    def route(self, collection: str, public: bool) -> str:
+        """Route key for a read of ``collection``"""
+        with self._lock:
+            written = self._writes.get(collection)
+            if written is not None and time.monotonic() - written < self.primary_window:
+                route = PRIMARY
+            else:
+                route = PUBLIC if public else ADMIN
+            self._routed[route] += 1
+        return route
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            routed = dict(self._routed)
+        return {
+            "public": self.preferences[PUBLIC].document,
+            "admin": self.preferences[ADMIN].document,
+            "primary_window_seconds": self.primary_window,
+            "reads": routed,
+        }
+
+
+def create_read_routing() -> ReadRouting:
+    """Policy from MONGO_PUBLIC_READ_PREFERENCE, MONGO_ADMIN_READ_PREFERENCE,
+    MONGO_MAX_STALENESS_SECONDS and MONGO_PRIMARY_READ_WINDOW"""
+    max_staleness = int(os.environ.get("MONGO_MAX_STALENESS_SECONDS", "90"))
+    return ReadRouting(
+        public_preference=parse_read_preference(
+            os.environ.get("MONGO_PUBLIC_READ_PREFERENCE", "secondaryPreferred"), max_staleness
+        ),
+        admin_preference=parse_read_preference(
+            os.environ.get("MONGO_ADMIN_READ_PREFERENCE", "primary"), max_staleness
+        ),
+        # A secondary may lag by up to max staleness, so pin reads for as long
+        primary_window=float(os.environ.get(
+            "MONGO_PRIMARY_READ_WINDOW", str(max_staleness if max_staleness > 0 else 90)
+        ))
+    )
@@ -0,0 +1,81 @@
+"""Server-side admin sessions backing rotating refresh tokens
+
+A refresh token is ``<session id>.<secret>``; only a SHA-256 digest of the
+secret is stored. Every refresh replaces the secret, so a token works once.
+Presenting an already rotated token means it leaked: the whole session is
+ended. Sessions expire through a TTL index on ``expires_at``.
+"""
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+import hashlib
+import logging
+import secrets
+import uuid
+
+logger = logging.getLogger(__name__)
+
+SESSIONS_COLLECTION = "admin_sessions"
+
+
+def _digest(secret: str) -> str:
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+def _split(refresh_token: str) -> Optional[Tuple[str, str]]:
+    session_id, _, secret = refresh_token.partition(".")
+    if not session_id or not secret:
+        return None
+    return session_id, secret
+
+
+class SessionStore:
+    def __init__(self, db: AsyncIOMotorDatabase, ttl: timedelta = timedelta(days=7)):
+        self.collection = db[SESSIONS_COLLECTION]
+        self.ttl = ttl
+
+    async def create(self, username: str) -> Tuple[str, str]:
+        """Start a session; returns its id and first refresh token"""
+        session_id = str(uuid.uuid4())
+        secret = secrets.token_urlsafe(32)
+        now = datetime.utcnow()
+        await self.collection.insert_one({
+            "_id": session_id,
+            "username": username,
+            "refresh_hash": _digest(secret),
+            "created_at": now,
+            "rotated_at": now,
+            "expires_at": now + self.ttl
+        })
+        return session_id, f"{session_id}.{secret}"
+
+    async def rotate(self, refresh_token: str) -> Optional[Tuple[str, str, str]]:
+        """Swap a refresh token for a new one
+        
+        Returns (username, session id, new refresh token), or None when the
+        token is unknown, expired or was already used.
+        """
+        parts = _split(refresh_token)
+        if parts is None:
+            return None
+        session_id, secret = parts
+
+        new_secret = secrets.token_urlsafe(32)
+        now = datetime.utcnow()
+        session = await self.collection.find_one_and_update(
+            {"_id": session_id, "refresh_hash": _digest(secret), "expires_at": {"$gt": now}},
+            {"$set": {"refresh_hash": _digest(new_secret), "rotated_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
+        if session is None:
+            result = await self.collection.delete_one({"_id": session_id, "expires_at": {"$gt": now}})
+            if result.deleted_count:
+                logger.warning(f"Reused refresh token for session {session_id}, session ended")
+            return None
+        return session["username"], session_id, f"{session_id}.{new_secret}"
+
+    async def end(self, session_id: str) -> None:
+        """End a session; its refresh token stops working"""
+        await self.collection.delete_one({"_id": session_id})
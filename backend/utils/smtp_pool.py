@@ -0,0 +1,215 @@
+"""Pool of authenticated, reusable SMTP connections
+
+Opening an SMTP session costs a TCP connect, STARTTLS and AUTH. The pool keeps
+sessions open between messages, checks idle ones with NOOP before reuse and
+transparently reconnects when the server has dropped them. It is thread-safe
+because the blocking sends run on executor threads.
+"""
+
+from dataclasses import dataclass
+from email.message import Message
+from typing import Callable, List, Optional
+import logging
+import os
+import smtplib
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Errors after which a connection cannot be trusted any more
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError)
+
+
+def _connection_lost(error: OSError) -> bool:
+    """Whether ``error`` means the session is gone rather than a rejected message
+
+    ``SMTPException`` subclasses ``OSError``, so replies such as a refused
+    recipient would otherwise look like a dropped connection.
+    """
+    if isinstance(error, smtplib.SMTPException):
+        return isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError))
+    return True
+
+
+@dataclass(frozen=True)
+class SMTPSettings:
+    host: str
+    port: int
+    user: Optional[str]
+    password: Optional[str]
+    starttls: bool = True
+    timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "SMTPSettings":
+        return cls(
+            host=os.environ.get('SMTP_HOST', 'smtp.gmail.com'),
+            port=int(os.environ.get('SMTP_PORT', '587')),
+            user=os.environ.get('SMTP_USER'),
+            password=os.environ.get('SMTP_PASSWORD'),
+            starttls=os.environ.get('SMTP_STARTTLS', 'true') == 'true',
+            timeout=float(os.environ.get('SMTP_TIMEOUT', '30'))
+        )
+
+
+@dataclass
+class _PooledConnection:
+    smtp: smtplib.SMTP
+    last_used: float
+    messages_sent: int = 0
+
+
+class SMTPConnectionPool:
+    def __init__(
+        self,
+        settings: SMTPSettings,
+        max_size: int = 4,
+        max_idle: float = 60.0,
+        health_check_after: float = 5.0,
+        max_messages_per_connection: int = 100,
+        connection_factory: Callable[..., smtplib.SMTP] = smtplib.SMTP
+    ):
+        self.settings = settings
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+        self.max_messages_per_connection = max_messages_per_connection
+        self.connection_factory = connection_factory
+        self._idle: List[_PooledConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self.connections_opened = 0
+
+    def _connect(self) -> _PooledConnection:
+        settings = self.settings
+        smtp = self.connection_factory(settings.host, settings.port, timeout=settings.timeout)
+        try:
+            smtp.ehlo()
+            if settings.starttls:
+                smtp.starttls()
+                smtp.ehlo()
+            if settings.user and settings.password:
+                smtp.login(settings.user, settings.password)
+        except Exception:
+            self._close(smtp)
+            raise
+        self.connections_opened += 1
+        return _PooledConnection(smtp=smtp, last_used=time.monotonic())
+
+    @staticmethod
+    def _close(smtp: smtplib.SMTP) -> None:
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+
+    def _is_usable(self, conn: _PooledConnection) -> bool:
+        idle_for = time.monotonic() - conn.last_used
+        if idle_for > self.max_idle or conn.messages_sent >= self.max_messages_per_connection:
+            return False
+        if idle_for < self.health_check_after:
+            return True
+        try:
+            return conn.smtp.noop()[0] == 250
+        except CONNECTION_ERRORS + (smtplib.SMTPException,):
+            return False
+
+    def _checkout(self) -> _PooledConnection:
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._connect()
+            if self._is_usable(conn):
+                return conn
+            self._close(conn.smtp)
+
+    def _checkin(self, conn: _PooledConnection) -> None:
+        conn.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(conn)
+
+    def send(self, message: Message) -> None:
+        """Send one message, reconnecting once if the pooled session was dropped"""
+        self.send_batch([message], raise_errors=True)
+
+    def send_batch(self, messages: List[Message], raise_errors: bool = False) -> List[bool]:
+        """Send several messages over one borrowed connection
+
+        Returns one success flag per message. When the session turns out to
+        be dead it is replaced and the message retried once. If no session
+        can be opened at all (connect, STARTTLS or AUTH fails) the batch
+        stops there rather than logging in again for every message.
+        """
+        results: List[bool] = []
+        with self._slots:
+            conn: Optional[_PooledConnection] = None
+            try:
+                for message in messages:
+                    for attempt in (1, 2):
+                        if conn is None:
+                            try:
+                                conn = self._checkout()
+                            except Exception as e:
+                                if raise_errors:
+                                    raise
+                                unsent = len(messages) - len(results)
+                                logger.error(f"Could not open an SMTP session, {unsent} email(s) not sent: {e}")
+                                return results + [False] * unsent
+                        try:
+                            conn.smtp.send_message(message)
+                            conn.messages_sent += 1
+                            results.append(True)
+                            break
+                        except OSError as e:
+                            if not _connection_lost(e):
+                                # Rejected message; the session itself is still usable
+                                if raise_errors:
+                                    raise
+                                logger.error(f"Failed to send email to {message['To']}: {e}")
+                                results.append(False)
+                                break
+                            self._close(conn.smtp)
+                            conn = None
+                            if attempt == 1:
+                                logger.info(f"SMTP connection lost ({e}), reconnecting")
+                                continue
+                            if raise_errors:
+                                raise
+                            logger.error(f"Failed to send email to {message['To']}: {e}")
+                            results.append(False)
+            finally:
+                if conn is not None:
+                    self._checkin(conn)
+        return results
+
+    def close(self) -> None:
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._close(conn.smtp)
+
+
+_pool: Optional[SMTPConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """Process-wide pool configured from the SMTP_* environment variables"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SMTPConnectionPool(
+                SMTPSettings.from_env(),
+                max_size=int(os.environ.get('SMTP_POOL_SIZE', '4'))
+            )
+        return _pool
+
+
+def close_smtp_pool() -> None:
+    """Close the process-wide pool's idle connections, if it was ever used"""
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
@@ -0,0 +1,88 @@
+"""Pre-rendered JSON snapshots of public content listings"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple, Type
+
+from fastapi import Request, Response
+from pydantic import BaseModel, TypeAdapter, create_model
+
+from utils.http_cache import PUBLIC_CACHE_CONTROL, conditional_response, make_etag
+
+
+@dataclass(frozen=True)
+class ContentSnapshot:
+    """Serialized response body shared by every request for one content version"""
+    body: bytes
+    count: int
+    etag: str
+    last_modified: Optional[datetime] = None
+    media_type: str = "application/json"
+
+    def response(
+        self,
+        request: Optional[Request] = None,
+        cache_control: str = PUBLIC_CACHE_CONTROL
+    ) -> Response:
+        """Wrap the snapshot in a raw response (no validation or re-encoding)"""
+        return conditional_response(
+            request,
+            self.body,
+            etag=self.etag,
+            last_modified=self.last_modified,
+            cache_control=cache_control,
+            media_type=self.media_type
+        )
+
+
+@lru_cache(maxsize=None)
+def _adapter(model: Any) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+@lru_cache(maxsize=256)
+def fieldset_model(model: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """``model`` restricted to ``fields``; the other fields are neither validated nor rendered"""
+    return create_model(
+        f"{model.__name__}Fields",
+        **{name: (model.model_fields[name].annotation, model.model_fields[name]) for name in fields}
+    )
+
+
+def build_snapshot(model: Type[BaseModel], documents: List[Any]) -> ContentSnapshot:
+    """Validate documents against ``model`` once and render them to JSON bytes
+
+    Listings carry no Last-Modified: the newest ``updated_at`` among the
+    listed items does not move when an item is deleted or deactivated, so
+    If-Modified-Since would answer 304 for a changed list. The body ETag
+    covers every change.
+    """
+    adapter = _adapter(List[model])
+    items = adapter.validate_python(documents)
+    body = adapter.dump_json(items)
+    return ContentSnapshot(
+        body=body,
+        count=len(items),
+        etag=make_etag(body)
+    )
+
+
+def build_document_snapshot(
+    model: Type[BaseModel],
+    document: Any,
+    etag: Optional[str] = None
+) -> ContentSnapshot:
+    """Render a single document the same way as ``build_snapshot``
+
+    ``etag`` replaces the body digest, e.g. with the document's version.
+    """
+    adapter = _adapter(model)
+    item = adapter.validate_python(document)
+    body = adapter.dump_json(item)
+    return ContentSnapshot(
+        body=body,
+        count=1,
+        etag=etag or make_etag(body),
+        last_modified=getattr(item, "updated_at", None)
+    )
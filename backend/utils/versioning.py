@@ -0,0 +1,82 @@
+"""Optimistic concurrency for CMS documents
+
+Every write increments a document's ``version`` field (documents written
+before versioning have none, which counts as version 0). Single-document
+responses carry the version as their ETag, and an update sent with
+``If-Match`` only applies if the document still has that version.
+"""
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
+from typing import Any, Dict, List, Optional
+
+# Fields never returned to API clients
+RESPONSE_PROJECTION = {"_id": False}
+
+
+class VersionConflict(Exception):
+    """The document changed since the version named in If-Match"""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Current version is {current_version}")
+        self.current_version = current_version
+
+
+def version_etag(version: int) -> str:
+    return f'"v{version}"'
+
+
+def parse_if_match(header: Optional[str]) -> Optional[List[int]]:
+    """Versions accepted by an If-Match header; None when any version will do
+
+    If-Match uses strong comparison (RFC 9110), so weak tags such as
+    ``W/"v1"`` never match, and neither do tags that are not version ETags.
+    Raises ValueError when no tag in the header can match.
+    """
+    if header is None or header.strip() == "*":
+        return None
+    versions = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith('"v') and tag.endswith('"') and tag[2:-1].isdigit():
+            versions.append(int(tag[2:-1]))
+    if not versions:
+        raise ValueError(f"No version ETag in If-Match: {header}")
+    return versions
+
+
+def version_filter(versions: List[int]) -> Dict[str, Any]:
+    query: Dict[str, Any] = {"version": {"$in": versions}}
+    if 0 in versions:
+        query = {"$or": [query, {"version": {"$exists": False}}]}
+    return query
+
+
+async def atomic_update(
+    collection: AsyncIOMotorCollection,
+    item_id: str,
+    changes: Dict[str, Any],
+    expected_versions: Optional[List[int]] = None,
+    projection: Dict[str, Any] = RESPONSE_PROJECTION
+) -> Optional[Dict[str, Any]]:
+    """Apply ``changes`` and return the updated document in one round trip
+
+    Returns None if there is no such document. Raises VersionConflict if it
+    exists but its version is not one of ``expected_versions``.
+    """
+    query: Dict[str, Any] = {"id": item_id}
+    if expected_versions is not None:
+        query.update(version_filter(expected_versions))
+
+    document = await collection.find_one_and_update(
+        query,
+        {"$set": changes, "$inc": {"version": 1}},
+        projection=projection,
+        return_document=ReturnDocument.AFTER
+    )
+    if document is None and expected_versions is not None:
+        # Only failed conditional updates pay for telling 404 and 412 apart
+        current = await collection.find_one({"id": item_id}, projection={"version": True})
+        if current is not None:
+            raise VersionConflict(current.get("version", 0))
+    return document
@@ -0,0 +1,174 @@
+"""Write-behind batching for bursty, independent writes
+
+During campaign bursts every contact submission used to cost its own
+``insert_one`` (and later its own ``email_sent`` ``update_one``). A batcher
+queues writes that arrive within ``max_delay`` seconds of each other (or
+until ``max_batch`` are waiting) and sends them as one unordered
+``insert_many`` / ``bulk_write``. Each caller still awaits its own write and
+sees its own error, so the request is only answered once the batch is
+acknowledged with the configured write concern.
+
+With ``enabled=False`` every write goes straight to the collection, which is
+the default.
+"""
+
+from abc import ABC, abstractmethod
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, WriteError
+from pymongo.write_concern import WriteConcern
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def parse_write_concern(w: str, journal: str = "") -> Optional[WriteConcern]:
+    """WriteConcern from "majority", a node count such as "1" or "0"
+    (unacknowledged); None when both are empty (the client default)"""
+    if not w and not journal:
+        return None
+    return WriteConcern(
+        w=(int(w) if w.isdigit() else w) if w else None,
+        j=(journal == "true") if journal else None
+    )
+
+
+class WriteBatcher(ABC):
+    """Coalesces writes to one collection; subclasses define the batch write"""
+
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        max_batch: int = 100,
+        max_delay: float = 0.005,
+        write_concern: Optional[WriteConcern] = None,
+        enabled: bool = True
+    ):
+        if write_concern is not None:
+            collection = collection.with_options(write_concern=write_concern)
+        self.collection = collection
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.enabled = enabled
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._flushes: "set[asyncio.Task]" = set()
+        self._counters = {"batches": 0, "writes": 0, "failed": 0}
+
+    @abstractmethod
+    async def _write_one(self, item: Any) -> None:
+        """Write a single item straight away (batching disabled)"""
+
+    @abstractmethod
+    async def _write_many(self, items: List[Any]) -> None:
+        """Write a batch unordered; raises BulkWriteError for partial failures"""
+
+    async def _submit(self, item: Any) -> None:
+        if not self.enabled:
+            await self._write_one(item)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+        await future
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.max_delay)
+        self._timer = None
+        self._start_flush()
+
+    def _start_flush(self) -> None:
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        failures: Dict[int, BaseException] = {}
+        try:
+            await self._write_many([item for item, _ in batch])
+        except BulkWriteError as e:
+            # Unordered: only the listed writes failed, the rest were applied
+            for error in e.details.get("writeErrors", []):
+                failures[error["index"]] = WriteError(error.get("errmsg"), error.get("code"), error)
+        except Exception as e:
+            failures = {index: e for index in range(len(batch))}
+
+        self._counters["batches"] += 1
+        self._counters["writes"] += len(batch)
+        self._counters["failed"] += len(failures)
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                # The caller was cancelled (e.g. client disconnected)
+                continue
+            if index in failures:
+                future.set_exception(failures[index])
+            else:
+                future.set_result(None)
+
+    async def close(self) -> None:
+        """Write whatever is still queued and wait for batches in flight"""
+        self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        batches = self._counters["batches"]
+        return {
+            "enabled": self.enabled,
+            "pending": len(self._pending),
+            "mean_batch_size": round(self._counters["writes"] / batches, 2) if batches else None,
+            **self._counters
+        }
+
+
+class InsertBatcher(WriteBatcher):
+    """Batches documents into ``insert_many(ordered=False)``"""
+
+    async def insert(self, document: Dict[str, Any]) -> None:
+        await self._submit(document)
+
+    async def _write_one(self, document: Dict[str, Any]) -> None:
+        await self.collection.insert_one(document)
+
+    async def _write_many(self, documents: List[Dict[str, Any]]) -> None:
+        await self.collection.insert_many(documents, ordered=False)
+
+
+class UpdateBatcher(WriteBatcher):
+    """Batches single-document updates into ``bulk_write(ordered=False)``"""
+
+    async def update_one(self, filter_query: Dict[str, Any], update: Dict[str, Any]) -> None:
+        await self._submit((filter_query, update))
+
+    async def _write_one(self, item: Tuple[Dict[str, Any], Dict[str, Any]]) -> None:
+        await self.collection.update_one(*item)
+
+    async def _write_many(self, items: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> None:
+        await self.collection.bulk_write([UpdateOne(*item) for item in items], ordered=False)
+
+
+def batcher_settings_from_env(prefix: str) -> Dict[str, Any]:
+    """Keyword arguments for a batcher from <prefix>_WRITE_BATCHING,
+    <prefix>_BATCH_MAX_SIZE, <prefix>_BATCH_MAX_DELAY_MS,
+    <prefix>_WRITE_CONCERN and <prefix>_WRITE_JOURNAL"""
+    return {
+        "enabled": os.environ.get(f"{prefix}_WRITE_BATCHING", "false") == "true",
+        "max_batch": int(os.environ.get(f"{prefix}_BATCH_MAX_SIZE", "100")),
+        "max_delay": float(os.environ.get(f"{prefix}_BATCH_MAX_DELAY_MS", "5")) / 1000,
+        "write_concern": parse_write_concern(
+            os.environ.get(f"{prefix}_WRITE_CONCERN", ""),
+            os.environ.get(f"{prefix}_WRITE_JOURNAL", "")
+        ),
+    }
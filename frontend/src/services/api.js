@@ -12,12 +12,47 @@ const api = axios.create({
   },
 });
 
+const storeTokens = (tokens) => {
+  localStorage.setItem('auth_token', tokens.access_token);
+  if (tokens.refresh_token) {
+    localStorage.setItem('refresh_token', tokens.refresh_token);
+  }
+  api.defaults.headers.common['Authorization'] = `Bearer ${tokens.access_token}`;
+};
+
+const clearTokens = () => {
+  localStorage.removeItem('auth_token');
+  localStorage.removeItem('refresh_token');
+  delete api.defaults.headers.common['Authorization'];
+};
+
+// Refresh tokens are single use, so concurrent 401s share one refresh
+let refreshPromise = null;
+const refreshAccessToken = () => {
+  if (!refreshPromise) {
+    const refreshToken = localStorage.getItem('refresh_token');
+    refreshPromise = (refreshToken
+      ? api.post('/auth/refresh', { refresh_token: refreshToken })
+          .then((response) => {
+            storeTokens(response.data);
+            return response.data.access_token;
+          })
+      : Promise.reject(new Error('No refresh token'))
+    ).finally(() => {
+      refreshPromise = null;
+    });
+  }
+  return refreshPromise;
+};
+
 // API Services
 export const apiService = {
   // Public APIs
-  async getServices() {
+  // fields: optional subset such as 'card' or 'title,icon' (id is always included)
+  async getServices(fields = null) {
     try {
-      const response = await api.get('/public/services');
+      const params = fields ? { fields } : {};
+      const response = await api.get('/public/services', { params });
       return response.data;
     } catch (error) {
       console.error('Failed to fetch services:', error);
@@ -25,9 +60,11 @@ export const apiService = {
     }
   },
 
-  async getCaseStudies(featuredOnly = false) {
+  async getCaseStudies(featuredOnly = false, fields = null) {
     try {
-      const params = featuredOnly ? { featured_only: true } : {};
+      const params = {};
+      if (featuredOnly) params.featured_only = true;
+      if (fields) params.fields = fields;
       const response = await api.get('/public/case-studies', { params });
       return response.data;
     } catch (error) {
@@ -52,6 +89,20 @@ export const apiService = {
     }
   },
 
+  // All homepage content in one request; include limits the sections returned
+  async getBundle(include = null, featuredOnly = false) {
+    try {
+      const params = {};
+      if (include) params.include = include.join(',');
+      if (featuredOnly) params.featured_only = true;
+      const response = await api.get('/public/bundle', { params });
+      return response.data;
+    } catch (error) {
+      console.error('Failed to fetch content bundle:', error);
+      throw error;
+    }
+  },
+
   // Contact API
   async submitContact(contactData) {
     try {
@@ -76,10 +127,9 @@ export const apiService = {
         },
       });
       
-      // Store token
+      // Store tokens
       if (response.data.access_token) {
-        localStorage.setItem('auth_token', response.data.access_token);
-        api.defaults.headers.common['Authorization'] = `Bearer ${response.data.access_token}`;
+        storeTokens(response.data);
       }
       
       return response.data;
@@ -95,9 +145,8 @@ export const apiService = {
     } catch (error) {
       console.error('Logout failed:', error);
     } finally {
-      // Clear token regardless of API response
-      localStorage.removeItem('auth_token');
-      delete api.defaults.headers.common['Authorization'];
+      // Clear tokens regardless of API response
+      clearTokens();
     }
   },
 
@@ -152,6 +201,17 @@ export const apiService = {
     }
   },
 
+  // operations: [{ op: 'create' | 'update' | 'delete' | 'reorder', id, data, order }]
+  async bulkUpdateServices(operations, atomic = false) {
+    try {
+      const response = await api.post('/cms/services/bulk', { operations, atomic });
+      return response.data;
+    } catch (error) {
+      console.error('Failed to apply bulk service changes:', error);
+      throw error;
+    }
+  },
+
   // CMS Case Studies Management
   async getAdminCaseStudies() {
     try {
@@ -193,12 +253,23 @@ export const apiService = {
     }
   },
 
+  // operations: [{ op: 'create' | 'update' | 'delete' | 'reorder', id, data, order }]
+  async bulkUpdateCaseStudies(operations, atomic = false) {
+    try {
+      const response = await api.post('/cms/case-studies/bulk', { operations, atomic });
+      return response.data;
+    } catch (error) {
+      console.error('Failed to apply bulk case study changes:', error);
+      throw error;
+    }
+  },
+
   // Contact submissions (admin)
-  async getContactSubmissions(skip = 0, limit = 50) {
+  // Pass the previous page's next_cursor to fetch the following page
+  async getContactSubmissions(skip = 0, limit = 50, cursor = null) {
     try {
-      const response = await api.get('/contact/submissions', {
-        params: { skip, limit }
-      });
+      const params = cursor ? { cursor, limit } : { skip, limit };
+      const response = await api.get('/contact/submissions', { params });
       return response.data;
     } catch (error) {
       console.error('Failed to fetch contact submissions:', error);
@@ -207,9 +278,10 @@ export const apiService = {
   },
 
   // Concepts Management
-  async getConcepts() {
+  async getConcepts(fields = null) {
     try {
-      const response = await api.get('/public/concepts');
+      const params = fields ? { fields } : {};
+      const response = await api.get('/public/concepts', { params });
       return response.data;
     } catch (error) {
       console.error('Failed to fetch concepts:', error);
@@ -255,6 +327,17 @@ export const apiService = {
       console.error('Failed to delete concept:', error);
       throw error;
     }
+  },
+
+  // operations: [{ op: 'create' | 'update' | 'delete' | 'reorder', id, data, order }]
+  async bulkUpdateConcepts(operations, atomic = false) {
+    try {
+      const response = await api.post('/cms/concepts/bulk', { operations, atomic });
+      return response.data;
+    } catch (error) {
+      console.error('Failed to apply bulk concept changes:', error);
+      throw error;
+    }
   }
 };
 
@@ -267,11 +350,23 @@ if (token) {
 // Add response interceptor to handle token expiration
 api.interceptors.response.use(
   (response) => response,
-  (error) => {
+  async (error) => {
+    const original = error.config;
+    const isAuthCall = original?.url?.startsWith('/auth/login') || original?.url?.startsWith('/auth/refresh');
+    if (error.response?.status === 401 && original && !original._retried && !isAuthCall) {
+      // Access token expired: get a new one and retry once
+      try {
+        const accessToken = await refreshAccessToken();
+        original._retried = true;
+        original.headers['Authorization'] = `Bearer ${accessToken}`;
+        return api(original);
+      } catch (refreshError) {
+        // Fall through to the logged-out handling below
+      }
+    }
     if (error.response?.status === 401) {
       // Token expired or invalid
-      localStorage.removeItem('auth_token');
-      delete api.defaults.headers.common['Authorization'];
+      clearTokens();
       
       // Redirect to login if on admin page
       if (window.location.pathname.startsWith('/admin')) {
@@ -0,0 +1,36 @@
+"""Shared fixtures: the backend on sys.path and an in-memory MongoDB stand-in"""
+
+from pathlib import Path
+import sys
+
+import mongomock
+import pytest
+from pymongo import ReturnDocument
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+_find_one_and_update = mongomock.collection.Collection.find_one_and_update
+
+
+def _find_one_and_update_after(self, filter, update, projection=None, sort=None,
+                               return_document=ReturnDocument.BEFORE, **kwargs):
+    # mongomock re-applies the filter after the update, so a conditional
+    # claim such as {"status": "pending"} -> "processing" returns None with
+    # ReturnDocument.AFTER; resolve the document first like MongoDB does
+    if return_document != ReturnDocument.AFTER:
+        return _find_one_and_update(self, filter, update, projection=projection, sort=sort,
+                                    return_document=return_document, **kwargs)
+    document = self.find_one(filter, sort=sort)
+    if document is None:
+        return _find_one_and_update(self, filter, update, projection=projection, sort=sort,
+                                    return_document=return_document, **kwargs)
+    self.update_one({"_id": document["_id"]}, update)
+    return self.find_one({"_id": document["_id"]}, projection)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    from mongomock_motor import AsyncMongoMockClient
+
+    monkeypatch.setattr(mongomock.collection.Collection, "find_one_and_update", _find_one_and_update_after)
+    return AsyncMongoMockClient()["alaama_test"]
@@ -0,0 +1,60 @@
+import asyncio
+
+from models.cms import BulkOperation, CaseStudy, CaseStudyCreate, CaseStudyUpdate
+from utils.bulk import ContentModels, apply_bulk
+
+MODELS = ContentModels(CaseStudyCreate, CaseStudyUpdate, CaseStudy)
+
+
+class ConcurrentEditDb:
+    """Database whose ``id`` document is edited by someone else right before the first write"""
+
+    def __init__(self, db, item_id):
+        self._db = db
+        self.item_id = item_id
+
+    def __getitem__(self, name):
+        collection = self._db[name]
+        bulk_write = collection.bulk_write
+        item_id = self.item_id
+
+        async def edited_bulk_write(requests, **kwargs):
+            await collection.update_one({"id": item_id}, {"$inc": {"version": 1}})
+            return await bulk_write(requests, **kwargs)
+
+        collection.bulk_write = edited_bulk_write
+        return collection
+
+
+def test_versioned_update_that_loses_a_race_is_a_conflict(db):
+    async def scenario():
+        await db.case_studies.insert_many([
+            {"id": "a", "title": "A", "order": 1, "version": 3},
+            {"id": "b", "title": "B", "order": 2, "version": 0},
+        ])
+        operations = [
+            BulkOperation(op="reorder", id="a", order=5, version=3),
+            BulkOperation(op="reorder", id="b", order=6),
+        ]
+        results = await apply_bulk(ConcurrentEditDb(db, "a"), "case_studies", MODELS, operations)
+
+        assert [result["status"] for result in results] == ["conflict", "ok"]
+        assert (await db.case_studies.find_one({"id": "a"}))["order"] == 1
+        assert (await db.case_studies.find_one({"id": "b"}))["order"] == 6
+
+    asyncio.run(scenario())
+
+
+def test_stale_version_is_rejected_before_writing(db):
+    async def scenario():
+        await db.case_studies.insert_one({"id": "a", "title": "A", "order": 1, "version": 2})
+        operations = [
+            BulkOperation(op="update", id="a", data={"title": "New"}, version=1),
+            BulkOperation(op="delete", id="missing"),
+        ]
+        results = await apply_bulk(db, "case_studies", MODELS, operations)
+
+        assert [result["status"] for result in results] == ["conflict", "not_found"]
+        assert (await db.case_studies.find_one({"id": "a"}))["title"] == "A"
+
+    asyncio.run(scenario())
@@ -0,0 +1,136 @@
+import asyncio
+
+from pymongo.errors import AutoReconnect, OperationFailure
+
+from utils.cache import ContentCache
+from utils.coherence import CacheCoherence, bump_revision
+
+
+class FakeStream:
+    """Change stream that yields ``changes`` and then raises ``error``"""
+
+    def __init__(self, changes, error):
+        self.changes = list(changes)
+        self.error = error
+        self.alive = True
+        self.resume_token = {"_data": "token"}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def try_next(self):
+        if self.changes:
+            return self.changes.pop(0)
+        raise self.error
+
+
+class WatchableDb:
+    """Wraps a mongomock database; ``watch`` serves the given streams in turn"""
+
+    def __init__(self, db, streams):
+        self._db = db
+        self.streams = list(streams)
+        self.watch_calls = 0
+
+    def __getitem__(self, name):
+        return self._db[name]
+
+    def watch(self, pipeline, resume_after=None):
+        self.watch_calls += 1
+        return self.streams.pop(0) if self.streams else FakeStream([], OperationFailure("not authorized"))
+
+
+async def wait_for_mode(coherence, mode, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while coherence.mode != mode:
+        assert asyncio.get_running_loop().time() < deadline, f"mode stayed {coherence.mode}"
+        await asyncio.sleep(0.005)
+
+
+def test_change_stream_invalidates_changed_collection(db):
+    async def scenario():
+        change = {"operationType": "update", "ns": {"coll": "services"}}
+        watchable = WatchableDb(db, [FakeStream([None, change], asyncio.CancelledError())])
+        cache = ContentCache()
+        coherence = CacheCoherence(watchable, cache, retry_delay=0.001)
+        await coherence.start()
+        try:
+            await wait_for_mode(coherence, "change_stream")
+            await asyncio.sleep(0.01)
+        finally:
+            await coherence.stop()
+        assert cache.version("services") == 1
+        assert cache.version("concepts") == 0
+
+    asyncio.run(scenario())
+
+
+def test_repeated_stream_failures_back_off_and_fall_back_to_polling(db):
+    async def scenario():
+        # Opens once, then every attempt fails (e.g. missing privileges)
+        watchable = WatchableDb(db, [FakeStream([None], OperationFailure("oplog rolled over"))])
+        coherence = CacheCoherence(
+            watchable, ContentCache(), poll_interval=0.01, retry_delay=0.001, max_stream_failures=3
+        )
+        await coherence.start()
+        try:
+            await wait_for_mode(coherence, "polling")
+            calls = watchable.watch_calls
+            await asyncio.sleep(0.05)
+        finally:
+            await coherence.stop()
+        assert calls == 3
+        assert watchable.watch_calls == calls
+
+    asyncio.run(scenario())
+
+
+def test_polling_when_change_streams_are_unsupported(db):
+    async def scenario():
+        watchable = WatchableDb(db, [FakeStream([], OperationFailure("not a replica set"))])
+        cache = ContentCache()
+        coherence = CacheCoherence(watchable, cache, poll_interval=0.01)
+        await coherence.start()
+        try:
+            await wait_for_mode(coherence, "polling")
+            await asyncio.sleep(0.02)
+            # Entering polling drops whatever was cached before the baseline
+            assert cache.version("services") == 1
+            await bump_revision(db, "case_studies")
+            await asyncio.sleep(0.05)
+        finally:
+            await coherence.stop()
+        assert watchable.watch_calls == 1
+        assert cache.version("case_studies") == 2
+        assert cache.version("services") == 1
+
+    asyncio.run(scenario())
+
+
+def test_resume_failure_after_a_disconnect_restarts_the_stream(db):
+    async def scenario():
+        change = {"operationType": "update", "ns": {"coll": "concepts"}}
+        watchable = WatchableDb(db, [
+            FakeStream([None], AutoReconnect("connection reset")),
+            # The resume point fell off the oplog while disconnected
+            FakeStream([], OperationFailure("resume point lost", code=286)),
+            FakeStream([None, change], asyncio.CancelledError()),
+        ])
+        cache = ContentCache()
+        coherence = CacheCoherence(watchable, cache, poll_interval=0.01, retry_delay=0.001)
+        await coherence.start()
+        try:
+            await wait_for_mode(coherence, "change_stream")
+            await asyncio.sleep(0.05)
+            mode = coherence.mode
+        finally:
+            await coherence.stop()
+        assert mode == "change_stream"
+        assert watchable.watch_calls == 3
+        # Disconnect, resume failure, reopened stream and the change itself
+        assert cache.version("concepts") == 4
+
+    asyncio.run(scenario())
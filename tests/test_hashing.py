@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import time
+
+from utils import hashing
+from utils.hashing import PasswordHasher, build_context
+
+ROUNDS = 1000
+
+
+def test_hash_and_verify_run_on_the_executor(monkeypatch):
+    threads = set()
+    real_hash = hashing._hash
+
+    def recording_hash(password, rounds):
+        threads.add(threading.current_thread().name)
+        return real_hash(password, rounds)
+
+    async def scenario():
+        hasher = PasswordHasher(rounds=ROUNDS)
+        try:
+            hashed = await hasher.hash("s3cret")
+            assert await hasher.verify("s3cret", hashed)
+            assert not await hasher.verify("wrong", hashed)
+            assert not await hasher.verify("s3cret", "")
+        finally:
+            hasher.shutdown()
+        assert hasher.stats()["hashed"] == 1
+        assert hasher.stats()["verified"] == 3
+
+    monkeypatch.setattr(hashing, "_hash", recording_hash)
+    asyncio.run(scenario())
+    assert threads and all(name.startswith("pwhash") for name in threads)
+
+
+def test_concurrency_is_bounded_and_waits_are_reported(monkeypatch):
+    lock = threading.Lock()
+    running = [0, 0]  # [now, peak]
+
+    def slow_hash(password, rounds):
+        with lock:
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return "hashed"
+
+    monkeypatch.setattr(hashing, "_hash", slow_hash)
+
+    async def scenario():
+        hasher = PasswordHasher(rounds=ROUNDS, max_concurrency=2)
+        try:
+            await asyncio.gather(*(hasher.hash(f"pw{n}") for n in range(6)))
+        finally:
+            hasher.shutdown()
+        return hasher.stats()
+
+    stats = asyncio.run(scenario())
+    assert running[1] == 2
+    assert stats["hashed"] == 6
+    assert stats["waiting"] == 0
+    # The last pair waited for two rounds of 50ms
+    assert stats["queue_seconds"]["max"] >= 0.08
+
+
+def test_hash_with_other_rounds_is_upgraded():
+    old_hash = build_context(ROUNDS + 1).hash("s3cret")
+
+    async def scenario():
+        hasher = PasswordHasher(rounds=ROUNDS)
+        try:
+            valid, new_hash = await hasher.verify_and_update("s3cret", old_hash)
+            assert valid and new_hash is not None
+            assert await hasher.verify_and_update("s3cret", new_hash) == (True, None)
+        finally:
+            hasher.shutdown()
+        assert hasher.stats()["rehashed"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_is_not_left_counted(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(hashing, "_hash", lambda password, rounds: release.wait(1) and "hashed")
+
+    async def scenario():
+        hasher = PasswordHasher(rounds=ROUNDS, max_concurrency=1)
+        try:
+            running = asyncio.create_task(hasher.hash("first"))
+            queued = asyncio.create_task(hasher.hash("second"))
+            await asyncio.sleep(0.01)
+            assert hasher.stats()["waiting"] == 1
+            queued.cancel()
+            await asyncio.gather(queued, return_exceptions=True)
+            assert hasher.stats()["waiting"] == 0
+            release.set()
+            assert await running == "hashed"
+        finally:
+            hasher.shutdown()
+
+    asyncio.run(scenario())
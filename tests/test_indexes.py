@@ -0,0 +1,43 @@
+import asyncio
+
+from utils.indexes import INDEXES, IndexSpec, ensure_indexes
+from pymongo import ASCENDING
+
+
+def test_legacy_documents_without_id_do_not_block_indexes(db):
+    async def scenario():
+        # Two documents from before ids existed
+        await db.services.insert_many([{"title": "Old one", "order": 1}, {"title": "Old two", "order": 2}])
+        await ensure_indexes(db)
+        return set((await db.services.index_information()).keys())
+
+    # MongoDB skips them under the partial unique index; mongomock ignores
+    # partialFilterExpression and rejects it, which must not cost the
+    # collection its listing index
+    assert "services_active_order" in asyncio.run(scenario())
+
+
+def test_one_failing_index_does_not_stop_the_rest(db):
+    specs = [
+        IndexSpec("admin_users", "admin_users_username", (("username", ASCENDING),), unique=True),
+        IndexSpec("admin_users", "admin_users_email", (("email", ASCENDING),), unique=True),
+    ]
+
+    async def scenario():
+        await db.admin_users.insert_many([
+            {"username": "same", "email": "a@example.com"},
+            {"username": "same", "email": "b@example.com"},
+        ])
+        created = await ensure_indexes(db, specs=specs)
+        return created, set((await db.admin_users.index_information()).keys())
+
+    created, names = asyncio.run(scenario())
+    assert created["admin_users"] == ["admin_users_email"]
+    assert "admin_users_email" in names
+    assert "admin_users_username" not in names
+
+
+def test_unique_content_ids_skip_documents_without_one():
+    for spec in INDEXES:
+        if spec.collection in ("services", "case_studies", "concepts") and spec.unique:
+            assert spec.model().document["partialFilterExpression"] == {"id": {"$exists": True}}
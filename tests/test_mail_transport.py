@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+from email.message import EmailMessage
+
+from utils import email as email_senders
+from utils.mail_transport import AsyncMailTransport
+
+
+def message(to):
+    msg = EmailMessage()
+    msg["To"] = to
+    return msg
+
+
+def fake_sender(monkeypatch, delays):
+    """Patches the blocking sender; returns the recipients actually handed to the server"""
+    sent = []
+    lock = threading.Lock()
+
+    def send_message(msg):
+        time.sleep(delays.get(msg["To"], 0.0))
+        with lock:
+            sent.append(msg["To"])
+        return True
+
+    monkeypatch.setattr(email_senders, "send_message", send_message)
+    return sent
+
+
+def test_timeout_applies_per_message(monkeypatch):
+    recipients = [f"c{n}@example.com" for n in range(5)]
+    sent = fake_sender(monkeypatch, {to: 0.05 for to in recipients})
+
+    async def scenario():
+        transport = AsyncMailTransport(max_concurrency=1, timeout=0.12)
+        try:
+            return await transport.send_messages([message(to) for to in recipients])
+        finally:
+            transport.shutdown()
+
+    # 0.25s in total, but every message is well within its own timeout
+    assert asyncio.run(scenario()) == [True] * 5
+    assert sent == recipients
+
+
+def test_only_the_slow_message_is_reported_failed(monkeypatch):
+    sent = fake_sender(monkeypatch, {"slow@example.com": 0.3})
+
+    async def scenario():
+        transport = AsyncMailTransport(max_concurrency=2, timeout=0.1)
+        try:
+            return await transport.send_messages(
+                [message("a@example.com"), message("slow@example.com"), message("b@example.com")]
+            )
+        finally:
+            transport.shutdown()
+
+    assert asyncio.run(scenario()) == [True, False, True]
+
+
+def test_messages_queued_behind_a_stuck_send_are_not_sent(monkeypatch):
+    sent = fake_sender(monkeypatch, {"stuck@example.com": 0.3})
+
+    async def scenario():
+        transport = AsyncMailTransport(max_concurrency=1, timeout=0.1)
+        try:
+            results = await transport.send_messages(
+                [message("stuck@example.com"), message("queued@example.com")]
+            )
+            # Let the stuck send finish in the background
+            await asyncio.sleep(0.4)
+            return results
+        finally:
+            transport.shutdown()
+
+    assert asyncio.run(scenario()) == [False, False]
+    # The queued message never reached the server, so retrying it cannot duplicate it
+    assert sent == ["stuck@example.com"]
@@ -0,0 +1,29 @@
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from utils.metrics import require_metrics_token
+
+
+def make_client(token):
+    app = FastAPI()
+
+    @app.get("/metrics", dependencies=[Depends(require_metrics_token(token))])
+    async def metrics():
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_metrics_need_the_configured_token():
+    client = make_client("s3cret")
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+
+def test_metrics_are_hidden_without_a_token():
+    client = make_client(None)
+
+    assert client.get("/metrics").status_code == 404
+    assert client.get("/metrics", headers={"Authorization": "Bearer "}).status_code == 404
@@ -0,0 +1,203 @@
+import asyncio
+
+from pymongo.errors import AutoReconnect
+
+from utils.outbox import EmailOutbox, contact_email_handlers
+from utils.write_behind import UpdateBatcher
+
+
+async def wait_for_status(outbox, job_id, status, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        job = await outbox.collection.find_one({"id": job_id})
+        if job["status"] == status:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} never reached {status}: {job}")
+
+
+def make_outbox(db, handler, **kwargs):
+    settings = {"concurrency": 2, "base_delay": 0.0, "poll_interval": 0.02}
+    settings.update(kwargs)
+    return EmailOutbox(db, {"test": handler}, **settings)
+
+
+def test_failed_job_is_retried_until_sent(db):
+    calls = []
+
+    async def handler(payloads):
+        calls.append(payloads)
+        return [len(calls) > 1] * len(payloads)
+
+    async def scenario():
+        outbox = make_outbox(db, handler)
+        await outbox.start()
+        try:
+            job_id = await outbox.enqueue("test", {"n": 1})
+            job = await wait_for_status(outbox, job_id, "sent")
+        finally:
+            await outbox.stop()
+        assert job["attempts"] == 2
+        assert (await outbox.stats())["retried"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_job_is_dead_lettered_after_max_attempts(db):
+    async def handler(payloads):
+        raise RuntimeError("smtp down")
+
+    async def scenario():
+        outbox = make_outbox(db, handler, max_attempts=3)
+        await outbox.start()
+        try:
+            job_id = await outbox.enqueue("test", {})
+            job = await wait_for_status(outbox, job_id, "dead")
+        finally:
+            await outbox.stop()
+        assert job["attempts"] == 3
+        assert job["last_error"] == "smtp down"
+
+    asyncio.run(scenario())
+
+
+def test_workers_survive_database_errors_while_recording_results(db):
+    async def handler(payloads):
+        return [True] * len(payloads)
+
+    async def scenario():
+        outbox = make_outbox(db, handler, lock_timeout=0.1)
+        bulk_write = outbox.collection.bulk_write
+        failures = [AutoReconnect("connection reset")] * 2
+
+        async def flaky_bulk_write(*args, **kwargs):
+            if failures:
+                raise failures.pop()
+            return await bulk_write(*args, **kwargs)
+
+        outbox.collection.bulk_write = flaky_bulk_write
+        await outbox.start()
+        try:
+            first = await outbox.enqueue("test", {"n": 1})
+            second = await outbox.enqueue("test", {"n": 2})
+            await asyncio.sleep(0.05)
+            later = await outbox.enqueue("test", {"n": 3})
+            # The jobs whose result could not be recorded stay leased and are reclaimed
+            for job_id in (first, second, later):
+                await wait_for_status(outbox, job_id, "sent")
+            assert all(not worker.done() for worker in outbox._workers)
+        finally:
+            await outbox.stop()
+
+    asyncio.run(scenario())
+
+
+def test_dead_worker_is_restarted(db):
+    async def handler(payloads):
+        return [True] * len(payloads)
+
+    async def scenario():
+        outbox = make_outbox(db, handler, concurrency=1)
+        worker = outbox._worker
+        crashes = [RuntimeError("boom")]
+
+        async def crashing_worker(n):
+            if crashes:
+                raise crashes.pop()
+            await worker(n)
+
+        outbox._worker = crashing_worker
+        await outbox.start()
+        try:
+            await asyncio.sleep(0.01)
+            job_id = await outbox.enqueue("test", {})
+            await wait_for_status(outbox, job_id, "sent")
+            assert len(outbox._workers) == 1
+        finally:
+            await outbox.stop()
+
+    asyncio.run(scenario())
+
+
+def test_burst_is_handed_to_the_handler_as_one_batch(db):
+    batches = []
+
+    async def handler(payloads):
+        batches.append([payload["n"] for payload in payloads])
+        return [payload["n"] != 2 for payload in payloads]
+
+    async def scenario():
+        outbox = make_outbox(db, handler, concurrency=1, batch_size=10, base_delay=60.0)
+        job_ids = await outbox.enqueue_many([("test", {"n": n}) for n in range(5)])
+        await outbox.start()
+        try:
+            for n, job_id in enumerate(job_ids):
+                await wait_for_status(outbox, job_id, "pending" if n == 2 else "sent")
+        finally:
+            await outbox.stop()
+        assert sorted(batches[0]) == [0, 1, 2, 3, 4]
+
+    asyncio.run(scenario())
+
+
+class FakeTransport:
+    def __init__(self):
+        self.batches = []
+
+    async def send_messages(self, messages, kind="message"):
+        self.batches.append([message["To"] for message in messages])
+        return [True] * len(messages)
+
+
+def test_contact_notifications_share_one_send_and_mark_submissions(db, monkeypatch):
+    monkeypatch.setenv("SMTP_USER", "studio@example.com")
+    monkeypatch.setenv("SMTP_PASSWORD", "secret")
+
+    async def scenario():
+        await db.contact_submissions.insert_many([{"id": f"c{n}", "email_sent": False} for n in range(3)])
+        transport = FakeTransport()
+        handlers = contact_email_handlers(db, transport)
+        payloads = [
+            {"submission_id": f"c{n}", "name": "Name", "email": f"c{n}@example.com",
+             "company": None, "message": "Hello there, world"}
+            for n in range(3)
+        ]
+
+        assert await handlers["welcome_email"](payloads) == [True] * 3
+        assert await handlers["contact_notification"](payloads) == [True] * 3
+        assert transport.batches[0] == ["c0@example.com", "c1@example.com", "c2@example.com"]
+        assert len(transport.batches) == 2
+        assert await db.contact_submissions.count_documents({"email_sent": True}) == 3
+
+    asyncio.run(scenario())
+
+
+class RecordingUpdateBatcher(UpdateBatcher):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.single_writes = 0
+
+    async def _write_one(self, item):
+        self.single_writes += 1
+        await super()._write_one(item)
+
+
+def test_disabled_status_batcher_keeps_one_update_many(db, monkeypatch):
+    monkeypatch.setenv("SMTP_USER", "studio@example.com")
+    monkeypatch.setenv("SMTP_PASSWORD", "secret")
+
+    async def scenario():
+        await db.contact_submissions.insert_many([{"id": f"c{n}", "email_sent": False} for n in range(3)])
+        batcher = RecordingUpdateBatcher(db.contact_submissions, enabled=False)
+        handlers = contact_email_handlers(db, FakeTransport(), batcher)
+        payloads = [
+            {"submission_id": f"c{n}", "name": "Name", "email": f"c{n}@example.com",
+             "company": None, "message": "Hello there, world"}
+            for n in range(3)
+        ]
+
+        assert await handlers["contact_notification"](payloads) == [True] * 3
+        assert batcher.single_writes == 0
+        assert await db.contact_submissions.count_documents({"email_sent": True}) == 3
+
+    asyncio.run(scenario())
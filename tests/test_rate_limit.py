@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from utils import rate_limit
+from utils.rate_limit import (
+    InMemoryRateLimiter,
+    MongoRateLimiter,
+    RateLimitMiddleware,
+    RateLimitRule,
+    RedisRateLimiter,
+)
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return clock
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def incr(self, key):
+        self.commands.append(("incr", key))
+
+    def expire(self, key, seconds):
+        self.commands.append(("expire", key))
+
+    def get(self, key):
+        self.commands.append(("get", key))
+
+    async def execute(self):
+        results = []
+        for command, key in self.commands:
+            if command == "incr":
+                self.client.values[key] = self.client.values.get(key, 0) + 1
+                results.append(self.client.values[key])
+            elif command == "expire":
+                results.append(True)
+            else:
+                value = self.client.values.get(key)
+                results.append(None if value is None else str(value).encode())
+        return results
+
+
+class FakeRedis:
+    """The subset of redis.asyncio the limiter uses"""
+
+    def __init__(self):
+        self.values = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def decr(self, key):
+        self.values[key] -= 1
+        return self.values[key]
+
+
+@pytest.fixture(params=["memory", "mongo", "redis"])
+def limiter(request, db):
+    if request.param == "memory":
+        return InMemoryRateLimiter()
+    if request.param == "mongo":
+        return MongoRateLimiter(db)
+    return RedisRateLimiter(FakeRedis())
+
+
+def test_limit_is_enforced_and_rejections_are_not_counted(limiter, clock):
+    async def scenario():
+        results = [await limiter.hit("contact:1.2.3.4", 3, 60) for _ in range(5)]
+        assert [result.allowed for result in results] == [True, True, True, False, False]
+        assert [result.remaining for result in results[:3]] == [2, 1, 0]
+        assert results[-1].reset_after > 0
+
+        # Other keys have their own budget
+        assert (await limiter.hit("contact:5.6.7.8", 3, 60)).allowed
+
+        # Once the window has passed the key is allowed again; the rejected
+        # hits would have kept it blocked had they been counted
+        clock.now += 120
+        assert (await limiter.hit("contact:1.2.3.4", 3, 60)).allowed
+
+    asyncio.run(scenario())
+
+
+def test_in_memory_limiter_evicts_least_recently_used_keys(clock):
+    limiter = InMemoryRateLimiter(max_keys=2)
+    for key in ("a", "b", "a", "c"):
+        limiter.hit_sync(key, 1, 60)
+
+    assert len(limiter) == 2
+    # "b" was evicted, so it starts over with a full budget
+    assert limiter.hit_sync("b", 1, 60).allowed
+    assert not limiter.hit_sync("c", 1, 60).allowed
+
+
+def test_middleware_limits_matching_routes_only(clock):
+    app = FastAPI()
+
+    @app.post("/api/contact")
+    async def contact():
+        return {"ok": True}
+
+    @app.get("/api/contact")
+    async def listing():
+        return {"ok": True}
+
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=InMemoryRateLimiter(),
+        rules=[RateLimitRule("contact", "/api/contact", 1, 300, frozenset({"POST"}))]
+    )
+    client = TestClient(app)
+
+    first = client.post("/api/contact")
+    assert first.status_code == 200
+    assert first.headers["x-ratelimit-remaining"] == "0"
+
+    second = client.post("/api/contact")
+    assert second.status_code == 429
+    assert int(second.headers["retry-after"]) > 0
+
+    assert client.get("/api/contact").status_code == 200
+
+
+def test_middleware_lets_requests_through_when_the_backend_fails(clock):
+    class BrokenLimiter(rate_limit.RateLimiter):
+        async def hit(self, key, limit, window):
+            raise ConnectionError("redis unavailable")
+
+    app = FastAPI()
+
+    @app.post("/api/contact")
+    async def contact():
+        return {"ok": True}
+
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=BrokenLimiter(),
+        rules=[RateLimitRule("contact", "/api/contact", 1, 300)]
+    )
+
+    assert TestClient(app).post("/api/contact").status_code == 200
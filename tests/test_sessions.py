@@ -0,0 +1,69 @@
+import asyncio
+from datetime import timedelta
+
+from utils.sessions import SESSIONS_COLLECTION, SessionStore
+
+
+def test_refresh_token_rotates_once(db):
+    async def scenario():
+        store = SessionStore(db)
+        session_id, token = await store.create("admin")
+
+        username, rotated_id, new_token = await store.rotate(token)
+        assert (username, rotated_id) == ("admin", session_id)
+        assert new_token != token and new_token.startswith(f"{session_id}.")
+
+        assert await store.rotate(new_token) is not None
+
+    asyncio.run(scenario())
+
+
+def test_reusing_a_rotated_token_ends_the_session(db):
+    async def scenario():
+        store = SessionStore(db)
+        session_id, token = await store.create("admin")
+        _, _, new_token = await store.rotate(token)
+
+        assert await store.rotate(token) is None
+        assert await db[SESSIONS_COLLECTION].find_one({"_id": session_id}) is None
+        # The legitimate holder is logged out too
+        assert await store.rotate(new_token) is None
+
+    asyncio.run(scenario())
+
+
+def test_expired_session_is_rejected(db):
+    async def scenario():
+        store = SessionStore(db, ttl=timedelta(seconds=-1))
+        session_id, token = await store.create("admin")
+
+        assert await store.rotate(token) is None
+        # Left for the TTL index, not treated as token reuse
+        assert await db[SESSIONS_COLLECTION].find_one({"_id": session_id}) is not None
+
+    asyncio.run(scenario())
+
+
+def test_malformed_or_unknown_tokens_are_rejected(db):
+    async def scenario():
+        store = SessionStore(db)
+        session_id, token = await store.create("admin")
+
+        for bad in ("", "no-dot", f"{session_id}.", ".secret", "unknown.secret"):
+            assert await store.rotate(bad) is None
+        assert await db[SESSIONS_COLLECTION].find_one({"_id": session_id}) is not None
+        # A wrong secret for a known session id is treated as reuse
+        assert await store.rotate(f"{session_id}.wrong") is None
+        assert await store.rotate(token) is None
+
+    asyncio.run(scenario())
+
+
+def test_ended_session_cannot_refresh(db):
+    async def scenario():
+        store = SessionStore(db)
+        session_id, token = await store.create("admin")
+        await store.end(session_id)
+        assert await store.rotate(token) is None
+
+    asyncio.run(scenario())
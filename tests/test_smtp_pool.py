@@ -0,0 +1,177 @@
+import smtplib
+from email.message import EmailMessage
+
+from utils.smtp_pool import SMTPConnectionPool, SMTPSettings
+
+
+class FakeSMTP:
+    """Records what the pool does with one SMTP session"""
+
+    def __init__(self, server, host, port, timeout=None):
+        self.server = server
+        self.sent = []
+        self.closed = False
+        self.alive = True
+
+    def ehlo(self):
+        return 250, b"ok"
+
+    def starttls(self):
+        return 220, b"ready"
+
+    def login(self, user, password):
+        self.server.logins += 1
+        if password != self.server.password:
+            raise smtplib.SMTPAuthenticationError(535, b"bad credentials")
+        return 235, b"ok"
+
+    def noop(self):
+        if not self.alive:
+            raise smtplib.SMTPServerDisconnected("gone")
+        return 250, b"ok"
+
+    def send_message(self, message):
+        if not self.alive:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        if message["To"] in self.server.rejected:
+            raise smtplib.SMTPRecipientsRefused({message["To"]: (550, b"no such user")})
+        self.sent.append(message["To"])
+        return {}
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+class FakeServer:
+    def __init__(self):
+        self.sessions = []
+        self.rejected = set()
+        self.password = "p"
+        self.logins = 0
+
+    def __call__(self, host, port, timeout=None):
+        session = FakeSMTP(self, host, port, timeout)
+        self.sessions.append(session)
+        return session
+
+
+def message(to):
+    msg = EmailMessage()
+    msg["To"] = to
+    msg["From"] = "studio@example.com"
+    msg.set_content("hello")
+    return msg
+
+
+def make_pool(server, **kwargs):
+    settings = SMTPSettings(host="localhost", port=25, user="u", password="p")
+    return SMTPConnectionPool(settings, connection_factory=server, **kwargs)
+
+
+def test_sends_reuse_one_connection():
+    server = FakeServer()
+    pool = make_pool(server)
+
+    for n in range(3):
+        pool.send(message(f"c{n}@example.com"))
+    assert pool.send_batch([message("d0@example.com"), message("d1@example.com")]) == [True, True]
+
+    assert pool.connections_opened == 1
+    assert len(server.sessions[0].sent) == 5
+
+
+def test_idle_connection_failing_noop_is_replaced():
+    server = FakeServer()
+    pool = make_pool(server, health_check_after=0.0)
+
+    pool.send(message("a@example.com"))
+    server.sessions[0].alive = False
+    pool.send(message("b@example.com"))
+
+    assert pool.connections_opened == 2
+    assert server.sessions[0].closed
+    assert server.sessions[1].sent == ["b@example.com"]
+
+
+def test_connections_past_max_idle_are_evicted():
+    server = FakeServer()
+    pool = make_pool(server, max_idle=0.0)
+
+    pool.send(message("a@example.com"))
+    pool.send(message("b@example.com"))
+
+    assert pool.connections_opened == 2
+    assert server.sessions[0].closed
+
+
+def test_dropped_session_is_reconnected_mid_batch():
+    server = FakeServer()
+    pool = make_pool(server, health_check_after=60.0)
+
+    pool.send(message("a@example.com"))
+    # Dropped without the pool noticing: the health check is skipped
+    server.sessions[0].alive = False
+
+    assert pool.send_batch([message("b@example.com"), message("c@example.com")]) == [True, True]
+    assert pool.connections_opened == 2
+    assert server.sessions[1].sent == ["b@example.com", "c@example.com"]
+
+
+def test_connection_is_recycled_after_max_messages():
+    server = FakeServer()
+    pool = make_pool(server, max_messages_per_connection=2)
+
+    for n in range(3):
+        pool.send(message(f"c{n}@example.com"))
+
+    assert pool.connections_opened == 2
+    assert [len(session.sent) for session in server.sessions] == [2, 1]
+
+
+def test_rejected_recipient_fails_only_its_message():
+    server = FakeServer()
+    server.rejected.add("bad@example.com")
+    pool = make_pool(server)
+
+    results = pool.send_batch([message("a@example.com"), message("bad@example.com"), message("b@example.com")])
+
+    assert results == [True, False, True]
+    assert pool.connections_opened == 1
+    assert server.sessions[0].sent == ["a@example.com", "b@example.com"]
+
+
+def test_close_quits_idle_connections():
+    server = FakeServer()
+    pool = make_pool(server)
+
+    pool.send(message("a@example.com"))
+    pool.close()
+
+    assert server.sessions[0].closed
+
+
+def test_failed_login_stops_the_batch_after_one_attempt():
+    server = FakeServer()
+    server.password = "rotated"
+    pool = make_pool(server)
+
+    results = pool.send_batch([message(f"c{n}@example.com") for n in range(20)])
+
+    assert results == [False] * 20
+    assert server.logins == 1
+    assert all(session.closed for session in server.sessions)
+
+
+def test_lost_session_that_cannot_be_reopened_fails_the_rest():
+    server = FakeServer()
+    pool = make_pool(server, health_check_after=60.0)
+
+    pool.send(message("a@example.com"))
+    server.sessions[0].alive = False
+    server.password = "rotated"
+
+    assert pool.send_batch([message("b@example.com"), message("c@example.com")]) == [False, False]
+    assert server.logins == 2
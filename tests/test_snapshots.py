@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from starlette.requests import Request
+
+from models.cms import Service
+from utils.http_cache import format_http_date
+from utils.snapshots import build_document_snapshot, build_snapshot
+
+
+def service(n, updated_at):
+    return {"id": f"s{n}", "title": f"Service {n}", "subtitle": "s", "description": "d",
+            "icon": "i", "outcomes": [], "order": n, "active": True, "updated_at": updated_at}
+
+
+def conditional_get(since):
+    return Request({
+        "type": "http", "method": "GET", "path": "/", "query_string": b"",
+        "headers": [(b"if-modified-since", format_http_date(since).encode())],
+    })
+
+
+def test_listing_is_not_304_after_an_item_is_removed():
+    newest = datetime(2024, 5, 1, 12, 0, 0)
+    before = build_snapshot(Service, [service(1, datetime(2024, 1, 1)), service(2, newest)])
+    # Deleting the older item changes the body but not the newest updated_at
+    after = build_snapshot(Service, [service(2, newest)])
+
+    assert after.etag != before.etag
+    assert after.response(conditional_get(newest)).status_code == 200
+
+
+def test_document_keeps_its_last_modified():
+    updated_at = datetime(2024, 5, 1, 12, 0, 0)
+    snapshot = build_document_snapshot(Service, service(1, updated_at))
+
+    assert snapshot.last_modified == updated_at
+    assert snapshot.response(conditional_get(updated_at)).status_code == 304
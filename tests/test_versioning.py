@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from repositories.content import create_content_repositories
+from routes.cms import create_cms_router
+from utils.auth import get_current_user
+from utils.versioning import VersionConflict, atomic_update, parse_if_match
+
+
+def service(item_id, **fields):
+    return {"id": item_id, "title": "Service", "subtitle": "s", "description": "d",
+            "icon": "i", "outcomes": ["o"], "order": 0, "active": True, **fields}
+
+
+def test_parse_if_match():
+    assert parse_if_match(None) is None
+    assert parse_if_match(" * ") is None
+    assert parse_if_match('"v3"') == [3]
+    assert parse_if_match('"v1", "v2"') == [1, 2]
+    # Strong comparison: a weak tag cannot match, but the rest of the list still can
+    assert parse_if_match('W/"v1", "v2"') == [2]
+    for header in ('W/"v1"', '"abc"', '"v"', "v1"):
+        with pytest.raises(ValueError):
+            parse_if_match(header)
+
+
+def test_atomic_update_checks_the_version(db):
+    async def scenario():
+        await db.services.insert_one(service("s1", version=2))
+
+        updated = await atomic_update(db.services, "s1", {"title": "New"}, [2])
+        assert (updated["title"], updated["version"]) == ("New", 3)
+        assert "_id" not in updated
+
+        with pytest.raises(VersionConflict) as conflict:
+            await atomic_update(db.services, "s1", {"title": "Stale"}, [2])
+        assert conflict.value.current_version == 3
+
+        # A missing document is not a conflict
+        assert await atomic_update(db.services, "missing", {"title": "x"}, [1]) is None
+        # No If-Match: any version is updated
+        assert (await atomic_update(db.services, "s1", {"title": "Any"}))["version"] == 4
+
+    asyncio.run(scenario())
+
+
+def test_documents_without_a_version_count_as_v0(db):
+    async def scenario():
+        await db.services.insert_one(service("legacy"))
+
+        with pytest.raises(VersionConflict) as conflict:
+            await atomic_update(db.services, "legacy", {"title": "x"}, [1])
+        assert conflict.value.current_version == 0
+
+        updated = await atomic_update(db.services, "legacy", {"title": "New"}, [0])
+        assert updated["version"] == 1
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def client(db):
+    app = FastAPI()
+    app.include_router(create_cms_router(create_content_repositories(db)))
+    app.dependency_overrides[get_current_user] = lambda: {"username": "admin"}
+    asyncio.run(db.services.insert_one(service("s1", version=1)))
+    return TestClient(app)
+
+
+def test_put_with_if_match(client):
+    stale = client.put("/cms/services/s1", json={"title": "A"}, headers={"If-Match": '"v0"'})
+    assert stale.status_code == 412
+    assert stale.headers["ETag"] == '"v1"'
+
+    ok = client.put("/cms/services/s1", json={"title": "A"}, headers={"If-Match": '"v1"'})
+    assert ok.status_code == 200
+    assert ok.headers["ETag"] == '"v2"'
+
+    assert client.put("/cms/services/s1", json={"title": "B"}, headers={"If-Match": "*"}).status_code == 200
+    assert client.put("/cms/services/s1", json={"title": "C"}).status_code == 200
+
+
+def test_put_rejects_weak_and_foreign_tags(client):
+    for header in ('W/"v1"', '"0123abcd"'):
+        response = client.put("/cms/services/s1", json={"title": "A"}, headers={"If-Match": header})
+        assert response.status_code == 412
+    assert client.get("/cms/services/s1").json()["title"] == "Service"
+
+
+def test_put_to_a_missing_document_is_404_not_412(client):
+    response = client.put("/cms/services/missing", json={"title": "A"}, headers={"If-Match": '"v1"'})
+    assert response.status_code == 404
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+from pymongo.errors import DuplicateKeyError, WriteError
+
+from utils.write_behind import InsertBatcher, UpdateBatcher
+
+
+def test_full_batch_is_flushed_without_waiting_for_the_timer(db):
+    async def scenario():
+        batcher = InsertBatcher(db.contact_submissions, max_batch=3, max_delay=10.0)
+        await asyncio.wait_for(
+            asyncio.gather(*(batcher.insert({"id": f"c{n}"}) for n in range(3))), timeout=1.0
+        )
+        assert await db.contact_submissions.count_documents({}) == 3
+        return batcher.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["batches"] == 1
+    assert stats["writes"] == 3
+
+
+def test_partial_batch_is_flushed_by_the_timer(db):
+    async def scenario():
+        batcher = InsertBatcher(db.contact_submissions, max_batch=100, max_delay=0.01)
+        await asyncio.wait_for(
+            asyncio.gather(*(batcher.insert({"id": f"c{n}"}) for n in range(2))), timeout=1.0
+        )
+        return batcher.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["batches"] == 1
+    assert stats["mean_batch_size"] == 2
+
+
+def test_bulk_write_errors_reach_only_the_failing_caller(db):
+    async def scenario():
+        await db.contact_submissions.insert_one({"_id": "taken"})
+        batcher = InsertBatcher(db.contact_submissions, max_batch=3, max_delay=10.0)
+        results = await asyncio.gather(
+            batcher.insert({"_id": "first"}),
+            batcher.insert({"_id": "taken"}),
+            batcher.insert({"_id": "last"}),
+            return_exceptions=True
+        )
+        ids = sorted([doc["_id"] async for doc in db.contact_submissions.find()])
+        return results, ids, batcher.stats()
+
+    results, ids, stats = asyncio.run(scenario())
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], WriteError)
+    # Unordered: the writes after the failing one were still applied
+    assert ids == ["first", "last", "taken"]
+    assert stats["failed"] == 1
+
+
+def test_other_errors_fail_every_caller_in_the_batch(db):
+    class BrokenBatcher(InsertBatcher):
+        async def _write_many(self, documents):
+            raise ConnectionError("primary stepped down")
+
+    async def scenario():
+        batcher = BrokenBatcher(db.contact_submissions, max_batch=2, max_delay=10.0)
+        return await asyncio.gather(
+            batcher.insert({"id": "a"}), batcher.insert({"id": "b"}), return_exceptions=True
+        )
+
+    assert all(isinstance(result, ConnectionError) for result in asyncio.run(scenario()))
+
+
+def test_close_drains_pending_writes(db):
+    async def scenario():
+        await db.contact_submissions.insert_many([{"id": f"c{n}", "email_sent": False} for n in range(3)])
+        batcher = UpdateBatcher(db.contact_submissions, max_batch=100, max_delay=60.0)
+        callers = [
+            asyncio.create_task(batcher.update_one({"id": f"c{n}"}, {"$set": {"email_sent": True}}))
+            for n in range(3)
+        ]
+        await asyncio.sleep(0)
+        assert batcher.stats()["pending"] == 3
+
+        await asyncio.wait_for(batcher.close(), timeout=1.0)
+        await asyncio.gather(*callers)
+        assert await db.contact_submissions.count_documents({"email_sent": True}) == 3
+        return batcher.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["pending"] == 0
+    assert stats["batches"] == 1
+
+
+def test_disabled_batcher_writes_straight_through(db):
+    async def scenario():
+        await db.contact_submissions.insert_one({"_id": "taken"})
+        batcher = InsertBatcher(db.contact_submissions, enabled=False)
+        await batcher.insert({"_id": "new"})
+        with pytest.raises(DuplicateKeyError):
+            await batcher.insert({"_id": "taken"})
+        return batcher.stats()
+
+    assert asyncio.run(scenario())["batches"] == 0